@@ -8,7 +8,7 @@ class Answer(Base):
     __tablename__ = "answers"
 
     id = Column(Integer, primary_key=True, index=True)
-    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id = Column(String, nullable=False)  # UUID string
     text = Column(String, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(UTC))
@@ -11,5 +11,5 @@ class Question(Base):
     text = Column(String, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(UTC))
     
-    # Relationship with answers
-    answers = relationship("Answer", back_populates="question", cascade="all, delete-orphan")
+    # Relationship with answers; удаление ответов выполняет база (ON DELETE CASCADE)
+    answers = relationship("Answer", back_populates="question", cascade="all, delete-orphan", passive_deletes=True)
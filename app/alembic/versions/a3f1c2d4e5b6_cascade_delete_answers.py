@@ -0,0 +1,55 @@
+"""Cascade delete answers on the database level
+
+Revision ID: a3f1c2d4e5b6
+Revises: 07c7d57cb7fb
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f1c2d4e5b6'
+down_revision = '07c7d57cb7fb'
+branch_labels = None
+depends_on = None
+
+
+def _answers_table(ondelete):
+    """Описание таблицы answers для пересоздания в SQLite"""
+    return sa.Table(
+        'answers', sa.MetaData(),
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('question_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('text', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['question_id'], ['questions.id'], ondelete=ondelete),
+        sa.PrimaryKeyConstraint('id'),
+        sa.Index('ix_answers_id', 'id'),
+    )
+
+
+def _replace_foreign_key(ondelete):
+    if op.get_bind().dialect.name == 'sqlite':
+        # SQLite не умеет менять ограничения - пересоздаем таблицу с новым внешним ключом
+        with op.batch_alter_table('answers', copy_from=_answers_table(ondelete), recreate='always'):
+            pass
+        return
+    op.drop_constraint('answers_question_id_fkey', 'answers', type_='foreignkey')
+    op.create_foreign_key(
+        'answers_question_id_fkey', 'answers', 'questions',
+        ['question_id'], ['id'], ondelete=ondelete
+    )
+
+
+def upgrade() -> None:
+    _replace_foreign_key('CASCADE')
+    # Индекс нужен, чтобы каскадное удаление не сканировало всю таблицу answers
+    op.create_index(op.f('ix_answers_question_id'), 'answers', ['question_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_answers_question_id'), table_name='answers')
+    _replace_foreign_key(None)
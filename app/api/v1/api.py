@@ -1,7 +1,9 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import users, questions, answers
+from app.api.v1.endpoints import users, questions, answers, imports, admin
 
 api_router = APIRouter()
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(questions.router, prefix="/questions", tags=["questions"])
 api_router.include_router(answers.router, prefix="/answers", tags=["answers"])
+api_router.include_router(imports.router, prefix="/import", tags=["import"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
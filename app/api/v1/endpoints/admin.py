@@ -0,0 +1,75 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.memory import memory_tracker
+from app.core.profiler import ProfilerBusyError, SamplingProfiler, route_codes
+from app.core.slow_queries import slow_query_log
+from app.core.tracing import TracedRoute
+from app.api.v1.endpoints.users import get_current_user
+
+router = APIRouter(route_class=TracedRoute)
+
+
+def get_current_admin(current_user: dict = Depends(get_current_user)):
+    """Текущий пользователь, если его email указан в ADMIN_EMAILS"""
+    if current_user["email"] not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+
+@router.post("/profile", response_class=PlainTextResponse, status_code=200)
+async def profile_worker(
+    request: Request,
+    seconds: float = Query(10, gt=0, le=settings.PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    admin: dict = Depends(get_current_admin)
+):
+    """Профилировать обработавший запрос воркер и вернуть collapsed stacks
+
+    Результат можно открыть в speedscope или передать в flamegraph.pl.
+    """
+    profiler = SamplingProfiler(interval_ms / 1000, route_codes(request.app.routes))
+    try:
+        result = await run_in_threadpool(profiler.run, seconds)
+    except ProfilerBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Profiling is already running"
+        )
+    return PlainTextResponse(result, headers={
+        "Content-Disposition": 'attachment; filename="profile.folded"',
+        "X-Profile-Samples": str(profiler.sample_count),
+    })
+
+
+@router.get("/memory", status_code=200)
+async def memory_report(limit: int = Query(10, ge=1, le=100), admin: dict = Depends(get_current_admin)):
+    """Выделения памяти по маршрутам и текущие места наибольших выделений
+
+    Данные собираются только при MEMORY_TRACKING_ENABLED=true.
+    """
+    return await run_in_threadpool(memory_tracker.report, limit)
+
+
+@router.delete("/memory", status_code=204)
+async def reset_memory_report(admin: dict = Depends(get_current_admin)):
+    """Сбросить накопленную статистику памяти"""
+    memory_tracker.reset()
+    return None
+
+
+@router.get("/slow-queries", status_code=200)
+async def slow_queries(limit: int = Query(20, ge=1, le=100), admin: dict = Depends(get_current_admin)):
+    """Медленные запросы по отпечатку SQL в порядке убывания суммарного времени"""
+    return {"threshold_ms": slow_query_log.threshold_ms, "queries": slow_query_log.report(limit)}
+
+
+@router.delete("/slow-queries", status_code=204)
+async def reset_slow_queries(admin: dict = Depends(get_current_admin)):
+    """Очистить таблицу медленных запросов"""
+    slow_query_log.reset()
+    return None
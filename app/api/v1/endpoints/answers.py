@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.serialization import parse_fields, render_list
+from app.core.tracing import TracedRoute
 from app.services.answer_service import AnswerService
+from app.services.answer_batcher import answer_batcher
+from app.core.config import settings
 from app.models.answer import AnswerCreate, AnswerResponse
+from app.models.bulk import BulkCreateResponse
 from app.api.v1.endpoints.users import get_current_user
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 @router.get("/", response_model=list[AnswerResponse], status_code=200)
@@ -13,7 +18,7 @@ async def get_answers(db: Session = Depends(get_db)):
     """Получить все ответы"""
     answer_service = AnswerService(db)
     answers = answer_service.get_all_answers()
-    return answers
+    return render_list(AnswerResponse, answers)
 
 
 @router.post("/", response_model=AnswerResponse, status_code=201)
@@ -23,11 +28,25 @@ async def create_answer(
     db: Session = Depends(get_db)
 ):
     """Создать новый ответ"""
+    if settings.ANSWER_GROUP_COMMIT_ENABLED:
+        return await answer_batcher.submit(answer_data, current_user["email"])
     answer_service = AnswerService(db)
     answer = answer_service.create_answer(answer_data, current_user["email"])
     return answer
 
 
+@router.post("/bulk", response_model=BulkCreateResponse, status_code=201)
+async def create_answers_bulk(
+    answers_data: list[AnswerCreate],
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Создать несколько ответов одним запросом"""
+    answer_service = AnswerService(db)
+    ids = answer_service.create_answers_bulk(answers_data, current_user["email"])
+    return BulkCreateResponse(ids=ids, count=len(ids))
+
+
 @router.get("/{answer_id}", response_model=AnswerResponse, status_code=200)
 async def get_answer(answer_id: int, db: Session = Depends(get_db)):
     """Получить ответ по ID"""
@@ -37,11 +56,16 @@ async def get_answer(answer_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/question/{question_id}", response_model=list[AnswerResponse], status_code=200)
-async def get_answers_by_question(question_id: int, db: Session = Depends(get_db)):
+async def get_answers_by_question(
+    question_id: int,
+    fields: str | None = Query(None, description="Поля ответа через запятую, например id,text"),
+    db: Session = Depends(get_db)
+):
     """Получить все ответы на конкретный вопрос"""
+    selected = parse_fields(AnswerResponse, fields)
     answer_service = AnswerService(db)
-    answers = answer_service.get_answers_by_question_id(question_id)
-    return answers
+    answers = answer_service.get_answers_by_question_id(question_id, selected)
+    return render_list(AnswerResponse, answers, selected)
 
 
 @router.get("/user/{user_id}", response_model=list[AnswerResponse], status_code=200)
@@ -49,7 +73,7 @@ async def get_answers_by_user(user_id: str, db: Session = Depends(get_db)):
     """Получить все ответы конкретного пользователя"""
     answer_service = AnswerService(db)
     answers = answer_service.get_answers_by_user_id(user_id)
-    return answers
+    return render_list(AnswerResponse, answers)
 
 
 @router.delete("/{answer_id}", status_code=204)
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.tracing import TracedRoute
+from app.services.import_service import ImportService
+from app.models.imports import ImportReport
+from app.api.v1.endpoints.users import get_current_user
+
+router = APIRouter(route_class=TracedRoute)
+
+
+@router.post("/ndjson", response_model=ImportReport, status_code=200)
+async def import_ndjson(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Потоковый импорт вопросов и ответов в формате NDJSON
+
+    Каждая строка - объект с полем type: "question" или "answer".
+    Автор ответов - текущий пользователь; user_id из строк сохраняется,
+    а явные id и created_at принимаются только для пользователей из ADMIN_EMAILS.
+    """
+    import_service = ImportService(db)
+    report = await import_service.import_ndjson(
+        request.stream(),
+        current_user["email"],
+        admin=current_user["email"] in settings.ADMIN_EMAILS
+    )
+    return report
@@ -1,18 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.services.question_service import QuestionService
+from app.core.serialization import msgpack_requested, parse_fields, render_list
+from app.core.tracing import TracedRoute
+from app.services.question_service import QuestionService, question_response_cache
 from app.models.question import QuestionCreate, QuestionResponse, QuestionWithAnswersResponse
+from app.models.bulk import BulkCreateResponse
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 @router.get("/", response_model=list[QuestionResponse], status_code=200)
-async def get_questions(db: Session = Depends(get_db)):
+async def get_questions(
+    fields: str | None = Query(None, description="Поля ответа через запятую, например id,text"),
+    db: Session = Depends(get_db)
+):
     """Получить все вопросы с количеством ответов"""
+    selected = parse_fields(QuestionResponse, fields)
     question_service = QuestionService(db)
-    questions = question_service.get_all_questions()
-    return questions
+    questions = question_service.get_all_questions(selected)
+    return render_list(QuestionResponse, questions, selected)
 
 
 @router.post("/", response_model=QuestionResponse, status_code=201)
@@ -23,6 +30,14 @@ async def create_question(question_data: QuestionCreate, db: Session = Depends(g
     return question
 
 
+@router.post("/bulk", response_model=BulkCreateResponse, status_code=201)
+async def create_questions_bulk(questions_data: list[QuestionCreate], db: Session = Depends(get_db)):
+    """Создать несколько вопросов одним запросом"""
+    question_service = QuestionService(db)
+    ids = question_service.create_questions_bulk(questions_data)
+    return BulkCreateResponse(ids=ids, count=len(ids))
+
+
 @router.get("/{question_id}", response_model=QuestionResponse, status_code=200)
 async def get_question(question_id: int, db: Session = Depends(get_db)):
     """Получить вопрос по ID"""
@@ -32,11 +47,13 @@ async def get_question(question_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{question_id}/with-answers", response_model=QuestionWithAnswersResponse, status_code=200)
-async def get_question_with_answers(question_id: int, db: Session = Depends(get_db)):
-    """Получить вопрос со всеми ответами"""
+async def get_question_with_answers(question_id: int, request: Request, db: Session = Depends(get_db)):
+    """Получить вопрос со всеми ответами (тело из кеша, сжатое по Accept-Encoding)"""
     question_service = QuestionService(db)
-    question = question_service.get_question_with_answers(question_id)
-    return question
+    entry = question_service.get_question_with_answers_body(question_id)
+    # Для MessagePack нужен несжатый JSON: его перекодирует MsgpackMiddleware
+    accept_encoding = None if msgpack_requested() else request.headers.get("accept-encoding")
+    return question_response_cache.respond(entry, accept_encoding)
 
 
 @router.delete("/{question_id}", status_code=204)
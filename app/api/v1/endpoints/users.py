@@ -10,20 +10,21 @@ from app.models.user import (
 )
 from datetime import timedelta
 from app.core.config import settings
+from app.core.serialization import render_list
+from app.core.tracing import TracedRoute, traced
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 security = HTTPBearer()
 
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Получить текущего пользователя из токена"""
-    token = credentials.credentials
+def _decode_token(token: str, token_type: str, detail: str) -> dict:
+    """Проверить JWT и вернуть email и user_id без обращения к базе данных"""
     payload = verify_token(token)
     
-    if not payload or payload.get("type") != "access":
+    if not payload or payload.get("type") != token_type:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
+            detail=detail
         )
     
     email = payload.get("sub")
@@ -32,18 +33,30 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
     if not email or not user_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
+            detail=detail
         )
     
     return {"email": email, "user_id": user_id}
 
 
+@traced("get_current_user", "auth")
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Получить текущего пользователя из токена"""
+    return _decode_token(credentials.credentials, "access", "Invalid token")
+
+
+@traced("get_refresh_token_owner", "auth")
+def get_refresh_token_owner(refresh_data: RefreshToken):
+    """Проверить refresh токен до открытия сессии базы данных"""
+    return _decode_token(refresh_data.refresh_token, "refresh", "Invalid refresh token")
+
+
 @router.get("/", response_model=list[UserResponse], status_code=200)
 async def get_users(db: Session = Depends(get_db)):
     """Получить список всех пользователей"""
     user_service = UserService(db)
     users = user_service.get_all_users()
-    return users
+    return render_list(UserResponse, users)
 
 
 @router.post("/register", response_model=UserResponse, status_code=201)
@@ -86,30 +99,16 @@ async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db))
 
 
 @router.post("/refresh", response_model=Token, status_code=200)
-async def refresh_token(refresh_data: RefreshToken, db: Session = Depends(get_db)):
+async def refresh_token(
+    token_owner: dict = Depends(get_refresh_token_owner),
+    db: Session = Depends(get_db)
+):
     """Обновление access токена через refresh токен"""
     user_service = UserService(db)
     
-    # Проверяем refresh токен
-    payload = verify_token(refresh_data.refresh_token)
-    if not payload or payload.get("type") != "refresh":
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid refresh token"
-        )
-    
-    email = payload.get("sub")
-    user_id = payload.get("user_id")
-    
-    if not email or not user_id:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid refresh token"
-        )
-    
-    # Получаем пользователя
-    user = user_service.get_user_by_email(email)
-    if not user or user.id != user_id:
+    # Получаем пользователя из базы: удаленный другим воркером не должен получить новые токены
+    user = user_service.get_user_by_email(token_owner["email"], fresh=True)
+    if not user or user.id != token_owner["user_id"]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
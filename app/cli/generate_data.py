@@ -0,0 +1,295 @@
+"""Генерация синтетических пользователей, вопросов и ответов
+
+    python -m app.cli.generate_data --users 100000 --questions 1000000 --answers 5000000
+
+Распределения: число ответов на вопрос - Zipf (немногие вопросы собирают
+большую часть ответов), created_at - всплески активности поверх равномерного
+фона, длина текстов - логнормальная. Все пользователи получают один заранее
+посчитанный хеш пароля (--password), поэтому bcrypt не ограничивает скорость.
+Строки генерируются векторно через NumPy и вставляются чанками: executemany
+на SQLite, COPY на PostgreSQL; неуникальные индексы строятся после вставки.
+Без NumPy генерация работает на модуле random, в несколько раз медленнее.
+"""
+import argparse
+import csv
+import io
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+try:
+    import numpy as np
+except ImportError:  # NumPy есть в requirements.txt; запасной путь на random заметно медленнее
+    np = None
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Источник текстов: срез корпуса со случайным смещением
+_CORPUS = (
+    "How do I configure the connection pool when the database is behind a proxy and "
+    "requests occasionally time out under load while the workers stay idle? "
+    "Answers should mention pool size, overflow, recycle, pre-ping and timeouts. "
+) * 20
+
+
+class GenerationStats:
+    """Счетчики вставленных строк по таблицам"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows: dict[str, int] = {}
+
+    @property
+    def total(self) -> int:
+        return sum(self.rows.values())
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.total / elapsed if elapsed else 0.0
+
+    def __str__(self) -> str:
+        tables = " ".join(f"{table}={count}" for table, count in self.rows.items())
+        return f"{tables} rate={self.rate:.0f} rows/sec"
+
+
+class Sampler:
+    """Векторная выборка через NumPy или поэлементная через random"""
+
+    def __init__(self, seed: int):
+        self.rng = np.random.default_rng(seed) if np is not None else random.Random(seed)
+
+    def zipf_choice(self, n: int, size: int, exponent: float) -> list[int]:
+        """size индексов из [0, n) с вероятностью ~ 1 / rank**exponent, ранги перемешаны"""
+        if np is not None:
+            weights = 1.0 / np.arange(1, n + 1) ** exponent
+            weights = self.rng.permutation(weights / weights.sum())
+            return self.rng.choice(n, size=size, p=weights)
+        weights = [1.0 / rank ** exponent for rank in range(1, n + 1)]
+        self.rng.shuffle(weights)
+        return self.rng.choices(range(n), weights=weights, k=size)
+
+    def integers(self, n: int, size: int) -> list[int]:
+        if np is not None:
+            return self.rng.integers(0, n, size)
+        rand = self.rng.random
+        return [int(rand() * n) for _ in range(size)]
+
+    def bursty_times(self, size: int, start: float, end: float, bursts: int) -> list[float]:
+        """Отсортированные моменты времени: 70% во всплесках, 30% равномерно"""
+        width = (end - start) / bursts / 4
+        if np is not None:
+            centers = self.rng.uniform(start, end, bursts)
+            weights = 1.0 / np.arange(1, bursts + 1) ** 1.1
+            times = centers[self.rng.choice(bursts, size=size, p=weights / weights.sum())]
+            times = times + self.rng.exponential(width, size)
+            background = self.rng.random(size) < 0.3
+            times[background] = self.rng.uniform(start, end, int(background.sum()))
+            return np.sort(np.minimum(times, end))
+        centers = [self.rng.uniform(start, end) for _ in range(bursts)]
+        weights = [1.0 / rank ** 1.1 for rank in range(1, bursts + 1)]
+        times = [
+            self.rng.uniform(start, end) if self.rng.random() < 0.3
+            else min(end, center + self.rng.expovariate(1 / width))
+            for center in self.rng.choices(centers, weights=weights, k=size)
+        ]
+        return sorted(times)
+
+    def delays(self, size: int, mean: float) -> list[float]:
+        if np is not None:
+            return self.rng.exponential(mean, size)
+        expovariate = self.rng.expovariate
+        return [expovariate(1 / mean) for _ in range(size)]
+
+    def lengths(self, size: int, median: int, low: int, high: int) -> list[int]:
+        """Логнормальные длины текстов в [low, high]"""
+        if np is not None:
+            values = self.rng.lognormal(np.log(median), 0.8, size)
+            return np.clip(values, low, high).astype(np.int64)
+        # Без NumPy длины берутся из заранее посчитанной выборки: lognormvariate медленный
+        pool = [int(min(high, max(low, self.rng.lognormvariate(0, 0.8) * median))) for _ in range(4096)]
+        return self.rng.choices(pool, k=size)
+
+
+def _texts(sampler: Sampler, size: int, median: int, low: int, high: int) -> list[str]:
+    lengths = sampler.lengths(size, median, low, high)
+    offsets = sampler.integers(len(_CORPUS) - high, size)
+    if np is not None:
+        lengths, offsets = lengths.tolist(), offsets.tolist()
+    return [_CORPUS[offset:offset + length] for offset, length in zip(offsets, lengths)]
+
+
+def _timestamps(times) -> list[str]:
+    """Строки времени в формате, который SQLAlchemy пишет в SQLite"""
+    if np is not None:
+        values = np.datetime_as_string((np.asarray(times) * 1_000_000).astype("datetime64[us]"), unit="us")
+        return np.char.replace(values, "T", " ").tolist()
+    return [str(_EPOCH + timedelta(seconds=value)) for value in times]
+
+
+def _tolist(values) -> list:
+    return values.tolist() if np is not None else list(values)
+
+
+def _next_id(conn, table: str) -> int:
+    return conn.execute(text(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")).scalar()
+
+
+def _insert(conn, table: str, columns: tuple, rows: list[tuple]) -> None:
+    """Вставить строки напрямую через драйвер: COPY на PostgreSQL, executemany иначе"""
+    if conn.dialect.name == "postgresql":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor = conn.connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+        return
+    placeholder = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    conn.exec_driver_sql(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join([placeholder] * len(columns))})",
+        rows
+    )
+
+
+def generate(engine, users: int, questions: int, answers: int, *, zipf: float = 1.1, days: int = 365,
+             chunk_size: int = 50_000, seed: int = 42, password: str = "password123", prefix: str = "user",
+             progress=None) -> GenerationStats:
+    """Сгенерировать и вставить данные; id продолжают существующие в таблицах"""
+    from app.core.database import Base
+    from app.services.user_service import pwd_context
+
+    Base.metadata.create_all(bind=engine)
+    sampler = Sampler(seed)
+    stats = GenerationStats()
+    end = time.time()
+    start = end - days * 86400
+    bursts = max(1, days * 2)
+
+    # Неуникальные индексы строятся один раз после вставки (сортировкой), а не по строке
+    indexes = [index for table in Base.metadata.sorted_tables for index in table.indexes if not index.unique]
+
+    # Настройки SQLite на время генерации; соединение вернется в пул движка с прежними
+    pragmas = {"synchronous": "OFF", "foreign_keys": "OFF", "cache_size": -262144}
+
+    with engine.connect() as conn:
+        for index in indexes:
+            index.drop(conn, checkfirst=True)
+        conn.commit()
+        saved = {}
+        try:
+            if conn.dialect.name == "sqlite":
+                # Ссылки согласованы по построению: проверка внешних ключей на каждую строку не нужна
+                for name, value in pragmas.items():
+                    saved[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                    conn.exec_driver_sql(f"PRAGMA {name}={value}")
+
+            def write(table: str, columns: tuple, rows: list[tuple]) -> None:
+                _insert(conn, table, columns, rows)
+                conn.commit()
+                stats.rows[table] = stats.rows.get(table, 0) + len(rows)
+                if progress:
+                    progress(stats)
+
+            # Пользователи: один хеш пароля на всех
+            first_user = _next_id(conn, "users")
+            hashed_password = pwd_context.hash(password)
+            emails = [f"{prefix}_{first_user + i}@example.com" for i in range(users)]
+            user_times = _timestamps(sampler.bursty_times(users, start, end, bursts)) if users else []
+            for offset in range(0, users, chunk_size):
+                write("users", ("id", "username", "email", "hashed_password", "is_active", "created_at", "updated_at"), [
+                    (first_user + i, f"{prefix}_{first_user + i}", emails[i], hashed_password, True,
+                     user_times[i], user_times[i])
+                    for i in range(offset, min(users, offset + chunk_size))
+                ])
+            if not emails:
+                emails = [row[0] for row in conn.execute(text("SELECT email FROM users LIMIT 10000"))]
+
+            # Вопросы: id идут в порядке created_at
+            first_question = _next_id(conn, "questions")
+            question_times = sampler.bursty_times(questions, start, end, bursts)
+            for offset in range(0, questions, chunk_size):
+                size = min(chunk_size, questions - offset)
+                write("questions", ("id", "text", "created_at"), list(zip(
+                    range(first_question + offset, first_question + offset + size),
+                    _texts(sampler, size, median=80, low=10, high=1000),
+                    _timestamps(question_times[offset:offset + size]),
+                )))
+
+            # Ответы: вопрос по Zipf, автор равномерно, время - после вопроса
+            if answers and questions and emails:
+                first_answer = _next_id(conn, "answers")
+                question_index = sampler.zipf_choice(questions, answers, zipf)
+                for offset in range(0, answers, chunk_size):
+                    size = min(chunk_size, answers - offset)
+                    chunk_index = question_index[offset:offset + size]
+                    if np is not None:
+                        times = np.minimum(question_times[chunk_index] + sampler.delays(size, 86400), end)
+                        question_ids = (chunk_index + first_question).tolist()
+                    else:
+                        times = [min(end, question_times[i] + delay) for i, delay in zip(chunk_index, sampler.delays(size, 86400))]
+                        question_ids = [first_question + i for i in chunk_index]
+                    authors = _tolist(sampler.integers(len(emails), size))
+                    write("answers", ("id", "question_id", "user_id", "text", "created_at"), list(zip(
+                        range(first_answer + offset, first_answer + offset + size),
+                        question_ids,
+                        [emails[i] for i in authors],
+                        _texts(sampler, size, median=150, low=5, high=2000),
+                        _timestamps(times),
+                    )))
+        finally:
+            # Индексы и настройки возвращаются и при прерванной генерации
+            conn.rollback()
+            for name, value in saved.items():
+                conn.exec_driver_sql(f"PRAGMA {name}={value}")
+            for index in indexes:
+                index.create(conn, checkfirst=True)
+            conn.commit()
+
+        # Явные id не сдвигают последовательности PostgreSQL
+        if conn.dialect.name == "postgresql":
+            for table in ("users", "questions", "answers"):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+                ))
+            conn.commit()
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic users, questions and answers")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--questions", type=int, default=100_000)
+    parser.add_argument("--answers", type=int, default=500_000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="exponent of answers-per-question skew")
+    parser.add_argument("--days", type=int, default=365, help="created_at spread")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", default="password123", help="password of every generated user")
+    parser.add_argument("--prefix", default="user", help="username and email prefix")
+    args = parser.parse_args(argv)
+
+    from sqlalchemy import create_engine
+    from app.core.database import DATABASE_URL, enable_sqlite_foreign_keys
+
+    # Отдельный движок: журнал медленных запросов не должен делать EXPLAIN на каждую пачку
+    engine = create_engine(DATABASE_URL)
+    enable_sqlite_foreign_keys(engine)
+    if np is None:
+        print("NumPy is not installed, falling back to the slower random module", file=sys.stderr)
+    stats = generate(
+        engine, args.users, args.questions, args.answers,
+        zipf=args.zipf, days=args.days, chunk_size=args.chunk_size, seed=args.seed,
+        password=args.password, prefix=args.prefix,
+        progress=lambda stats: print(stats, file=sys.stderr, flush=True)
+    )
+    print(f"Generated {stats}")
+
+
+if __name__ == "__main__":
+    main()
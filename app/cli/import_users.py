@@ -0,0 +1,171 @@
+"""Массовый импорт пользователей из CSV или JSONL
+
+    python -m app.cli.import_users users.csv [--batch-size 1000] [--workers 8]
+
+Файл содержит поля username, email, password. Пароли хешируются параллельно
+во всех ядрах, пользователи вставляются пачками; дубликаты пропускаются до хеширования.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator
+from pydantic import ValidationError
+from sqlalchemy import select, insert, or_
+from sqlalchemy.exc import IntegrityError
+from app.alembic.models.user import User
+from app.models.user import UserCreate
+from app.services.user_service import pwd_context
+from app.core.logging import get_logger, setup_logging, stop_logging
+
+import_logger = get_logger("import_users")
+
+
+def hash_password(password: str) -> str:
+    """Хеширование в процессе пула (функция верхнего уровня для pickle)"""
+    return pwd_context.hash(password)
+
+
+def read_rows(path: str) -> Iterator[dict | None]:
+    """Построчно прочитать CSV или JSONL; вместо строки с невалидным JSON - None"""
+    with open(path, encoding="utf-8", newline="") as file:
+        if path.endswith((".jsonl", ".ndjson")):
+            for number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as exc:
+                    import_logger.warning("Skipping line %s: invalid JSON: %s", number, exc)
+                    yield None
+        else:
+            yield from csv.DictReader(file)
+
+
+def _batches(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class ImportStats:
+    """Счетчики импорта"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.processed = 0
+        self.created = 0
+        self.duplicates = 0
+        self.invalid = 0
+
+    @property
+    def rate(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        return self.created / elapsed if elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"processed={self.processed} created={self.created} duplicates={self.duplicates} "
+            f"invalid={self.invalid} rate={self.rate:.1f} users/sec"
+        )
+
+
+def _drop_duplicates(db, users: list[UserCreate]) -> list[UserCreate]:
+    """Убрать дубликаты внутри пачки и уже существующие в базе"""
+    seen = set()
+    unique = []
+    for user in users:
+        if user.email in seen or user.username in seen:
+            continue
+        seen.update((user.email, user.username))
+        unique.append(user)
+    if not unique:
+        return []
+
+    taken = set()
+    for email, username in db.execute(
+        select(User.email, User.username).where(or_(
+            User.email.in_([user.email for user in unique]),
+            User.username.in_([user.username for user in unique])
+        ))
+    ):
+        taken.update((email, username))
+    return [user for user in unique if user.email not in taken and user.username not in taken]
+
+
+def _insert(db, rows: list[dict]) -> int:
+    """Вставить пачку; при гонке с другим писателем - по одной строке"""
+    try:
+        db.execute(insert(User), rows)
+        db.commit()
+        return len(rows)
+    except IntegrityError:
+        db.rollback()
+    created = 0
+    for row in rows:
+        try:
+            db.execute(insert(User), [row])
+            db.commit()
+            created += 1
+        except IntegrityError:
+            db.rollback()
+    return created
+
+
+def import_users(rows: Iterable[dict], session_factory, executor, batch_size: int = 1000, progress=None) -> ImportStats:
+    """Импортировать пользователей, хешируя пароли в executor"""
+    stats = ImportStats()
+    for batch in _batches(rows, batch_size):
+        stats.processed += len(batch)
+        users = []
+        for row in batch:
+            try:
+                # None - строка JSONL с ошибкой разбора
+                users.append(UserCreate(**row))
+            except (ValidationError, TypeError):
+                stats.invalid += 1
+
+        with session_factory() as db:
+            unique = _drop_duplicates(db, users)
+            stats.duplicates += len(users) - len(unique)
+            chunksize = max(1, len(unique) // (os.cpu_count() or 1) // 4)
+            hashes = executor.map(hash_password, [user.password for user in unique], chunksize=chunksize)
+            created = _insert(db, [
+                {"username": user.username, "email": user.email, "hashed_password": hashed}
+                for user, hashed in zip(unique, hashes)
+            ])
+        stats.duplicates += len(unique) - created
+        stats.created += created
+        if progress:
+            progress(stats)
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Import users from CSV or JSONL")
+    parser.add_argument("path", help="CSV or JSONL file with username, email, password")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    from app.core.database import SessionLocal
+
+    setup_logging()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            stats = import_users(
+                read_rows(args.path), SessionLocal, executor,
+                batch_size=args.batch_size,
+                progress=lambda stats: print(stats, file=sys.stderr, flush=True)
+            )
+        import_logger.info("Import finished: %s", stats)
+    finally:
+        stop_logging()
+
+
+if __name__ == "__main__":
+    main()
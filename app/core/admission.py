@@ -0,0 +1,226 @@
+"""Admission control: ограничение запросов воркера и сброс нагрузки
+
+Воркер выполняет не больше max_concurrency запросов одновременно, последние
+reserved_slots из них доступны только приоритетным запросам (записи и
+маршруты из списка). Остальные ждут в ограниченной очереди не дольше
+queue_timeout; при полной очереди, истекшем ожидании или долгом ожидании
+соединения из пула БД обычные запросы сразу получают 503 с Retry-After.
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.logging import get_logger
+
+admission_logger = get_logger("admission")
+
+HIGH, NORMAL = 0, 1
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+class PoolWaitMonitor:
+    """Время ожидания соединения из пула SQLAlchemy (EWMA) и число ожидающих
+
+    У пула нет события до выдачи соединения, поэтому оборачивается pool.connect.
+    engine.dispose() (например, в воркере после fork) создает новый пул, и
+    обертка ставится на него заново по событию engine_disposed.
+    Среднее старше window секунд считается устаревшим: без новых выдач нагрузки нет.
+    """
+
+    def __init__(self, alpha: float = 0.2, window: float = 1.0):
+        self.alpha = alpha
+        self.window = window
+        self.waiting = 0
+        self._wait_ms = 0.0
+        self._updated = 0.0
+        self._lock = threading.Lock()
+
+    def instrument(self, engine) -> None:
+        self._wrap(engine.pool)
+        event.listen(engine, "engine_disposed", self._on_dispose)
+
+    def _on_dispose(self, engine) -> None:
+        self._wrap(engine.pool)
+
+    def _wrap(self, pool) -> None:
+        connect = pool.connect
+
+        def timed_connect():
+            with self._lock:
+                self.waiting += 1
+            started = time.perf_counter()
+            try:
+                return connect()
+            finally:
+                self._record((time.perf_counter() - started) * 1000)
+
+        pool.connect = timed_connect
+
+    def _record(self, wait_ms: float) -> None:
+        with self._lock:
+            self.waiting -= 1
+            self._wait_ms += self.alpha * (wait_ms - self._wait_ms)
+            self._updated = time.monotonic()
+
+    @property
+    def wait_ms(self) -> float:
+        if time.monotonic() - self._updated > self.window:
+            return 0.0
+        return self._wait_ms
+
+
+class AdmissionController:
+    """Слоты и очередь ожидания воркера с приоритетами; работает в event loop воркера"""
+
+    def __init__(self, max_concurrency: int, reserved_slots: int = 0, max_queue: int = 0,
+                 queue_timeout: float = 1.0, pool_monitor: PoolWaitMonitor | None = None,
+                 max_pool_wait_ms: float | None = None):
+        self.max_concurrency = max_concurrency
+        self.reserved_slots = min(reserved_slots, max_concurrency - 1)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.pool_monitor = pool_monitor
+        self.max_pool_wait_ms = max_pool_wait_ms
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed: dict[str, int] = {"queue_full": 0, "timeout": 0, "pool_wait": 0}
+        self._waiters: tuple[deque, deque] = (deque(), deque())
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters[HIGH]) + len(self._waiters[NORMAL])
+
+    def _limit(self, priority: int) -> int:
+        return self.max_concurrency if priority == HIGH else self.max_concurrency - self.reserved_slots
+
+    def pool_overloaded(self) -> bool:
+        if self.pool_monitor is None or self.max_pool_wait_ms is None:
+            return False
+        return self.pool_monitor.wait_ms > self.max_pool_wait_ms
+
+    def _reject(self, reason: str) -> str:
+        self.shed[reason] += 1
+        return reason
+
+    async def acquire(self, priority: int) -> str | None:
+        """Занять слот; None - запрос допущен, иначе причина отказа"""
+        if priority == NORMAL and self.pool_overloaded():
+            return self._reject("pool_wait")
+        ahead = len(self._waiters[HIGH]) if priority == HIGH else self.queued
+        if ahead == 0 and self.in_flight < self._limit(priority):
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+        if self.queued >= self.max_queue:
+            return self._reject("queue_full")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(future)
+        try:
+            await asyncio.wait({future}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            # Клиент ушел: отдаем уже переданный слот или выходим из очереди
+            if future.done():
+                self.release()
+            else:
+                self._waiters[priority].remove(future)
+            raise
+        if future.done():
+            self.admitted += 1
+            return None
+        self._waiters[priority].remove(future)
+        return self._reject("timeout")
+
+    def release(self) -> None:
+        """Освободить слот и передать его ожидающим (сначала приоритетным)"""
+        self.in_flight -= 1
+        for priority in (HIGH, NORMAL):
+            waiters = self._waiters[priority]
+            while waiters and self.in_flight < self._limit(priority):
+                self.in_flight += 1
+                waiters.popleft().set_result(None)
+
+    def collect(self, registry) -> None:
+        """Коллектор метрик Prometheus"""
+        registry.set_gauge("admission_in_flight", None, self.in_flight)
+        registry.set_gauge("admission_queued", None, self.queued)
+        if self.pool_monitor is not None:
+            registry.set_gauge("db_pool_wait_ms", None, self.pool_monitor.wait_ms)
+            registry.set_gauge("db_pool_waiting", None, self.pool_monitor.waiting)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+            "pool_wait_ms": self.pool_monitor.wait_ms if self.pool_monitor is not None else None,
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware: 503 с Retry-After для запросов сверх лимита воркера"""
+
+    def __init__(self, app, controller: AdmissionController, prefix: str = "",
+                 priority_routes: list[str] = (), priority_writes: bool = True,
+                 retry_after: int = 1, registry=None):
+        self.app = app
+        self.controller = controller
+        self.prefix = prefix
+        self.priority_writes = priority_writes
+        self.retry_after = retry_after
+        self.registry = registry
+        self._priority_routes = set()
+        for route in priority_routes:
+            method, _, path = route.partition(" ")
+            self._priority_routes.add((method.upper(), path.rstrip("/") or "/"))
+
+    def priority(self, scope) -> int:
+        if self.priority_writes and scope["method"] in WRITE_METHODS:
+            return HIGH
+        if (scope["method"], scope["path"].rstrip("/") or "/") in self._priority_routes:
+            return HIGH
+        return NORMAL
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        reason = await self.controller.acquire(self.priority(scope))
+        if reason is None:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.controller.release()
+            return
+
+        admission_logger.debug("Shed %s %s: %s", scope["method"], scope["path"], reason)
+        if self.registry is not None:
+            self.registry.inc("admission_shed_total", {"reason": reason})
+        body = json.dumps({"detail": "Server is overloaded, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+pool_wait_monitor = PoolWaitMonitor()
+
+admission_controller = AdmissionController(
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+    reserved_slots=settings.ADMISSION_RESERVED_SLOTS,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+    pool_monitor=pool_wait_monitor,
+    max_pool_wait_ms=settings.ADMISSION_MAX_POOL_WAIT_MS
+)
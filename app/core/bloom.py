@@ -0,0 +1,46 @@
+import hashlib
+import math
+import threading
+from typing import Iterable
+
+
+class BloomFilter:
+    """Bloom-фильтр для быстрой проверки отсутствия значения
+
+    Отрицательный ответ точный, положительный требует проверки в базе.
+    Удаление не поддерживается: устаревшие значения стоят лишь одного запроса.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, value: str) -> list[int]:
+        """Позиции битов для значения (двойное хеширование)"""
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, value: str) -> None:
+        """Добавить значение в фильтр"""
+        positions = self._positions(value)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+
+    def update(self, values: Iterable[str]) -> None:
+        """Добавить несколько значений"""
+        for value in values:
+            self.add(value)
+
+    def clear(self) -> None:
+        """Очистить фильтр"""
+        with self._lock:
+            self._bits = bytearray(len(self._bits))
+
+    def __contains__(self, value: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
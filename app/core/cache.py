@@ -0,0 +1,132 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """LRU-кеш с временем жизни записей, кешированием промахов и счетчиками
+
+    Значение None сохраняется как отрицательная запись с отдельным TTL.
+    """
+
+    MISSING = object()
+
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float | None = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Получить значение; при промахе вернуть default"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Сохранить значение (None - отрицательная запись)"""
+        ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: Hashable) -> None:
+        """Инвалидировать записи"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Очистить кеш и счетчики"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Счетчики попаданий и промахов"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+
+class SQLiteInvalidationLog:
+    """Журнал инвалидаций кеша в локальном файле SQLite, общий для воркеров
+
+    Процесс, изменивший данные, дописывает ключи своего кеша; остальные не чаще
+    poll_interval читают новые записи и удаляют эти ключи у себя. Ключи -
+    JSON-сериализуемые значения (кортежи возвращаются кортежами).
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.1, expire_after: float = 3600):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.expire_after = expire_after
+        self._operations = 0
+        self._lock = threading.Lock()
+        self.reconnect()
+
+    def reconnect(self) -> None:
+        """Открыть свое соединение; нужно воркеру после fork (соединение SQLite нельзя делить между процессами)"""
+        self._conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS invalidations "
+            "(seq INTEGER PRIMARY KEY AUTOINCREMENT, pid INTEGER NOT NULL, key TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        # Записи до подключения не нужны: кеш процесса их еще не видел
+        self._last_seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM invalidations").fetchone()[0]
+        self._next_poll = 0.0
+
+    def publish(self, *keys: Hashable) -> None:
+        """Сообщить другим процессам об инвалидированных ключах"""
+        now = time.time()
+        pid = os.getpid()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO invalidations (pid, key, created) VALUES (?, ?, ?)",
+                [(pid, json.dumps(key), now) for key in keys]
+            )
+            self._operations += 1
+            if self._operations % 1000 == 0:
+                self._conn.execute("DELETE FROM invalidations WHERE created < ?", (now - self.expire_after,))
+
+    def poll(self) -> list[Hashable]:
+        """Ключи, инвалидированные другими процессами с прошлого опроса; не чаще poll_interval"""
+        if time.monotonic() < self._next_poll:
+            return []
+        with self._lock:
+            self._next_poll = time.monotonic() + self.poll_interval
+            rows = self._conn.execute(
+                "SELECT seq, pid, key FROM invalidations WHERE seq > ? ORDER BY seq", (self._last_seq,)
+            ).fetchall()
+            if rows:
+                self._last_seq = rows[-1][0]
+        pid = os.getpid()
+        return [_from_json_key(json.loads(key)) for _, owner, key in rows if owner != pid]
+
+
+def _from_json_key(value):
+    return tuple(_from_json_key(item) for item in value) if isinstance(value, list) else value
+
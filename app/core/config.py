@@ -17,6 +17,114 @@ class Settings(BaseSettings):
     # Security
     SECRET_KEY: str = "your-secret-key-here-change-this-in-production"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Email пользователей с доступом к /admin
+    ADMIN_EMAILS: list[str] = []
+
+    # Логирование: запись в консоль и файл идет в отдельном потоке через очередь
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"  # text | json
+    LOG_FILE: str | None = "logs/app.log"
+    LOG_FILE_MAX_BYTES: int = 10_000_000
+    LOG_FILE_BACKUP_COUNT: int = 5
+    LOG_QUEUE_SIZE: int = 10_000
+    # Доля записей INFO/DEBUG, попадающих в лог (WARNING и выше пишутся всегда)
+    LOG_INFO_SAMPLE_RATE: float = 1.0
+    # pid в имени файла лога (app.<pid>.log): процессы не ротируют один файл; app.serve включает всегда
+    LOG_FILE_PER_PROCESS: bool = False
+
+    # Bloom-фильтр email и username для проверки дубликатов при регистрации
+    USER_FILTER_CAPACITY: int = 100_000
+
+    # Кеш пользователей в памяти процесса (секунды; 0 отключает). Изменение и удаление пользователя
+    # другие воркеры видят через файл USER_CACHE_INVALIDATION_PATH не позже USER_CACHE_INVALIDATION_INTERVAL
+    # (app.serve создает его сам); без файла - до USER_CACHE_TTL. /users/refresh и вход читают из базы
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL: float = 60
+    USER_CACHE_NEGATIVE_TTL: float = 5
+    USER_CACHE_INVALIDATION_PATH: str | None = None
+    USER_CACHE_INVALIDATION_INTERVAL: float = 0.1
+
+    # Кеш тел ответов /questions/{id}/with-answers со сжатыми вариантами (секунды; 0 отключает).
+    # Инвалидация при записи видна только своему процессу, другие воркеры ждут TTL
+    RESPONSE_CACHE_SIZE: int = 1_000
+    RESPONSE_CACHE_TTL: float = 5
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024
+    RESPONSE_GZIP_LEVEL: int = 6
+    RESPONSE_ZSTD_LEVEL: int = 3
+
+    # Ответы API в MessagePack по Accept: application/msgpack (нужен пакет msgpack)
+    MSGPACK_ENABLED: bool = True
+
+    # Admission control: одновременные запросы воркера, слоты только для приоритетных запросов
+    # (записи и ADMISSION_PRIORITY_ROUTES), очередь ожидания и сброс нагрузки по ожиданию пула БД
+    ADMISSION_ENABLED: bool = False
+    ADMISSION_MAX_CONCURRENCY: int = 64
+    ADMISSION_RESERVED_SLOTS: int = 8
+    ADMISSION_MAX_QUEUE: int = 256
+    ADMISSION_QUEUE_TIMEOUT_MS: float = 2000
+    ADMISSION_MAX_POOL_WAIT_MS: float | None = 200
+    ADMISSION_PRIORITY_WRITES: bool = True
+    ADMISSION_PRIORITY_ROUTES: list[str] = ["POST /api/v1/users/login"]
+    ADMISSION_RETRY_AFTER: int = 1
+
+    # Максимальное число элементов в bulk запросе
+    BULK_MAX_ITEMS: int = 10_000
+
+    # Потоковый импорт NDJSON: строк в чанке, максимум ошибок в отчете и длина строки в байтах
+    IMPORT_CHUNK_SIZE: int = 5_000
+    IMPORT_MAX_ERRORS: int = 1_000
+    IMPORT_MAX_LINE_BYTES: int = 1_000_000
+
+    # Group commit для POST /answers/: пачка пишется каждые MAX_DELAY_MS или по MAX_BATCH строк
+    ANSWER_GROUP_COMMIT_ENABLED: bool = False
+    ANSWER_GROUP_COMMIT_MAX_BATCH: int = 500
+    ANSWER_GROUP_COMMIT_MAX_DELAY_MS: float = 5
+    ANSWER_GROUP_COMMIT_MAX_QUEUE: int = 10_000
+
+    # Многопроцессный запуск python -m app.serve: 0 воркеров - по числу CPU, 0 запросов - без перезапуска
+    SERVE_WORKERS: int = 0
+    SERVE_PRELOAD: bool = True
+    SERVE_MAX_REQUESTS: int = 0
+    SERVE_MAX_REQUESTS_JITTER: int = 0
+    SERVE_GRACEFUL_TIMEOUT: int = 30
+    SERVE_BACKLOG: int = 2048
+    SERVE_KEEP_ALIVE: int = 5
+
+    # Метрики Prometheus на /metrics; METRICS_DIR - общий каталог для нескольких воркеров
+    METRICS_ENABLED: bool = True
+    METRICS_DIR: str | None = None
+    METRICS_FLUSH_INTERVAL: float = 1.0
+
+    # Трассировка запросов: заголовок Server-Timing и спаны OTLP JSON в файл с ротацией
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORT_PATH: str | None = None
+    TRACING_EXPORT_MAX_BYTES: int = 10_000_000
+    TRACING_EXPORT_BACKUP_COUNT: int = 5
+
+    # Профилирование воркера: POST /admin/profile или сигнал (файл пишется в PROFILER_OUTPUT_DIR)
+    PROFILER_MAX_SECONDS: float = 60
+    PROFILER_SIGNAL_ENABLED: bool = False
+    PROFILER_SIGNAL_SECONDS: float = 10
+    PROFILER_OUTPUT_DIR: str = "/tmp"
+
+    # Учет памяти по маршрутам через tracemalloc (заметно замедляет запросы, включать временно)
+    MEMORY_TRACKING_ENABLED: bool = False
+    MEMORY_TRACKING_FRAMES: int = 10
+    MEMORY_TRACKING_SNAPSHOT_EVERY: int = 50
+
+    # Журнал медленных запросов (None отключает) и размер таблицы отпечатков
+    SLOW_QUERY_THRESHOLD_MS: float | None = 200
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_MAX_ENTRIES: int = 100
+
+    # Rate limiting: "METHOD /path" -> "<count>/<second|minute|hour|seconds>[:ip|user]"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory | sqlite (общий для воркеров)
+    RATE_LIMIT_SQLITE_PATH: str = "/tmp/questionanswers_rate_limit.sqlite3"
+    RATE_LIMITS: dict[str, str] = {
+        "POST /api/v1/users/login": "10/minute",
+        "POST /api/v1/users/register": "5/minute",
+    }
 
 
 settings = Settings()
@@ -1,18 +1,38 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
+from app.core.slow_queries import slow_query_log
 
 # Получаем URL базы данных из переменной окружения
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 
+
+def enable_sqlite_foreign_keys(engine) -> None:
+    """Включить проверку внешних ключей в SQLite (по умолчанию выключена)"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
 engine = create_engine(DATABASE_URL)
+enable_sqlite_foreign_keys(engine)
+slow_query_log.instrument(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
 
 def get_db():
-    """Dependency для получения сессии базы данных"""
+    """Dependency для получения сессии базы данных
+
+    Сессия берет соединение из пула лениво, при первом запросе к базе,
+    поэтому обработчики без SQL не занимают соединение.
+    """
     db = SessionLocal()
     try:
         yield db
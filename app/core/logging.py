@@ -1,48 +1,160 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
+from datetime import datetime, UTC
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from app.core.config import settings
+from app.core.tracing import current_trace
 
+# Аргументы этих типов безопасно форматировать позже, в потоке слушателя
+_LAZY_ARG_TYPES = (str, int, float, bool, type(None))
 
-def setup_logging() -> None:
-    """Настройка логирования"""
-    # Создаем форматтер для логов
-    formatter = logging.Formatter(
+_listener: QueueListener | None = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON строка на запись"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "location": f"{record.funcName}:{record.lineno}",
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            data["trace_id"] = trace_id
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускать только долю записей уровня INFO и ниже; WARNING и выше - всегда"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.INFO or self.rate >= 1 or random.random() < self.rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler, который не блокирует запрос
+
+    Форматирование откладывается до потока слушателя, если аргументы
+    неизменяемые; при переполненной очереди запись отбрасывается.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        trace = current_trace()
+        if trace is not None:
+            record.trace_id = trace.trace_id
+        args = record.args
+        values = args.values() if isinstance(args, dict) else args or ()
+        if not all(isinstance(arg, _LAZY_ARG_TYPES) for arg in values):
+            # Объекты (например ORM) могут измениться до форматирования - форматируем сразу
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+def _create_formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter(
         fmt='%(asctime)s | %(levelname)-8s | %(name)s:%(funcName)s:%(lineno)d | %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
-    
+
+
+def process_file_path(path: str) -> str:
+    """Путь файла процесса: при LOG_FILE_PER_PROCESS в имя добавляется pid (logs/app.log -> logs/app.123.log)"""
+    if not settings.LOG_FILE_PER_PROCESS:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}{ext}"
+
+
+def stop_logging() -> None:
+    """Дописать записи из очереди и остановить поток слушателя"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def setup_logging() -> None:
+    """Настройка логирования
+
+    Запросы только кладут записи в очередь; вывод в консоль, запись в файл
+    и его ротация выполняются в отдельном потоке QueueListener.
+    """
+    stop_logging()
+    formatter = _create_formatter()
+    level = logging.getLevelName(settings.LOG_LEVEL.upper())
+
+    # Обработчики, работающие в потоке слушателя
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
+    if settings.LOG_FILE:
+        try:
+            # RotatingFileHandler не согласует ротацию между процессами
+            file_handler = RotatingFileHandler(
+                process_file_path(settings.LOG_FILE),
+                maxBytes=settings.LOG_FILE_MAX_BYTES,
+                backupCount=settings.LOG_FILE_BACKUP_COUNT,
+                encoding='utf-8'
+            )
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except FileNotFoundError:
+            # Если папка logs не существует, пишем только в консоль
+            pass
+
     # Настраиваем корневой логгер
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.INFO)
-    
-    # Удаляем существующие обработчики
+    root_logger.setLevel(level)
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
-    
-    # Создаем обработчик для консоли
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
-    
-    # Создаем обработчик для файла
-    try:
-        file_handler = logging.FileHandler('logs/app.log', encoding='utf-8')
-        file_handler.setLevel(logging.INFO)
-        file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
-    except FileNotFoundError:
-        # Если папка logs не существует, создаем только консольный логгер
-        pass
-    
+
+    queue_handler = DroppingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    queue_handler.addFilter(SamplingFilter(settings.LOG_INFO_SAMPLE_RATE))
+    root_logger.addHandler(queue_handler)
+
+    global _listener
+    _listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
     # Настраиваем логи для uvicorn
     uvicorn_logger = logging.getLogger("uvicorn")
     uvicorn_logger.setLevel(logging.INFO)
-    
+
     uvicorn_access_logger = logging.getLogger("uvicorn.access")
     uvicorn_access_logger.setLevel(logging.INFO)
 
 
+atexit.register(stop_logging)
+
+
 def get_logger(name: str) -> logging.Logger:
     """Получить логгер с указанным именем"""
     return logging.getLogger(name)
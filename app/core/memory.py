@@ -0,0 +1,136 @@
+import threading
+import tracemalloc
+from collections import Counter
+from app.core.config import settings
+
+
+def _site_filters() -> list:
+    return [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ]
+
+
+class RouteMemoryStats:
+    __slots__ = ("requests", "net_total", "net_max", "peak_total", "peak_max", "sites", "snapshots")
+
+    def __init__(self):
+        self.requests = 0
+        self.net_total = 0
+        self.net_max = 0
+        self.peak_total = 0
+        self.peak_max = 0
+        self.sites: Counter = Counter()
+        self.snapshots = 0
+
+    def as_dict(self, route: str, limit: int) -> dict:
+        return {
+            "route": route,
+            "requests": self.requests,
+            "net_avg_bytes": self.net_total // self.requests if self.requests else 0,
+            "net_max_bytes": self.net_max,
+            "peak_avg_bytes": self.peak_total // self.requests if self.requests else 0,
+            "peak_max_bytes": self.peak_max,
+            "snapshots": self.snapshots,
+            "top_sites": [{"site": site, "size_bytes": size} for site, size in self.sites.most_common(limit)],
+        }
+
+
+class MemoryTracker:
+    """Статистика выделений памяти по маршрутам на основе tracemalloc
+
+    Для каждого запроса записывается чистый прирост и пик выделенной памяти.
+    Для каждого snapshot_every-го запроса дополнительно сравниваются снимки
+    tracemalloc до и после и места наибольших выделений накапливаются в его маршруте.
+    При параллельных запросах значения приблизительные: tracemalloc
+    считает память всего процесса.
+    """
+
+    def __init__(self, frames: int = 10, snapshot_every: int = 50):
+        self.frames = frames
+        self.snapshot_every = snapshot_every
+        self.routes: dict[str, RouteMemoryStats] = {}
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.routes.clear()
+
+    def should_snapshot(self) -> bool:
+        self._requests += 1
+        return self.snapshot_every > 0 and self._requests % self.snapshot_every == 0
+
+    def record(self, route: str, net: int, peak: int, sites: list | None = None) -> None:
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = RouteMemoryStats()
+            stats.requests += 1
+            stats.net_total += net
+            stats.net_max = max(stats.net_max, net)
+            stats.peak_total += peak
+            stats.peak_max = max(stats.peak_max, peak)
+            if sites is not None:
+                stats.snapshots += 1
+                for stat in sites:
+                    if stat.size_diff > 0:
+                        frame = stat.traceback[0]
+                        stats.sites[f"{frame.filename}:{frame.lineno}"] += stat.size_diff
+
+    def report(self, limit: int = 10) -> dict:
+        """Маршруты по убыванию пикового выделения и текущие места выделений"""
+        with self._lock:
+            routes = [stats.as_dict(route, limit) for route, stats in self.routes.items()]
+        routes.sort(key=lambda item: item["peak_max_bytes"], reverse=True)
+        report = {"tracing": tracemalloc.is_tracing(), "routes": routes, "top_sites": []}
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            report["traced_current_bytes"] = current
+            report["traced_peak_bytes"] = peak
+            snapshot = tracemalloc.take_snapshot().filter_traces(_site_filters())
+            report["top_sites"] = [
+                {"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                 "size_bytes": stat.size, "blocks": stat.count}
+                for stat in snapshot.statistics("lineno")[:limit]
+            ]
+        return report
+
+
+class MemoryTrackingMiddleware:
+    """ASGI middleware: прирост и пик памяти на запрос по шаблону маршрута"""
+
+    def __init__(self, app, tracker: MemoryTracker):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracemalloc.is_tracing():
+            await self.app(scope, receive, send)
+            return
+
+        before_snapshot = None
+        if self.tracker.should_snapshot():
+            before_snapshot = tracemalloc.take_snapshot().filter_traces(_site_filters())
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            route = f"{scope['method']} {getattr(scope.get('route'), 'path', 'unmatched')}"
+            sites = None
+            if before_snapshot is not None:
+                after_snapshot = tracemalloc.take_snapshot().filter_traces(_site_filters())
+                sites = after_snapshot.compare_to(before_snapshot, "lineno")[:20]
+            self.tracker.record(route, current - start, max(0, peak - start), sites)
+
+
+memory_tracker = MemoryTracker(settings.MEMORY_TRACKING_FRAMES, settings.MEMORY_TRACKING_SNAPSHOT_EVERY)
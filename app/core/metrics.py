@@ -0,0 +1,320 @@
+import glob
+import json
+import os
+import threading
+import time
+from app.core.config import settings
+from app.core.logging import get_logger
+
+metrics_logger = get_logger("metrics")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Имя метрики -> (тип, описание)
+METRICS = {
+    "http_requests_total": ("counter", "HTTP requests by route and status"),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency"),
+    "http_response_size_bytes": ("histogram", "HTTP response body size"),
+    "http_requests_in_flight": ("gauge", "HTTP requests being processed"),
+    "db_queries_total": ("counter", "SQL statements executed"),
+    "db_query_duration_seconds_total": ("counter", "Total SQL statement execution time"),
+    "db_pool_size": ("gauge", "Configured connection pool size"),
+    "db_pool_checked_out": ("gauge", "Connections currently checked out"),
+    "db_pool_overflow": ("gauge", "Connections opened above pool size"),
+    "db_pool_wait_ms": ("gauge", "Recent average wait for a pooled connection, ms"),
+    "db_pool_waiting": ("gauge", "Threads waiting for a pooled connection"),
+    "admission_in_flight": ("gauge", "Requests admitted by admission control"),
+    "admission_queued": ("gauge", "Requests waiting for an admission slot"),
+    "admission_shed_total": ("counter", "Requests rejected with 503 by reason"),
+}
+
+
+def _key(name: str, labels: dict | None) -> str:
+    return name + json.dumps(labels or {}, sort_keys=True, separators=(",", ":"))
+
+
+def _split_key(key: str) -> tuple[str, dict]:
+    brace = key.index("{")
+    return key[:brace], json.loads(key[brace:])
+
+
+class MetricsRegistry:
+    """Метрики процесса с агрегацией между воркерами через файлы
+
+    Если задан каталог, каждый воркер периодически пишет снимок в
+    metrics_<pid>.json, а /metrics любого воркера суммирует все снимки.
+    Gauge завершившихся воркеров отбрасываются, счетчики сохраняются.
+    """
+
+    def __init__(self, directory: str | None = None, flush_interval: float = 1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.collectors = []
+        self._counters: dict[str, float] = {}
+        self._gauges: dict[str, float] = {}
+        self._histograms: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def inc(self, name: str, labels: dict | None = None, value: float = 1) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def add_gauge(self, name: str, labels: dict | None = None, value: float = 1) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def set_gauge(self, name: str, labels: dict | None = None, value: float = 0) -> None:
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, labels: dict | None, value: float, buckets: tuple) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {
+                    "buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0
+                }
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["counts"][index] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def snapshot(self) -> dict:
+        """Текущие значения процесса (с опросом коллекторов)"""
+        for collect in self.collectors:
+            collect(self)
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "histograms": {key: {**value, "counts": list(value["counts"])} for key, value in self._histograms.items()},
+            }
+
+    def maybe_flush(self) -> None:
+        """Записать снимок процесса не чаще flush_interval"""
+        if not self.directory or time.monotonic() - self._last_flush < self.flush_interval:
+            return
+        self.flush()
+
+    def flush(self) -> None:
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        path = os.path.join(self.directory, f"metrics_{os.getpid()}.json")
+        try:
+            with open(path + ".tmp", "w") as file:
+                json.dump(self.snapshot(), file)
+            os.replace(path + ".tmp", path)
+        except OSError as exc:
+            metrics_logger.warning("Failed to write metrics snapshot %s: %s", path, exc)
+
+    def _snapshots(self) -> list[dict]:
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "metrics_*.json")):
+            snapshot = _read_snapshot(path)
+            if snapshot is not None:
+                snapshots.append(snapshot)
+        return snapshots
+
+    def collect(self) -> dict:
+        """Суммировать снимки всех воркеров (gauge - только живых)"""
+        total = {"counters": {}, "gauges": {}, "histograms": {}}
+        snapshots = self._snapshots()
+        # Снимки, уже перенесенные в общий файл завершившихся воркеров, но еще не удаленные
+        merged = {pid for snapshot in snapshots for pid in snapshot.get("merged", ())}
+        for snapshot in snapshots:
+            pid = snapshot["pid"]
+            if pid in merged:
+                continue
+            _merge(total, snapshot, gauges=pid is not None and _pid_alive(pid))
+        return total
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus"""
+        collected = self.collect()
+        families: dict[str, list[str]] = {}
+        for kind in ("counters", "gauges"):
+            for key, value in sorted(collected[kind].items()):
+                name, labels = _split_key(key)
+                families.setdefault(name, []).append(f"{name}{_labels(labels)} {_number(value)}")
+        for key, histogram in sorted(collected["histograms"].items()):
+            name, labels = _split_key(key)
+            lines = families.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(histogram["buckets"], histogram["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}")
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {histogram['count']}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(histogram['sum'])}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram['count']}")
+
+        output = []
+        for name, lines in families.items():
+            kind, description = METRICS.get(name, ("untyped", name))
+            output.append(f"# HELP {name} {description}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(lines)
+        return "\n".join(output) + "\n"
+
+
+RETIRED_SNAPSHOT = "metrics_retired.json"
+
+
+def _read_snapshot(path: str) -> dict | None:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(total: dict, snapshot: dict, gauges: bool) -> None:
+    for key, value in snapshot["counters"].items():
+        total["counters"][key] = total["counters"].get(key, 0) + value
+    if gauges:
+        for key, value in snapshot["gauges"].items():
+            total["gauges"][key] = total["gauges"].get(key, 0) + value
+    for key, value in snapshot["histograms"].items():
+        histogram = total["histograms"].get(key)
+        if histogram is None:
+            total["histograms"][key] = {**value, "counts": list(value["counts"])}
+            continue
+        histogram["counts"] = [a + b for a, b in zip(histogram["counts"], value["counts"])]
+        histogram["sum"] += value["sum"]
+        histogram["count"] += value["count"]
+
+
+def retire_snapshot(directory: str, pid: int) -> None:
+    """Перенести счетчики и гистограммы завершившегося воркера в общий файл и удалить его снимок
+
+    Вызывается мастером после waitpid, когда снимок воркера больше не меняется.
+    Число файлов не растет с перезапусками воркеров, а gauge мертвого воркера
+    не вернутся в сумму, если его pid достанется новому процессу. Общий файл
+    записывается раньше удаления снимка и перечисляет перенесенные pid, чтобы
+    читатели между этими шагами не учли воркер дважды.
+    """
+    path = os.path.join(directory, f"metrics_{pid}.json")
+    snapshot = _read_snapshot(path)
+    if snapshot is None:
+        return
+    retired_path = os.path.join(directory, RETIRED_SNAPSHOT)
+    retired = _read_snapshot(retired_path) or {"pid": None, "merged": [], "counters": {}, "gauges": {}, "histograms": {}}
+    _merge(retired, snapshot, gauges=False)
+    retired["merged"] = [
+        merged for merged in retired["merged"]
+        if os.path.exists(os.path.join(directory, f"metrics_{merged}.json"))
+    ] + [pid]
+    try:
+        with open(retired_path + ".tmp", "w") as file:
+            json.dump(retired, file)
+        os.replace(retired_path + ".tmp", retired_path)
+        os.remove(path)
+    except OSError as exc:
+        metrics_logger.warning("Failed to retire metrics snapshot %s: %s", path, exc)
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def instrument_engine(engine, registry: MetricsRegistry) -> None:
+    """Считать SQL запросы движка и собирать статистику пула"""
+    from app.core.query_timing import add_query_listener
+
+    def record_query(conn, statement, parameters, executemany, started_ns, ended_ns):
+        registry.inc("db_queries_total")
+        registry.inc("db_query_duration_seconds_total", value=(ended_ns - started_ns) / 1e9)
+
+    add_query_listener(engine, record_query)
+
+    def collect_pool(registry: MetricsRegistry) -> None:
+        pool = engine.pool
+        for name, method in (
+            ("db_pool_size", "size"),
+            ("db_pool_checked_out", "checkedout"),
+            ("db_pool_overflow", "overflow"),
+        ):
+            # У пулов SQLite часть методов отсутствует (а size - атрибут)
+            value = getattr(pool, method, None)
+            if callable(value):
+                registry.set_gauge(name, None, value())
+
+    registry.collectors.append(collect_pool)
+
+
+class MetricsMiddleware:
+    """ASGI middleware: число запросов, латентность, размер ответа и запросы в работе"""
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        registry.add_gauge("http_requests_in_flight")
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            registry.add_gauge("http_requests_in_flight", value=-1)
+            # Шаблон маршрута (а не путь) ограничивает число рядов
+            route = scope.get("route")
+            labels = {"method": scope["method"], "route": getattr(route, "path", "unmatched")}
+            registry.inc("http_requests_total", {**labels, "status": str(status_code)})
+            registry.observe("http_request_duration_seconds", labels, duration, LATENCY_BUCKETS)
+            registry.observe("http_response_size_bytes", labels, size, SIZE_BUCKETS)
+            registry.maybe_flush()
+
+
+metrics = MetricsRegistry(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
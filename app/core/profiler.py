@@ -0,0 +1,115 @@
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from fastapi.routing import APIRoute
+from app.core.logging import get_logger
+
+profiler_logger = get_logger("profiler")
+
+# Один сеанс профилирования на процесс
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """В процессе уже идет профилирование"""
+
+
+def route_codes(routes) -> dict:
+    """Код обработчиков маршрутов -> "METHOD /path" для подписи стеков"""
+    codes = {}
+    for route in routes:
+        if isinstance(route, APIRoute):
+            code = getattr(route.endpoint, "__code__", None)
+            if code is not None:
+                codes[code] = f"{','.join(sorted(route.methods))} {route.path}"
+    return codes
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    marker = filename.rfind("site-packages" + os.sep)
+    if marker != -1:
+        filename = filename[marker + len("site-packages") + 1:]
+    elif filename.startswith(os.getcwd()):
+        filename = os.path.relpath(filename)
+    label = f"{getattr(code, 'co_qualname', code.co_name)}({filename}:{code.co_firstlineno})"
+    # ';' и пробел - разделители формата collapsed stacks
+    return label.replace(";", ":").replace(" ", "_")
+
+
+class SamplingProfiler:
+    """Статистический профайлер: снимки стеков всех потоков через sys._current_frames
+
+    Пока профайлер не запущен, он ничего не стоит запросам. Результат -
+    collapsed stacks (формат flamegraph.pl / speedscope), первым элементом
+    стека идет маршрут, если в стеке есть его обработчик.
+    """
+
+    def __init__(self, interval: float = 0.005, routes: dict | None = None):
+        self.interval = interval
+        self.routes = routes or {}
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._labels: dict = {}
+
+    def sample(self, skip_thread: int) -> None:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == skip_thread:
+                continue
+            stack = []
+            route = None
+            while frame is not None:
+                code = frame.f_code
+                if route is None:
+                    route = self.routes.get(code)
+                label = self._labels.get(code)
+                if label is None:
+                    label = self._labels[code] = _frame_label(code)
+                stack.append(label)
+                frame = frame.f_back
+            stack.append(route or "(no route)")
+            stack.reverse()
+            self.samples[";".join(stack)] += 1
+        self.sample_count += 1
+
+    def run(self, seconds: float) -> str:
+        """Собирать снимки seconds секунд и вернуть collapsed stacks"""
+        if not _profile_lock.acquire(blocking=False):
+            raise ProfilerBusyError("Profiling is already running")
+        try:
+            profiler_logger.info("Profiling for %s seconds with interval %s", seconds, self.interval)
+            current = threading.get_ident()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                self.sample(current)
+                time.sleep(self.interval)
+            profiler_logger.info("Profiling finished: %s samples", self.sample_count)
+            return self.collapsed()
+        finally:
+            _profile_lock.release()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def install_profile_signal(routes, signum: int, seconds: float, interval: float, output_dir: str) -> None:
+    """По сигналу профилировать процесс в фоне и записать результат в output_dir"""
+    def write_profile():
+        profiler = SamplingProfiler(interval, route_codes(routes))
+        try:
+            result = profiler.run(seconds)
+        except ProfilerBusyError:
+            profiler_logger.warning("Profile signal ignored: profiling is already running")
+            return
+        path = os.path.join(output_dir, f"profile_{os.getpid()}_{int(time.time())}.folded")
+        with open(path, "w") as file:
+            file.write(result)
+        profiler_logger.info("Profile written to %s", path)
+
+    def handler(signum, frame):
+        threading.Thread(target=write_profile, name="profiler", daemon=True).start()
+
+    signal.signal(signum, handler)
@@ -0,0 +1,53 @@
+"""Общий замер времени SQL запросов для метрик, трассировки и журнала медленных запросов
+
+На движок вешается одна пара before/after_cursor_execute. Время начала
+хранится в контексте выполнения запроса (ExecutionContext), а не в
+conn.info: у запроса с ошибкой after_cursor_execute не вызывается, и
+запись на соединении из пула осталась бы навсегда. Подписчики вызываются
+после успешного запроса с временем начала и конца (perf_counter_ns).
+"""
+import time
+import weakref
+from sqlalchemy import event
+
+# Движок -> (подписчики, обработчик after_cursor_execute)
+_engines: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _before(conn, cursor, statement, parameters, context, executemany):
+    # Служебные запросы диалекта без контекста не замеряются
+    if context is not None:
+        context._query_started_ns = time.perf_counter_ns()
+
+
+def add_query_listener(engine, listener) -> None:
+    """Подписать listener(conn, statement, parameters, executemany, started_ns, ended_ns) на запросы движка"""
+    entry = _engines.get(engine)
+    if entry is None:
+        listeners = []
+
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            started = getattr(context, "_query_started_ns", None)
+            if started is None:
+                return
+            ended = time.perf_counter_ns()
+            for listener in tuple(listeners):
+                listener(conn, statement, parameters, executemany, started, ended)
+
+        event.listen(engine, "before_cursor_execute", _before)
+        event.listen(engine, "after_cursor_execute", _after)
+        entry = _engines[engine] = (listeners, _after)
+    entry[0].append(listener)
+
+
+def remove_query_listener(engine, listener) -> None:
+    """Отписать listener; без подписчиков обработчики снимаются с движка"""
+    entry = _engines.get(engine)
+    if entry is None or listener not in entry[0]:
+        return
+    listeners, after = entry
+    listeners.remove(listener)
+    if not listeners:
+        event.remove(engine, "before_cursor_execute", _before)
+        event.remove(engine, "after_cursor_execute", after)
+        del _engines[engine]
@@ -0,0 +1,192 @@
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from app.core.logging import get_logger
+
+rate_limit_logger = get_logger("rate_limit")
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """Лимит для маршрута: capacity запросов за period секунд"""
+    method: str
+    path: str
+    capacity: int
+    period: float
+    key: str = "ip"
+
+    @property
+    def refill_rate(self) -> float:
+        return self.capacity / self.period
+
+
+def parse_rules(limits: dict[str, str]) -> list[RateLimitRule]:
+    """Разобрать настройки вида {"POST /path": "10/minute:ip"}"""
+    rules = []
+    for route, spec in limits.items():
+        method, path = route.split(" ", 1)
+        rate, _, key = spec.partition(":")
+        count, _, period = rate.partition("/")
+        rules.append(RateLimitRule(
+            method=method.upper(),
+            path=path,
+            capacity=int(count),
+            period=_PERIODS[period] if period in _PERIODS else float(period),
+            key=key or "ip"
+        ))
+    return rules
+
+
+def _refill(tokens: float, updated: float, now: float, rule: RateLimitRule) -> tuple[float, float]:
+    """Пополнить корзину и попытаться забрать токен; вернуть (токены, ожидание)"""
+    tokens = min(rule.capacity, tokens + (now - updated) * rule.refill_rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rule.refill_rate
+
+
+class MemoryBucketStore:
+    """Token bucket в памяти процесса с вытеснением самых старых ключей"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rule: RateLimitRule, now: float) -> float:
+        """Забрать токен; вернуть 0 или число секунд до следующей попытки"""
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (rule.capacity, now))
+            tokens, retry_after = _refill(tokens, updated, now, rule)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBucketStore:
+    """Token bucket в локальном файле SQLite, общий для воркеров uvicorn"""
+
+    def __init__(self, path: str, expire_after: float = 3600):
+        self.expire_after = expire_after
+        self._operations = 0
+        self.path = path
+        self._lock = threading.Lock()
+        self.reconnect()
+
+    def reconnect(self) -> None:
+        """Открыть свое соединение; нужно воркеру после fork (соединение SQLite нельзя делить между процессами)"""
+        self._conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def take(self, key: str, rule: RateLimitRule, now: float) -> float:
+        """Забрать токен; вернуть 0 или число секунд до следующей попытки"""
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated = row if row else (rule.capacity, now)
+                tokens, retry_after = _refill(tokens, updated, now, rule)
+                conn.execute(
+                    "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                    (key, tokens, now)
+                )
+                self._operations += 1
+                if self._operations % 1000 == 0:
+                    conn.execute("DELETE FROM buckets WHERE updated < ?", (now - self.expire_after,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return retry_after
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM buckets")
+
+
+def create_bucket_store(backend: str, sqlite_path: str):
+    """Создать хранилище состояния лимитера"""
+    if backend == "sqlite":
+        return SQLiteBucketStore(sqlite_path)
+    return MemoryBucketStore()
+
+
+def _client_ip(scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _bearer_subject(scope) -> str | None:
+    """Email из access токена запроса, если он валиден"""
+    from app.services.auth_service import verify_token
+
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return None
+            payload = verify_token(token)
+            return payload.get("sub") if payload else None
+    return None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware: отвечает 429 с Retry-After до вызова обработчика"""
+
+    def __init__(self, app, rules: list[RateLimitRule], store):
+        self.app = app
+        self.store = store
+        self._rules = {(rule.method, rule.path.rstrip("/") or "/"): rule for rule in rules}
+
+    def _bucket_key(self, scope, rule: RateLimitRule) -> str:
+        if rule.key == "user":
+            subject = _bearer_subject(scope)
+            if subject:
+                return f"{rule.method} {rule.path}|user:{subject}"
+        return f"{rule.method} {rule.path}|ip:{_client_ip(scope)}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rule = self._rules.get((scope["method"], scope["path"].rstrip("/") or "/"))
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = self._bucket_key(scope, rule)
+        retry_after = self.store.take(key, rule, time.time())
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        rate_limit_logger.warning("Rate limit exceeded for %s", key)
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,102 @@
+"""Кеш тел ответов со сжатыми вариантами
+
+Тело ответа сжимается gzip (и zstd, если установлен пакет zstandard) один раз
+при записи в кеш, варианты хранятся рядом с исходными байтами. Повторный запрос
+выбирает вариант по Accept-Encoding и отдает готовые байты без сжатия.
+"""
+import gzip
+from collections.abc import Hashable
+from fastapi import Response
+from app.core.cache import TTLCache
+
+try:
+    import zstandard
+except ImportError:  # zstd необязателен: без него отдаются gzip и несжатые тела
+    zstandard = None
+
+
+class CachedBody:
+    """Тело ответа и его сжатые варианты по Content-Encoding"""
+    __slots__ = ("body", "media_type", "variants")
+
+    def __init__(self, body: bytes, media_type: str, variants: dict[str, bytes]):
+        self.body = body
+        self.media_type = media_type
+        self.variants = variants
+
+
+def parse_qvalues(header: str | None) -> dict[str, float]:
+    """Значения заголовка Accept или Accept-Encoding с весами q"""
+    values = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        values[name.strip().lower()] = quality
+    return values
+
+
+def choose_encoding(header: str | None, available) -> str | None:
+    """Лучшая из доступных кодировок; при равных q порядок available (zstd раньше gzip)"""
+    accepted = parse_qvalues(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class ResponseCache:
+    """TTL-кеш тел ответов по ключу с заранее сжатыми вариантами"""
+
+    def __init__(self, max_size: int, ttl: float, min_size: int = 1024,
+                 gzip_level: int = 6, zstd_level: int = 3):
+        self.entries = TTLCache(max_size, ttl)
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self._zstd = zstandard.ZstdCompressor(level=zstd_level) if zstandard is not None else None
+
+    def compress(self, body: bytes) -> dict[str, bytes]:
+        """Сжатые варианты тела; маленькие тела не сжимаются"""
+        if len(body) < self.min_size:
+            return {}
+        variants = {}
+        if self._zstd is not None:
+            variants["zstd"] = self._zstd.compress(body)
+        variants["gzip"] = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        return variants
+
+    def get(self, key: Hashable) -> CachedBody | None:
+        return self.entries.get(key, None)
+
+    def set(self, key: Hashable, body: bytes, media_type: str = "application/json") -> CachedBody:
+        """Сжать тело и сохранить; запись возвращается и при выключенном кеше (ttl 0)"""
+        entry = CachedBody(body, media_type, self.compress(body))
+        self.entries.set(key, entry)
+        return entry
+
+    def invalidate(self, *keys: Hashable) -> None:
+        self.entries.delete(*keys)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    @staticmethod
+    def respond(entry: CachedBody, accept_encoding: str | None) -> Response:
+        """Ответ с вариантом тела по Accept-Encoding"""
+        headers = {"Vary": "Accept-Encoding"}
+        encoding = choose_encoding(accept_encoding, entry.variants)
+        if encoding is None:
+            return Response(entry.body, media_type=entry.media_type, headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(entry.variants[encoding], media_type=entry.media_type, headers=headers)
@@ -0,0 +1,228 @@
+"""Быстрый рендеринг ответов со списками
+
+FastAPI для response_model валидирует результат обработчика (from_attributes),
+превращает модели в dict через dump_python(mode="json") и затем еще раз
+кодирует их json.dumps. Здесь строки ответа собираются в dict и один раз
+сериализуются заранее скомпилированным TypeAdapter над TypedDict с теми же
+полями, что у модели ответа, сразу в байты JSON. Результат совпадает с
+ответом FastAPI байт в байт, а response_model остается в OpenAPI схеме.
+
+С Accept: application/msgpack (пакет msgpack необязателен) те же строки
+кодируются в MessagePack; остальные JSON ответы API перекодирует
+MsgpackMiddleware. Схема данных совпадает с JSON, даты - строки ISO 8601.
+"""
+import json
+import typing
+from contextvars import ContextVar
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Iterable
+from typing_extensions import TypedDict
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel, TypeAdapter
+from starlette.datastructures import Headers, MutableHeaders
+from app.core.response_cache import parse_qvalues
+from app.core.tracing import span
+
+try:
+    import msgpack
+except ImportError:  # MessagePack необязателен: без него все ответы в JSON
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Клиент текущего запроса предпочитает MessagePack (выставляет MsgpackMiddleware)
+_msgpack_requested: ContextVar[bool] = ContextVar("msgpack_requested", default=False)
+
+
+def _nested_model(annotation) -> type[BaseModel] | None:
+    """Модель элемента для полей вида list[Model]"""
+    if typing.get_origin(annotation) is list:
+        (item,) = typing.get_args(annotation)
+        if isinstance(item, type) and issubclass(item, BaseModel):
+            return item
+    return None
+
+
+def _selected(model: type[BaseModel], fields: tuple[str, ...] | None) -> dict:
+    if fields is None:
+        return model.model_fields
+    return {name: model.model_fields[name] for name in fields}
+
+
+def parse_fields(model: type[BaseModel], fields: str | None) -> tuple[str, ...] | None:
+    """Разобрать параметр ?fields=id,text; None - все поля модели
+
+    Поля возвращаются в порядке модели, неизвестные поля - ошибка 422.
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested - model.model_fields.keys())
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown fields: {unknown}. Available: {list(model.model_fields)}"
+        )
+    return tuple(name for name in model.model_fields if name in requested)
+
+
+@lru_cache
+def row_type(model: type[BaseModel], fields: tuple[str, ...] | None = None) -> type:
+    """TypedDict с полями модели ответа (вложенные списки моделей - тоже TypedDict)"""
+    annotations = {}
+    for name, field in _selected(model, fields).items():
+        nested = _nested_model(field.annotation)
+        annotations[name] = list[row_type(nested)] if nested else field.annotation
+    return TypedDict(f"{model.__name__}Row", annotations)
+
+
+@lru_cache
+def list_adapter(model: type[BaseModel], fields: tuple[str, ...] | None = None) -> TypeAdapter:
+    return TypeAdapter(list[row_type(model, fields)])
+
+
+@lru_cache
+def item_adapter(model: type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(row_type(model))
+
+
+@lru_cache
+def _row_builder(model: type[BaseModel], fields: tuple[str, ...] | None = None):
+    """Функция объект -> dict с полями модели; attrgetter читает все поля за один вызов"""
+    selected = _selected(model, fields)
+    names = tuple(selected)
+    getter = attrgetter(*names) if len(names) > 1 else lambda obj: (getattr(obj, names[0]),)
+    nested = {
+        index: _row_builder(item)
+        for index, field in enumerate(selected.values())
+        if (item := _nested_model(field.annotation))
+    }
+    defaults = {name: field.default for name, field in selected.items()}
+
+    def build(obj: Any) -> dict:
+        try:
+            values = getter(obj)
+        except AttributeError:
+            # Необязательное поле без атрибута (например answers_count) - значение по умолчанию
+            values = tuple(getattr(obj, name, defaults[name]) for name in names)
+        if nested:
+            values = list(values)
+            for index, build_item in nested.items():
+                values[index] = [build_item(item) for item in values[index]]
+        return dict(zip(names, values))
+
+    return build
+
+
+def to_row(model: type[BaseModel], obj: Any) -> dict:
+    """dict с полями модели из атрибутов объекта (ORM сущности или строки запроса)"""
+    return _row_builder(model)(obj)
+
+
+class JSONBytesResponse(Response):
+    """Ответ с уже сериализованным телом JSON"""
+    media_type = "application/json"
+
+
+class MsgpackBytesResponse(Response):
+    """Ответ с уже сериализованным телом MessagePack"""
+    media_type = MSGPACK_MEDIA_TYPES[0]
+
+
+def prefers_msgpack(accept: str | None) -> bool:
+    """Accept явно называет MessagePack с весом не ниже JSON"""
+    if msgpack is None:
+        return False
+    accepted = parse_qvalues(accept)
+    msgpack_quality = max(accepted.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    json_quality = accepted.get("application/json", accepted.get("application/*", accepted.get("*/*", 0.0)))
+    return msgpack_quality > 0 and msgpack_quality >= json_quality
+
+
+def msgpack_requested() -> bool:
+    return _msgpack_requested.get()
+
+
+def _render(adapter: TypeAdapter, value) -> Response:
+    if _msgpack_requested.get():
+        return MsgpackBytesResponse(msgpack.packb(adapter.dump_python(value, mode="json")))
+    return JSONBytesResponse(adapter.dump_json(value))
+
+
+def render_list(model: type[BaseModel], objects: Iterable[Any],
+                fields: tuple[str, ...] | None = None) -> Response:
+    """Ответ со списком объектов в формате list[model], только поля fields (из parse_fields)"""
+    with span("render list", "render"):
+        build = _row_builder(model, fields)
+        rows = [build(obj) for obj in objects]
+        return _render(list_adapter(model, fields), rows)
+
+
+def render_item(model: type[BaseModel], obj: Any) -> Response:
+    """Ответ с одним объектом в формате model"""
+    with span("render item", "render"):
+        return _render(item_adapter(model), to_row(model, obj))
+
+
+class MsgpackMiddleware:
+    """ASGI middleware: ответы API в MessagePack для клиентов с Accept: application/msgpack
+
+    render_list и render_item кодируют MessagePack сами; остальные ответы JSON
+    (модели FastAPI, ошибки) буферизуются и перекодируются.
+    """
+
+    def __init__(self, app, prefix: str = ""):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        if not prefers_msgpack(Headers(scope=scope).get("accept")):
+            async def send_json(message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).add_vary_header("Accept")
+                await send(message)
+
+            await self.app(scope, receive, send_json)
+            return
+
+        start = None
+        transcode = False
+        chunks = []
+
+        async def send_wrapper(message):
+            nonlocal start, transcode
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.add_vary_header("Accept")
+                transcode = (
+                    headers.get("content-type", "").startswith("application/json")
+                    and "content-encoding" not in headers
+                )
+                start = message
+                if not transcode:
+                    await send(message)
+                return
+            if not transcode:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            packed = msgpack.packb(json.loads(body)) if body else body
+            headers = MutableHeaders(scope=start)
+            headers["content-type"] = MSGPACK_MEDIA_TYPES[0]
+            headers["content-length"] = str(len(packed))
+            await send(start)
+            await send({"type": "http.response.body", "body": packed})
+
+        token = _msgpack_requested.set(True)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _msgpack_requested.reset(token)
@@ -0,0 +1,175 @@
+import re
+import sys
+import threading
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.query_timing import add_query_listener, remove_query_listener
+
+slow_query_logger = get_logger("slow_query")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\$\d+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALUES_LIST = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+_SPACES = re.compile(r"\s+")
+_EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+
+# Модули, вызовы из которых считаются источником запроса
+_ORIGIN_PREFIXES = ("app.services.", "app.api.", "app.cli.")
+
+
+def fingerprint(statement: str) -> str:
+    """SQL без литералов и с единым видом параметров: одинаковые запросы совпадают"""
+    sql = _STRING.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    sql = _VALUES_LIST.sub(r"\1", sql)
+    return _SPACES.sub(" ", sql).strip()
+
+
+def parameters_shape(parameters, executemany: bool) -> str:
+    """Типы параметров без значений (значения могут содержать персональные данные)"""
+    if executemany:
+        rows = list(parameters)
+        return f"{len(rows)} x {parameters_shape(rows[0], False)}" if rows else "0 rows"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _origin() -> str:
+    """Ближайший вызов из сервисов или обработчиков API"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith(_ORIGIN_PREFIXES):
+            return f"{module}.{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class SlowQueryStats:
+    __slots__ = ("fingerprint", "count", "total_ms", "max_ms", "origin", "parameters", "plan")
+
+    def __init__(self, fingerprint: str, origin: str, parameters: str):
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.origin = origin
+        self.parameters = parameters
+        self.plan: str | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0,
+            "max_ms": round(self.max_ms, 3),
+            "origin": self.origin,
+            "parameters": self.parameters,
+            "plan": self.plan,
+        }
+
+
+class SlowQueryLog:
+    """Журнал медленных запросов с планом выполнения и top-K по отпечатку
+
+    Запросы дольше threshold_ms пишутся в лог вместе с нормализованным SQL,
+    типами параметров, вызвавшим методом и планом (EXPLAIN снимается один
+    раз на отпечаток). Таблица хранит не больше max_entries отпечатков,
+    при переполнении вытесняется отпечаток с наименьшим суммарным временем.
+    """
+
+    def __init__(self, threshold_ms: float | None, explain: bool = True, max_entries: int = 100):
+        self.threshold_ms = threshold_ms
+        self.explain = explain
+        self.max_entries = max_entries
+        self.entries: dict[str, SlowQueryStats] = {}
+        self._lock = threading.Lock()
+
+    def instrument(self, engine) -> None:
+        """Подключить журнал к движку SQLAlchemy"""
+        add_query_listener(engine, self.on_query)
+
+    def uninstrument(self, engine) -> None:
+        remove_query_listener(engine, self.on_query)
+
+    def on_query(self, conn, statement: str, parameters, executemany: bool, started_ns: int, ended_ns: int) -> None:
+        if self.threshold_ms is None:
+            return
+        elapsed_ms = (ended_ns - started_ns) / 1e6
+        if elapsed_ms >= self.threshold_ms:
+            self.record(conn, statement, parameters, executemany, elapsed_ms)
+
+    def record(self, conn, statement: str, parameters, executemany: bool, elapsed_ms: float) -> None:
+        key = fingerprint(statement)
+        origin = _origin()
+        shape = parameters_shape(parameters, executemany)
+        with self._lock:
+            stats = self.entries.get(key)
+            if stats is None:
+                if len(self.entries) >= self.max_entries:
+                    del self.entries[min(self.entries.values(), key=lambda item: item.total_ms).fingerprint]
+                stats = self.entries[key] = SlowQueryStats(key, origin, shape)
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            need_plan = self.explain and stats.plan is None
+        if need_plan:
+            stats.plan = self._explain(conn, statement, parameters, executemany)
+
+        slow_query_logger.warning(
+            "Slow query %.1f ms in %s: %s | params %s | plan: %s",
+            elapsed_ms, origin, key, shape, stats.plan
+        )
+
+    @staticmethod
+    def _explain(conn, statement: str, parameters, executemany: bool) -> str:
+        """План запроса на том же соединении (EXPLAIN не выполняет запрос)"""
+        if not statement.lstrip().lower().startswith(_EXPLAINABLE):
+            return "not explainable"
+        if executemany:
+            parameters = next(iter(parameters), ())
+        sqlite = conn.dialect.name == "sqlite"
+        cursor = conn.connection.cursor()
+        try:
+            # Ошибка EXPLAIN не должна прерывать транзакцию запроса на PostgreSQL
+            if not sqlite:
+                cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(("EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN ") + statement, parameters)
+                plan = "\n".join(" | ".join(str(value) for value in row) for row in cursor.fetchall())
+            except Exception as exc:
+                if not sqlite:
+                    cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                plan = f"EXPLAIN failed: {exc}"
+            if not sqlite:
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        except Exception as exc:
+            return f"EXPLAIN failed: {exc}"
+        finally:
+            cursor.close()
+
+    def report(self, limit: int = 20) -> list[dict]:
+        """Отпечатки по убыванию суммарного времени"""
+        with self._lock:
+            entries = sorted(self.entries.values(), key=lambda item: item.total_ms, reverse=True)
+            return [stats.as_dict() for stats in entries[:limit]]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.entries.clear()
+
+
+slow_query_log = SlowQueryLog(
+    settings.SLOW_QUERY_THRESHOLD_MS,
+    explain=settings.SLOW_QUERY_EXPLAIN,
+    max_entries=settings.SLOW_QUERY_MAX_ENTRIES
+)
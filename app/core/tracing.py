@@ -0,0 +1,363 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueListener, RotatingFileHandler
+from fastapi.routing import APIRoute
+from app.core.config import settings
+
+# Трасса текущего запроса и id активного спана; без трассы спаны не создаются
+_current_trace: ContextVar["Trace | None"] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[str | None] = ContextVar("current_span", default=None)
+
+# Категории для Server-Timing в порядке вывода
+TIMING_ORDER = ("auth", "endpoint", "service", "db", "render")
+
+# Виды спанов OTLP
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+
+class Span:
+    __slots__ = ("name", "category", "span_id", "parent_id", "start", "end", "attributes")
+
+    def __init__(self, name: str, category: str, parent_id: str | None, start: int, attributes: dict):
+        self.name = name
+        self.category = category
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.start = start
+        self.end = start
+        self.attributes = attributes
+
+
+class Trace:
+    """Спаны одного запроса; время - perf_counter_ns с привязкой к часам"""
+
+    def __init__(self, trace_id: str | None = None, parent_id: str | None = None):
+        self.trace_id = trace_id or f"{random.getrandbits(128):032x}"
+        self.parent_id = parent_id
+        self.root_id = f"{random.getrandbits(64):016x}"
+        self.wall_start = time.time_ns()
+        self.start = time.perf_counter_ns()
+        self.spans: list[Span] = []
+
+    def add(self, name: str, category: str, start: int, end: int, attributes: dict | None = None) -> Span:
+        item = Span(name, category, _current_span.get() or self.root_id, start, attributes or {})
+        item.end = end
+        self.spans.append(item)
+        return item
+
+    def unix_ns(self, perf_ns: int) -> int:
+        return self.wall_start + perf_ns - self.start
+
+    def timings(self) -> dict[str, tuple[float, int]]:
+        """Собственное время (без дочерних спанов) по категориям: мс и число спанов"""
+        children: dict[str, int] = {}
+        for item in self.spans:
+            children[item.parent_id] = children.get(item.parent_id, 0) + item.end - item.start
+        result: dict[str, tuple[float, int]] = {}
+        for item in self.spans:
+            own = max(0, item.end - item.start - children.get(item.span_id, 0))
+            total, count = result.get(item.category, (0.0, 0))
+            result[item.category] = (total + own / 1_000_000, count + 1)
+        return result
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+class span:
+    """Контекстный менеджер спана; без активной трассы ничего не делает"""
+
+    __slots__ = ("name", "category", "attributes", "_trace", "_span", "_token")
+
+    def __init__(self, name: str, category: str | None = None, **attributes):
+        self.name = name
+        self.category = category or name
+        self.attributes = attributes
+        self._trace = None
+
+    def __enter__(self):
+        self._trace = _current_trace.get()
+        if self._trace is not None:
+            start = time.perf_counter_ns()
+            self._span = self._trace.add(self.name, self.category, start, start, self.attributes)
+            self._token = _current_span.set(self._span.span_id)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._trace is not None:
+            self._span.end = time.perf_counter_ns()
+            if exc_type is not None:
+                self._span.attributes["error"] = exc_type.__name__
+            _current_span.reset(self._token)
+        return False
+
+
+def traced(name: str, category: str | None = None):
+    """Декоратор функции (sync или async), записывающий ее вызов спаном"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_trace.get() is None:
+                    return await func(*args, **kwargs)
+                with span(name, category):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with span(name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_service(cls):
+    """Декоратор класса сервиса: спан "service" на каждый публичный метод"""
+    for attr, value in list(vars(cls).items()):
+        if not attr.startswith("_") and inspect.isfunction(value):
+            setattr(cls, attr, traced(f"{cls.__name__}.{attr}", "service")(value))
+    return cls
+
+
+class TracedRoute(APIRoute):
+    """Маршрут со спанами обработчика и рендеринга ответа
+
+    Рендеринг - время от возврата обработчика до готового ответа
+    (валидация response_model и сериализация JSON).
+    """
+
+    def get_route_handler(self):
+        # get_route_handler вызывается один раз из конструктора маршрута
+        self.dependant.call = traced(f"endpoint {self.name}", "endpoint")(self.dependant.call)
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            trace = _current_trace.get()
+            if trace is None:
+                return await handler(request)
+            response = await handler(request)
+            endpoint_spans = [item for item in trace.spans if item.category == "endpoint"]
+            if endpoint_spans:
+                trace.add("render", "render", endpoint_spans[-1].end, time.perf_counter_ns())
+            return response
+
+        return traced_handler
+
+
+def record_db_span(conn, statement, parameters, executemany, started_ns: int, ended_ns: int) -> None:
+    """Спан "db" для SQL запроса, выполненного во время трассируемого запроса"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    trace.add("db.query", "db", started_ns, ended_ns, {
+        "db.system": conn.dialect.name,
+        "db.statement": statement[:1000],
+    })
+
+
+def instrument_engine_tracing(engine) -> None:
+    """Спан "db" на каждый SQL запрос движка во время трассируемого запроса"""
+    from app.core.query_timing import add_query_listener
+
+    add_query_listener(engine, record_db_span)
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class _OtlpPayload:
+    """Тело строки экспорта; сериализуется в JSON при форматировании в потоке слушателя"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: dict):
+        self.data = data
+
+    def __str__(self) -> str:
+        return json.dumps(self.data, separators=(",", ":"))
+
+
+class SpanExporter:
+    """Запись трасс в OTLP JSON (одна строка на запрос) в файл с ротацией
+
+    Как и логи, запрос только кладет запись в очередь; JSON и запись в файл -
+    в потоке QueueListener. Файл и поток открываются при первой записи в
+    процессе: экспортер, созданный в мастере app.serve до fork, не делит файл
+    между воркерами (с LOG_FILE_PER_PROCESS в имени файла pid процесса).
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10_000_000, backup_count: int = 5,
+                 service_name: str = settings.PROJECT_NAME):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.service_name = service_name
+        self._pid: int | None = None
+        self._handler: logging.Handler | None = None
+        self._listener: QueueListener | None = None
+        self._lock = threading.Lock()
+
+    def _start(self) -> None:
+        # Импорт здесь: app.core.logging импортирует этот модуль
+        from app.core.logging import DroppingQueueHandler, process_file_path
+
+        if self._listener is not None:
+            # Унаследован при fork: поток слушателя в этом процессе не работает
+            for handler in self._listener.handlers:
+                handler.close()
+        file_handler = RotatingFileHandler(
+            process_file_path(self.path), maxBytes=self.max_bytes, backupCount=self.backup_count, encoding="utf-8"
+        )
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        self._handler = DroppingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+        self._listener = QueueListener(self._handler.queue, file_handler)
+        self._listener.start()
+        self._pid = os.getpid()
+
+    def close(self) -> None:
+        """Дописать спаны из очереди и закрыть файл"""
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+                for handler in self._listener.handlers:
+                    handler.close()
+            self._pid = self._handler = self._listener = None
+
+    def export(self, trace: Trace, name: str, end: int, attributes: dict) -> None:
+        spans = [{
+            "traceId": trace.trace_id,
+            "spanId": trace.root_id,
+            "parentSpanId": trace.parent_id or "",
+            "name": name,
+            "kind": SPAN_KIND_SERVER,
+            "startTimeUnixNano": str(trace.wall_start),
+            "endTimeUnixNano": str(trace.unix_ns(end)),
+            "attributes": [_attribute(key, value) for key, value in attributes.items()],
+        }]
+        for item in trace.spans:
+            spans.append({
+                "traceId": trace.trace_id,
+                "spanId": item.span_id,
+                "parentSpanId": item.parent_id,
+                "name": item.name,
+                "kind": SPAN_KIND_CLIENT if item.category == "db" else SPAN_KIND_INTERNAL,
+                "startTimeUnixNano": str(trace.unix_ns(item.start)),
+                "endTimeUnixNano": str(trace.unix_ns(item.end)),
+                "attributes": [_attribute(key, value) for key, value in item.attributes.items()],
+            })
+        payload = _OtlpPayload({"resourceSpans": [{
+            "resource": {"attributes": [_attribute("service.name", self.service_name)]},
+            "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}],
+        }]})
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._start()
+        self._handler.handle(logging.LogRecord("tracing.export", logging.INFO, __file__, 0, payload, None, None))
+
+
+def _parse_traceparent(value: str) -> tuple[str | None, str | None]:
+    """Trace id и id родителя из W3C traceparent"""
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None, None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None, None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None, None
+    return parts[1], parts[2]
+
+
+def server_timing(trace: Trace, total_ms: float) -> str:
+    """Значение заголовка Server-Timing"""
+    timings = trace.timings()
+    entries = []
+    for category in TIMING_ORDER + tuple(sorted(set(timings) - set(TIMING_ORDER))):
+        if category not in timings:
+            continue
+        duration, count = timings[category]
+        entry = f"{category};dur={duration:.2f}"
+        if category == "db":
+            entry += f';desc="{count} queries"'
+        entries.append(entry)
+    entries.append(f"total;dur={total_ms:.2f}")
+    return ", ".join(entries)
+
+
+class TracingMiddleware:
+    """ASGI middleware: трасса на запрос, заголовок Server-Timing и экспорт спанов"""
+
+    def __init__(self, app, exporter: SpanExporter | None = None):
+        self.app = app
+        self.exporter = exporter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = parent_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"traceparent":
+                trace_id, parent_id = _parse_traceparent(value.decode("latin-1"))
+                break
+        trace = Trace(trace_id, parent_id)
+        token = _current_trace.set(trace)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter_ns() - trace.start) / 1_000_000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(trace, total_ms).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            if self.exporter is not None:
+                route = getattr(scope.get("route"), "path", "unmatched")
+                self.exporter.export(trace, f"{scope['method']} {route}", time.perf_counter_ns(), {
+                    "http.method": scope["method"],
+                    "http.route": route,
+                    "http.target": scope["path"],
+                    "http.status_code": status_code,
+                })
+
+
+def create_span_exporter() -> SpanExporter | None:
+    """Экспортер из настроек (None, если путь не задан)"""
+    if not settings.TRACING_EXPORT_PATH:
+        return None
+    return SpanExporter(
+        settings.TRACING_EXPORT_PATH,
+        max_bytes=settings.TRACING_EXPORT_MAX_BYTES,
+        backup_count=settings.TRACING_EXPORT_BACKUP_COUNT
+    )
@@ -1,10 +1,22 @@
+import signal
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.api import api_router
 from app.core.config import settings
-from app.core.database import engine
+from app.core.database import engine, SessionLocal
 from app.core.logging import setup_logging
+from app.core.admission import AdmissionMiddleware, admission_controller, pool_wait_monitor
+from app.core.metrics import MetricsMiddleware, instrument_engine, metrics
+from app.core.tracing import TracingMiddleware, create_span_exporter, instrument_engine_tracing
+from app.core.memory import MemoryTrackingMiddleware, memory_tracker
+from app.core.profiler import install_profile_signal
+from app.core.rate_limit import RateLimitMiddleware, create_bucket_store, parse_rules
+from app.core.serialization import MsgpackMiddleware, msgpack
 from app.alembic.models import User, Question, Answer
+from app.services.user_service import load_user_identity_filter
+from app.services.answer_batcher import answer_batcher
 
 # Настройка логирования
 setup_logging()
@@ -14,13 +26,53 @@ User.metadata.create_all(bind=engine)
 Question.metadata.create_all(bind=engine)
 Answer.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка приложения"""
+    # Заполняем Bloom-фильтр пользователей для проверки дубликатов
+    with SessionLocal() as db:
+        load_user_identity_filter(db)
+    yield
+    # Дописываем ответы, ожидающие group commit
+    await answer_batcher.stop()
+    # Последний снимок метрик, чтобы перезапускаемый воркер не потерял счетчики
+    metrics.flush()
+    if span_exporter is not None:
+        span_exporter.close()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description=settings.DESCRIPTION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
+# Rate limiting (CORS добавляется после, чтобы ответы 429 тоже получали CORS заголовки)
+rate_limit_store = create_bucket_store(settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_SQLITE_PATH)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        rules=parse_rules(settings.RATE_LIMITS),
+        store=rate_limit_store
+    )
+
+# Admission control: лишние запросы получают 503 до обработчика (CORS добавляется после)
+if settings.ADMISSION_ENABLED:
+    pool_wait_monitor.instrument(engine)
+    metrics.collectors.append(admission_controller.collect)
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission_controller,
+        prefix=settings.API_V1_STR,
+        priority_routes=settings.ADMISSION_PRIORITY_ROUTES,
+        priority_writes=settings.ADMISSION_PRIORITY_WRITES,
+        retry_after=settings.ADMISSION_RETRY_AFTER,
+        registry=metrics
+    )
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,10 +82,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# MessagePack поверх CORS и rate limiting, чтобы в формате клиента были и их ответы
+if settings.MSGPACK_ENABLED and msgpack is not None:
+    app.add_middleware(MsgpackMiddleware, prefix=settings.API_V1_STR)
+
+# Метрики добавляются после CORS и rate limiting, чтобы учитывать и их ответы
+if settings.METRICS_ENABLED:
+    instrument_engine(engine, metrics)
+    app.add_middleware(MetricsMiddleware, registry=metrics)
+
+# Учет памяти по маршрутам (tracemalloc)
+if settings.MEMORY_TRACKING_ENABLED:
+    memory_tracker.start()
+    app.add_middleware(MemoryTrackingMiddleware, tracker=memory_tracker)
+
+# Трассировка - самый внешний слой, чтобы total в Server-Timing покрывал весь запрос
+span_exporter = create_span_exporter() if settings.TRACING_ENABLED else None
+if settings.TRACING_ENABLED:
+    instrument_engine_tracing(engine)
+    app.add_middleware(TracingMiddleware, exporter=span_exporter)
+
 # Подключаем API роутер
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+# Профилирование по сигналу SIGUSR1 (kill -USR1 <pid> воркера)
+if settings.PROFILER_SIGNAL_ENABLED:
+    install_profile_signal(
+        app.routes,
+        signal.SIGUSR1,
+        seconds=settings.PROFILER_SIGNAL_SECONDS,
+        interval=0.005,
+        output_dir=settings.PROFILER_OUTPUT_DIR
+    )
+
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to QuestionAnswers API"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Метрики в формате Prometheus"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class BulkCreateResponse(BaseModel):
+    ids: list[int]
+    count: int
@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field, TypeAdapter
+from datetime import datetime
+from typing import Annotated, Literal, Optional, Union
+
+
+class QuestionImport(BaseModel):
+    type: Literal["question"]
+    id: Optional[int] = None
+    text: str
+    created_at: Optional[datetime] = None
+
+
+class AnswerImport(BaseModel):
+    type: Literal["answer"]
+    id: Optional[int] = None
+    question_id: int
+    user_id: Optional[str] = None
+    text: str
+    created_at: Optional[datetime] = None
+
+
+ImportLine = Annotated[Union[QuestionImport, AnswerImport], Field(discriminator="type")]
+
+# Адаптер создается один раз: схема валидации компилируется при импорте модуля
+import_line_adapter = TypeAdapter(ImportLine)
+
+
+class ImportLineError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    lines: int
+    questions: int
+    answers: int
+    failed: int
+    errors: list[ImportLineError]
@@ -0,0 +1,401 @@
+"""Многопроцессный запуск API
+
+    python -m app.serve --host 0.0.0.0 --workers 4 --max-requests 10000 --max-requests-jitter 1000
+
+Мастер открывает сокет и форкает воркеры; каждый воркер - uvicorn.Server на
+общем сокете, входящие соединения между ними распределяет ядро. С --preload
+(по умолчанию) приложение импортируется в мастере до fork, и воркеры делят
+его страницы памяти (copy-on-write). uvloop и httptools используются, если
+установлены.
+
+Сигналы мастеру: SIGHUP - поочередный перезапуск воркеров (новый воркер
+принимает соединения до остановки старого), SIGTERM и SIGINT - плавная
+остановка. Воркер, обработавший --max-requests запросов (плюс случайно до
+--max-requests-jitter, чтобы воркеры не перезапускались одновременно),
+завершается и заменяется новым.
+"""
+import argparse
+import gc
+import importlib.util
+import os
+import random
+import select
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+import uvicorn
+from uvicorn.server import ServerState
+from app.core.config import settings
+from app.core.logging import get_logger, setup_logging, stop_logging
+
+serve_logger = get_logger("serve")
+
+APP = "app.main:app"
+# Воркер не смог запустить приложение: мастер не перезапускает его, а останавливается
+WORKER_BOOT_ERROR = 3
+# Сверх graceful_timeout воркеру дается время на lifespan shutdown (дописать group commit)
+SHUTDOWN_MARGIN = 5
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def event_loop_implementation() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_implementation() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    """Слушающий сокет мастера, наследуемый воркерами при fork"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+def reset_after_fork() -> None:
+    """Ресурсы предзагруженного приложения, которые нельзя делить с мастером"""
+    from app.core.database import engine
+    from app.main import rate_limit_store
+    from app.services.user_service import user_cache_invalidations
+
+    # Соединения пула открыл мастер (create_all); воркер открывает свои
+    engine.dispose(close=False)
+    reconnect = getattr(rate_limit_store, "reconnect", None)
+    if reconnect is not None:
+        reconnect()
+    if user_cache_invalidations is not None:
+        user_cache_invalidations.reconnect()
+
+
+class RequestLimitState(ServerState):
+    """Состояние uvicorn, вызывающее on_limit сразу после limit-го обработанного запроса"""
+
+    def __init__(self, limit: int, on_limit):
+        self.limit = limit
+        self.on_limit = on_limit
+        self._total_requests = 0
+        super().__init__()
+
+    @property
+    def total_requests(self) -> int:
+        return self._total_requests
+
+    @total_requests.setter
+    def total_requests(self, value: int) -> None:
+        reached = self._total_requests < self.limit <= value
+        self._total_requests = value
+        if reached:
+            self.on_limit()
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn.Server, сообщающий мастеру о готовности через pipe"""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+        if config.limit_max_requests is not None:
+            self.server_state = RequestLimitState(config.limit_max_requests, self.stop_accepting)
+
+    def stop_accepting(self) -> None:
+        """Перестать принимать соединения и начать плавную остановку
+
+        uvicorn проверяет лимит запросов и сигнал остановки раз в on_tick (0.1 с),
+        и принятые за это время соединения без запроса при остановке закрываются
+        без ответа. Здесь слушающий сокет закрывается сразу: новые соединения
+        остаются в общей очереди ядра и достаются другим воркерам.
+        """
+        for server in getattr(self, "servers", ()):
+            server.close()
+        self.should_exit = True
+
+    def handle_exit(self, sig, frame) -> None:
+        # Обработчик зарегистрирован через loop.add_signal_handler и вызывается в цикле событий
+        super().handle_exit(sig, frame)
+        if sig == signal.SIGTERM:
+            self.stop_accepting()
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        if self.started:
+            try:
+                os.write(self.ready_fd, b"1")
+            except OSError:
+                # Мастер не ждет готовности этого воркера
+                pass
+
+
+class Master:
+    """Мастер-процесс: запускает воркеры, заменяет завершившиеся и обрабатывает сигналы"""
+
+    def __init__(self, sock: socket.socket, app, workers: int, *, preloaded: bool = False,
+                 max_requests: int = 0, max_requests_jitter: int = 0, graceful_timeout: int = 30,
+                 keep_alive: int = 5, access_log: bool = False):
+        self.sock = sock
+        self.app = app
+        self.workers_count = workers
+        self.preloaded = preloaded
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.keep_alive = keep_alive
+        self.access_log = access_log
+        self.workers: dict[int, float] = {}
+        self.retiring: set[int] = set()
+        self._signals: list[int] = []
+        self._wakeup: tuple[int, int] | None = None
+
+    def worker_config(self) -> uvicorn.Config:
+        limit = None
+        if self.max_requests > 0:
+            limit = self.max_requests + random.randint(0, max(self.max_requests_jitter, 0))
+        return uvicorn.Config(
+            self.app,
+            loop=event_loop_implementation(),
+            http=http_implementation(),
+            lifespan="on",
+            # Логирование настраивает приложение (очередь и поток слушателя)
+            log_config=None,
+            access_log=self.access_log,
+            limit_max_requests=limit,
+            timeout_keep_alive=self.keep_alive,
+            timeout_graceful_shutdown=self.graceful_timeout,
+        )
+
+    def spawn(self) -> tuple[int, int]:
+        """Запустить воркер; pid и конец pipe, который станет читаемым после его запуска"""
+        config = self.worker_config()
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid:
+            os.close(ready_w)
+            self.workers[pid] = time.monotonic()
+            serve_logger.info("Started worker %s (max requests %s)", pid, config.limit_max_requests)
+            return pid, ready_r
+        os.close(ready_r)
+        self._run_worker(config, ready_w)
+
+    def _run_worker(self, config: uvicorn.Config, ready_fd: int) -> None:
+        code = WORKER_BOOT_ERROR
+        try:
+            signal.set_wakeup_fd(-1)
+            for fd in self._wakeup or ():
+                os.close(fd)
+            # SIGINT и SIGTERM перехватывает uvicorn, SIGHUP адресован только мастеру
+            for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGCHLD):
+                signal.signal(signum, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            # Поток слушателя очереди логов не переживает fork
+            setup_logging()
+            if self.preloaded:
+                reset_after_fork()
+            server = WorkerServer(config, ready_fd)
+            server.run(sockets=[self.sock])
+            code = 0 if server.started else WORKER_BOOT_ERROR
+        except BaseException:
+            serve_logger.exception("Worker %s failed", os.getpid())
+        finally:
+            stop_logging()
+            os._exit(code)
+
+    def _on_signal(self, signum, frame) -> None:
+        # Только запоминаем сигнал: обработка в цикле мастера, который будит wakeup fd
+        if signum != signal.SIGCHLD:
+            self._signals.append(signum)
+
+    def _sleep(self, timeout: float) -> None:
+        wakeup_r = self._wakeup[0]
+        select.select([wakeup_r], [], [], timeout)
+        try:
+            while os.read(wakeup_r, 1024):
+                pass
+        except BlockingIOError:
+            pass
+
+    def forget(self, pid: int) -> None:
+        """Убрать завершившийся воркер из учета; его метрики переносятся в общий файл"""
+        self.workers.pop(pid, None)
+        if settings.METRICS_DIR:
+            # Импорт здесь: реестр метрик создается после выбора METRICS_DIR в main
+            from app.core.metrics import retire_snapshot
+            retire_snapshot(settings.METRICS_DIR, pid)
+
+    def reap(self) -> bool:
+        """Убрать завершившиеся воркеры; False - воркер не смог запустить приложение"""
+        booted = True
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            self.forget(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            elif code == WORKER_BOOT_ERROR:
+                serve_logger.error("Worker %s failed to boot", pid)
+                booted = False
+            elif code == 0:
+                serve_logger.info("Worker %s exited after max requests", pid)
+            else:
+                serve_logger.warning("Worker %s exited with code %s", pid, code)
+        return booted
+
+    def maintain(self) -> None:
+        """Добавить воркеры до нужного числа (не считая останавливаемых)"""
+        while len(self.workers) - len(self.retiring) < self.workers_count:
+            _, ready_fd = self.spawn()
+            os.close(ready_fd)
+
+    def wait_ready(self, ready_fd: int, timeout: float) -> bool:
+        try:
+            readable, _, _ = select.select([ready_fd], [], [], timeout)
+            return bool(readable) and os.read(ready_fd, 1) == b"1"
+        finally:
+            os.close(ready_fd)
+
+    def retire(self, pid: int) -> None:
+        """Плавно остановить воркер (SIGTERM), замена ему не нужна"""
+        self.retiring.add(pid)
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def rolling_restart(self) -> None:
+        """Заменить воркеры по одному: старый останавливается, когда новый принимает соединения"""
+        serve_logger.info("Rolling restart of %s workers", len(self.workers) - len(self.retiring))
+        for pid in [pid for pid in self.workers if pid not in self.retiring]:
+            if pid not in self.workers:
+                continue
+            new_pid, ready_fd = self.spawn()
+            if not self.wait_ready(ready_fd, self.graceful_timeout):
+                serve_logger.error("Worker %s did not start, rolling restart aborted", new_pid)
+                self.retire(new_pid)
+                return
+            self.retire(pid)
+
+    def run(self) -> int:
+        """Цикл мастера до SIGTERM/SIGINT; код выхода процесса"""
+        self._wakeup = os.pipe()
+        for fd in self._wakeup:
+            os.set_blocking(fd, False)
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+        signal.set_wakeup_fd(self._wakeup[1])
+        if self.preloaded:
+            # Объекты приложения не трогает сборщик мусора воркеров: страницы остаются общими
+            gc.collect()
+            gc.freeze()
+        try:
+            if not self.preloaded:
+                # Таблицы создает импорт app.main: остальные воркеры стартуют после первого
+                _, ready_fd = self.spawn()
+                self.wait_ready(ready_fd, self.graceful_timeout)
+            self.maintain()
+            while True:
+                self._sleep(1.0)
+                while self._signals:
+                    signum = self._signals.pop(0)
+                    if signum in (signal.SIGTERM, signal.SIGINT):
+                        serve_logger.info("Shutting down on %s", signal.Signals(signum).name)
+                        return 0
+                    self.rolling_restart()
+                if not self.reap():
+                    return 1
+                self.maintain()
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Плавная остановка воркеров; оставшиеся после таймаута получают SIGKILL"""
+        for pid in list(self.workers):
+            self.retire(pid)
+        deadline = time.monotonic() + self.graceful_timeout + SHUTDOWN_MARGIN
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            serve_logger.warning("Killing worker %s", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self.forget(pid)
+        self.retiring.clear()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the API in several worker processes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.SERVE_WORKERS or default_workers())
+    parser.add_argument("--preload", action=argparse.BooleanOptionalAction, default=settings.SERVE_PRELOAD)
+    parser.add_argument("--max-requests", type=int, default=settings.SERVE_MAX_REQUESTS)
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.SERVE_MAX_REQUESTS_JITTER)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.SERVE_GRACEFUL_TIMEOUT)
+    parser.add_argument("--backlog", type=int, default=settings.SERVE_BACKLOG)
+    parser.add_argument("--keep-alive", type=int, default=settings.SERVE_KEEP_ALIVE)
+    parser.add_argument("--access-log", action=argparse.BooleanOptionalAction, default=False)
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    # Каждый процесс пишет и ротирует свой файл лога
+    settings.LOG_FILE_PER_PROCESS = True
+    setup_logging()
+    # /metrics любого воркера должен суммировать снимки всех воркеров
+    metrics_dir = None
+    if args.workers > 1 and settings.METRICS_ENABLED and not settings.METRICS_DIR:
+        metrics_dir = settings.METRICS_DIR = tempfile.mkdtemp(prefix="qa_metrics_")
+    # Изменение пользователя должно сбрасывать его запись в кеше всех воркеров
+    cache_dir = None
+    if args.workers > 1 and settings.USER_CACHE_TTL > 0 and not settings.USER_CACHE_INVALIDATION_PATH:
+        cache_dir = tempfile.mkdtemp(prefix="qa_user_cache_")
+        settings.USER_CACHE_INVALIDATION_PATH = os.path.join(cache_dir, "invalidations.sqlite3")
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    app = APP
+    if args.preload:
+        from app.main import app
+
+    master = Master(
+        sock,
+        app,
+        args.workers,
+        preloaded=args.preload,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        keep_alive=args.keep_alive,
+        access_log=args.access_log
+    )
+    serve_logger.info(
+        "Listening on %s:%s with %s workers (loop=%s, http=%s, preload=%s)",
+        args.host, args.port, args.workers, event_loop_implementation(), http_implementation(), args.preload
+    )
+    try:
+        return master.run()
+    finally:
+        sock.close()
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+        if cache_dir is not None:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+import asyncio
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from app.models.answer import AnswerCreate
+from app.alembic.models.answer import Answer
+from app.alembic.models.question import Question
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.logging import answer_logger
+from app.services.question_service import invalidate_question_cache
+
+_STOP = object()
+
+
+class AnswerBatcher:
+    """Group commit для создания ответов
+
+    Запросы кладут строки в ограниченную очередь, фоновая задача записывает их
+    одной транзакцией каждые max_delay_ms или по max_batch строк и возвращает
+    каждому запросу его ответ.
+    """
+
+    def __init__(self, session_factory, max_batch: int = 500, max_delay_ms: float = 5, max_queue: int = 10_000):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self.max_queue = max_queue
+        self.batches = 0
+        self.rows = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, answer_data: AnswerCreate, user_id: str) -> Answer:
+        """Поставить ответ в очередь и дождаться его записи"""
+        self._ensure_started()
+        future = self._loop.create_future()
+        row = {"text": answer_data.text, "question_id": answer_data.question_id, "user_id": user_id}
+        try:
+            self._queue.put_nowait((row, future))
+        except asyncio.QueueFull:
+            answer_logger.warning("Answer batcher queue is full, rejecting request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many pending answers, try again later",
+                headers={"Retry-After": "1"}
+            )
+        return await future
+
+    async def stop(self) -> None:
+        """Записать оставшиеся строки и остановить фоновую задачу"""
+        if self._worker is None or self._worker.done() or self._loop is not asyncio.get_running_loop():
+            return
+        await self._queue.put(_STOP)
+        await self._worker
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            item = await queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stopping = False
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: list) -> None:
+        try:
+            results = await run_in_threadpool(self._write, [row for row, _ in batch])
+        except Exception as exc:
+            answer_logger.error("Answer batch of %s rows failed: %s", len(batch), exc)
+            results = [exc] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _write(self, rows: list[dict]) -> list:
+        """Записать пачку одной транзакцией; для отсутствующих вопросов вернуть 404"""
+        with self.session_factory() as db:
+            question_ids = {row["question_id"] for row in rows}
+            existing_ids = set(db.scalars(select(Question.id).where(Question.id.in_(question_ids))))
+            valid_rows = [row for row in rows if row["question_id"] in existing_ids]
+            try:
+                inserted = self._insert(db, valid_rows)
+            except IntegrityError:
+                # Вопрос удалили между проверкой и вставкой - пишем строки по одной
+                db.rollback()
+                return [self._write_one(db, row) for row in rows]
+            db.commit()
+        invalidate_question_cache(*existing_ids)
+
+        self.batches += 1
+        self.rows += len(valid_rows)
+        answer_logger.debug("Group commit wrote %s answers", len(valid_rows))
+        inserted = iter(inserted)
+        return [
+            next(inserted) if row["question_id"] in existing_ids else self._not_found()
+            for row in rows
+        ]
+
+    def _write_one(self, db, row: dict):
+        try:
+            answer = self._insert(db, [row])[0]
+            db.commit()
+            invalidate_question_cache(row["question_id"])
+            return answer
+        except IntegrityError:
+            db.rollback()
+            return self._not_found()
+
+    @staticmethod
+    def _insert(db, rows: list[dict]) -> list[Answer]:
+        if not rows:
+            return []
+        result = db.execute(
+            insert(Answer.__table__).returning(*Answer.__table__.c, sort_by_parameter_order=True),
+            rows
+        )
+        return [Answer(**row._mapping) for row in result]
+
+    @staticmethod
+    def _not_found() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Question not found"
+        )
+
+
+answer_batcher = AnswerBatcher(
+    SessionLocal,
+    max_batch=settings.ANSWER_GROUP_COMMIT_MAX_BATCH,
+    max_delay_ms=settings.ANSWER_GROUP_COMMIT_MAX_DELAY_MS,
+    max_queue=settings.ANSWER_GROUP_COMMIT_MAX_QUEUE
+)
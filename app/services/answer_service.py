@@ -1,126 +1,190 @@
 from sqlalchemy.orm import Session
-from app.models.answer import AnswerCreate, AnswerUpdate
+from sqlalchemy import Row, select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from app.models.answer import AnswerCreate, AnswerResponse, AnswerUpdate
 from app.alembic.models.answer import Answer
 from app.alembic.models.question import Question
 from fastapi import HTTPException, status
+from app.core.config import settings
 from app.core.logging import answer_logger
+from app.core.tracing import trace_service
+from app.services.question_service import invalidate_question_cache
 
 
+def _list_query(fields: tuple[str, ...] | None = None):
+    """Списки выбирают только колонки AnswerResponse (или fields) в строки без identity map"""
+    return select(*(Answer.__table__.c[name] for name in fields or AnswerResponse.model_fields))
+
+
+@trace_service
 class AnswerService:
     def __init__(self, db: Session):
         self.db = db
 
     def create_answer(self, answer_data: AnswerCreate, user_id: str) -> Answer:
         """Создать новый ответ"""
-        answer_logger.info(f"Creating answer for question {answer_data.question_id} by user {user_id}")
-        
-        # Проверяем, что вопрос существует
-        question = self.db.query(Question).filter(Question.id == answer_data.question_id).first()
-        if not question:
-            answer_logger.warning(f"Question with ID {answer_data.question_id} not found")
+        answer_logger.info("Creating answer for question %s by user %s", answer_data.question_id, user_id)
+        
+        # Существование вопроса проверяет внешний ключ: INSERT ... RETURNING за один запрос
+        try:
+            row = self.db.execute(
+                insert(Answer.__table__)
+                .values(text=answer_data.text, question_id=answer_data.question_id, user_id=user_id)
+                .returning(*Answer.__table__.c)
+            ).one()
+            self.db.commit()
+            invalidate_question_cache(answer_data.question_id)
+        except IntegrityError:
+            self.db.rollback()
+            answer_logger.warning("Question with ID %s not found", answer_data.question_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Question not found"
             )
+        answer = Answer(**row._mapping)
         
-        answer = Answer(
-            text=answer_data.text,
-            question_id=answer_data.question_id,
-            user_id=user_id
-        )
-        self.db.add(answer)
+        answer_logger.info("Answer created successfully with ID: %s", answer.id)
+        return answer
+
+    def create_answers_bulk(self, answers_data: list[AnswerCreate], user_id: str) -> list[int]:
+        """Создать ответы одним INSERT ... RETURNING в одной транзакции"""
+        answer_logger.info("Bulk creating %s answers by user %s", len(answers_data), user_id)
+        
+        if len(answers_data) > settings.BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Too many items, maximum is {settings.BULK_MAX_ITEMS}"
+            )
+        if not answers_data:
+            return []
+        
+        # Проверяем существование всех вопросов одним запросом
+        question_ids = {answer_data.question_id for answer_data in answers_data}
+        existing_ids = set(self.db.scalars(select(Question.id).where(Question.id.in_(question_ids))))
+        missing_ids = sorted(question_ids - existing_ids)
+        if missing_ids:
+            answer_logger.warning("Questions not found for bulk answers: %s", missing_ids[:10])
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Question not found: {missing_ids[:100]}"
+            )
+        
+        rows = [
+            {"text": answer_data.text, "question_id": answer_data.question_id, "user_id": user_id}
+            for answer_data in answers_data
+        ]
+        ids = self.db.scalars(
+            insert(Answer).returning(Answer.id, sort_by_parameter_order=True),
+            rows
+        ).all()
         self.db.commit()
-        self.db.refresh(answer)
+        invalidate_question_cache(*question_ids)
         
-        answer_logger.info(f"Answer created successfully with ID: {answer.id}")
-        return answer
+        answer_logger.info("Bulk created %s answers", len(ids))
+        return list(ids)
 
     def get_answer_by_id(self, answer_id: int) -> Answer | None:
         """Получить ответ по ID"""
-        answer_logger.debug(f"Getting answer by ID: {answer_id}")
+        answer_logger.debug("Getting answer by ID: %s", answer_id)
         
         answer = self.db.query(Answer).filter(Answer.id == answer_id).first()
         if not answer:
-            answer_logger.warning(f"Answer with ID {answer_id} not found")
+            answer_logger.warning("Answer with ID %s not found", answer_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Answer not found"
             )
         return answer
 
-    def get_answers_by_question_id(self, question_id: int) -> list[Answer]:
+    def get_answers_by_question_id(self, question_id: int, fields: tuple[str, ...] | None = None) -> list[Row]:
         """Получить все ответы на конкретный вопрос"""
-        answer_logger.debug(f"Getting answers for question ID: {question_id}")
+        answer_logger.debug("Getting answers for question ID: %s", question_id)
         
         # Проверяем, что вопрос существует
-        question = self.db.query(Question).filter(Question.id == question_id).first()
-        if not question:
-            answer_logger.warning(f"Question with ID {question_id} not found")
+        if self.db.scalar(select(Question.id).where(Question.id == question_id)) is None:
+            answer_logger.warning("Question with ID %s not found", question_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Question not found"
             )
         
-        answers = self.db.query(Answer).filter(Answer.question_id == question_id).all()
-        answer_logger.info(f"Retrieved {len(answers)} answers for question {question_id}")
+        answers = self.db.execute(_list_query(fields).where(Answer.question_id == question_id)).all()
+        answer_logger.info("Retrieved %s answers for question %s", len(answers), question_id)
         return answers
 
-    def get_answers_by_user_id(self, user_id: str) -> list[Answer]:
+    def get_answers_by_user_id(self, user_id: str) -> list[Row]:
         """Получить все ответы конкретного пользователя"""
-        answer_logger.debug(f"Getting answers for user ID: {user_id}")
+        answer_logger.debug("Getting answers for user ID: %s", user_id)
         
-        answers = self.db.query(Answer).filter(Answer.user_id == user_id).all()
-        answer_logger.info(f"Retrieved {len(answers)} answers for user {user_id}")
+        answers = self.db.execute(_list_query().where(Answer.user_id == user_id)).all()
+        answer_logger.info("Retrieved %s answers for user %s", len(answers), user_id)
         return answers
 
-    def update_answer(self, answer_id: int, answer_data: AnswerUpdate, user_id: str) -> Answer | None:
-        """Обновить ответ (только автор может обновлять)"""
-        answer_logger.info(f"Updating answer {answer_id} by user {user_id}")
-        
-        answer = self.get_answer_by_id(answer_id)
-        
-        # Проверяем, что пользователь является автором ответа
-        if answer.user_id != user_id:
-            answer_logger.warning(f"User {user_id} attempted to update answer {answer_id} owned by {answer.user_id}")
+    def _raise_not_owned(self, answer_id: int, user_id: str, action: str) -> None:
+        """Объяснить, почему запрос с проверкой владельца не затронул строк"""
+        owner_id = self.db.scalar(select(Answer.user_id).where(Answer.id == answer_id))
+        if owner_id is None:
+            answer_logger.warning("Answer with ID %s not found", answer_id)
             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only update your own answers"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Answer not found"
             )
+        answer_logger.warning("User %s attempted to %s answer %s owned by %s", user_id, action, answer_id, owner_id)
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"You can only {action} your own answers"
+        )
+
+    def update_answer(self, answer_id: int, answer_data: AnswerUpdate, user_id: str) -> Answer | None:
+        """Обновить ответ (только автор может обновлять)"""
+        answer_logger.info("Updating answer %s by user %s", answer_id, user_id)
         
         update_data = answer_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(answer, field, value)
-        
+        if not update_data:
+            answer = self.get_answer_by_id(answer_id)
+            if answer.user_id != user_id:
+                self._raise_not_owned(answer_id, user_id, "update")
+            return answer
+        
+        # Проверка автора выполняется в самом UPDATE
+        row = self.db.execute(
+            update(Answer.__table__)
+            .where(Answer.id == answer_id, Answer.user_id == user_id)
+            .values(**update_data)
+            .returning(*Answer.__table__.c)
+        ).one_or_none()
+        if row is None:
+            self.db.rollback()
+            self._raise_not_owned(answer_id, user_id, "update")
         self.db.commit()
-        self.db.refresh(answer)
+        invalidate_question_cache(row.question_id)
         
-        answer_logger.info(f"Answer {answer_id} updated successfully")
-        return answer
+        answer_logger.info("Answer %s updated successfully", answer_id)
+        return Answer(**row._mapping)
 
     def delete_answer(self, answer_id: int, user_id: str) -> bool:
         """Удалить ответ (только автор может удалять)"""
-        answer_logger.info(f"Deleting answer {answer_id} by user {user_id}")
-        
-        answer = self.get_answer_by_id(answer_id)
+        answer_logger.info("Deleting answer %s by user %s", answer_id, user_id)
         
-        # Проверяем, что пользователь является автором ответа
-        if answer.user_id != user_id:
-            answer_logger.warning(f"User {user_id} attempted to delete answer {answer_id} owned by {answer.user_id}")
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You can only delete your own answers"
-            )
-        
-        self.db.delete(answer)
+        # Проверка автора выполняется в самом DELETE
+        question_id = self.db.scalar(
+            delete(Answer.__table__)
+            .where(Answer.id == answer_id, Answer.user_id == user_id)
+            .returning(Answer.question_id)
+        )
+        if question_id is None:
+            self.db.rollback()
+            self._raise_not_owned(answer_id, user_id, "delete")
         self.db.commit()
+        invalidate_question_cache(question_id)
         
-        answer_logger.info(f"Answer {answer_id} deleted successfully")
+        answer_logger.info("Answer %s deleted successfully", answer_id)
         return True
 
-    def get_all_answers(self) -> list[Answer]:
+    def get_all_answers(self) -> list[Row]:
         """Получить все ответы"""
         answer_logger.debug("Getting all answers")
         
-        answers = self.db.query(Answer).all()
-        answer_logger.info(f"Retrieved {len(answers)} answers")
+        answers = self.db.execute(_list_query()).all()
+        answer_logger.info("Retrieved %s answers", len(answers))
         return answers
@@ -56,5 +56,5 @@ def verify_token(token: str) -> Optional[dict]:
         auth_logger.debug("Token verified successfully")
         return payload
     except JWTError as e:
-        auth_logger.warning(f"Token verification failed: {str(e)}")
+        auth_logger.warning("Token verification failed: %s", e)
         return None
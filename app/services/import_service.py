@@ -0,0 +1,211 @@
+import csv
+import io
+from datetime import datetime, UTC
+from typing import AsyncIterator
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.alembic.models.answer import Answer
+from app.alembic.models.question import Question
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.question_service import question_response_cache
+from app.models.imports import (
+    QuestionImport, ImportLineError, ImportReport, import_line_adapter
+)
+
+import_logger = get_logger("import")
+
+# Поля строк, которые задает только администратор (ADMIN_EMAILS)
+ADMIN_ONLY_FIELDS = ("id", "created_at")
+
+
+class ImportService:
+    """Потоковый импорт вопросов и ответов из NDJSON
+
+    Тело читается по частям, строки валидируются по одной и записываются
+    чанками: COPY на PostgreSQL и executemany на остальных базах.
+    """
+
+    def __init__(self, db: Session, chunk_size: int | None = None):
+        self.db = db
+        self.chunk_size = chunk_size or settings.IMPORT_CHUNK_SIZE
+        self.report = ImportReport(lines=0, questions=0, answers=0, failed=0, errors=[])
+        self.default_user_id: str | None = None
+        self.admin = False
+        self._explicit_ids = False
+
+    async def import_ndjson(self, body: AsyncIterator[bytes], default_user_id: str,
+                            admin: bool = False) -> ImportReport:
+        """Импортировать поток NDJSON; вернуть отчет с ошибками по строкам
+
+        Автор ответа - default_user_id. user_id из строк сохраняется, а явные
+        id и created_at принимаются только при admin: id сдвигает
+        последовательности таблиц, и одна строка с id у верхней границы
+        сломала бы все следующие вставки.
+        """
+        import_logger.info("Starting NDJSON import by user %s", default_user_id)
+        self.default_user_id = default_user_id
+        self.admin = admin
+        max_line = settings.IMPORT_MAX_LINE_BYTES
+        chunk: list[tuple[int, bytes]] = []
+        buffer = bytearray()
+        line_number = 0
+        # Строка длиннее max_line уже в отчете, ее байты до перевода строки отбрасываются
+        skipping = False
+
+        async for data in body:
+            # В остатке буфера перевода строки нет: ищем только в новых байтах
+            scan = len(buffer)
+            buffer += data
+            start = 0
+            while (end := buffer.find(b"\n", scan)) >= 0:
+                line_number += 1
+                if skipping:
+                    skipping = False
+                elif end - start > max_line:
+                    self._line_too_long(line_number, max_line)
+                else:
+                    line = bytes(buffer[start:end])
+                    if line.strip():
+                        chunk.append((line_number, line))
+                start = scan = end + 1
+            del buffer[:start]
+            if len(buffer) > max_line:
+                if not skipping:
+                    self._line_too_long(line_number + 1, max_line)
+                    skipping = True
+                buffer.clear()
+            if len(chunk) >= self.chunk_size:
+                await run_in_threadpool(self._import_chunk, chunk)
+                chunk = []
+
+        if buffer.strip() and not skipping:
+            chunk.append((line_number + 1, bytes(buffer)))
+        if chunk:
+            await run_in_threadpool(self._import_chunk, chunk)
+        if self._explicit_ids:
+            await run_in_threadpool(self._sync_sequences)
+
+        import_logger.info(
+            "NDJSON import finished: %s questions, %s answers, %s failed lines",
+            self.report.questions, self.report.answers, self.report.failed
+        )
+        return self.report
+
+    def _error(self, line: int, error: str) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < settings.IMPORT_MAX_ERRORS:
+            self.report.errors.append(ImportLineError(line=line, error=error))
+
+    def _line_too_long(self, line: int, max_line: int) -> None:
+        self.report.lines += 1
+        self._error(line, f"Line exceeds {max_line} bytes")
+
+    def _validate(self, chunk: list[tuple[int, bytes]]) -> list[tuple[int, object]]:
+        """Проверить строки чанка по одной
+
+        Склеенная в массив пачка не годится: две разорванные строки могут
+        дать одну валидную запись, а строка "{...},{...}" - две.
+        """
+        self.report.lines += len(chunk)
+        valid = []
+        for line, raw in chunk:
+            try:
+                item = import_line_adapter.validate_json(raw)
+            except ValidationError as exc:
+                error = exc.errors()[0]
+                location = ".".join(str(part) for part in error["loc"])
+                self._error(line, f"{location}: {error['msg']}" if location else error["msg"])
+                continue
+            restricted = [field for field in ADMIN_ONLY_FIELDS if getattr(item, field) is not None]
+            if restricted and not self.admin:
+                self._error(line, f"{restricted[0]}: Only administrators can set this field")
+                continue
+            valid.append((line, item))
+        return valid
+
+    def _row(self, item) -> dict:
+        row = item.model_dump(exclude={"type"}, exclude_none=True)
+        row.setdefault("created_at", datetime.now(UTC))
+        if "id" in row:
+            self._explicit_ids = True
+        if not isinstance(item, QuestionImport):
+            if self.admin:
+                row.setdefault("user_id", self.default_user_id)
+            else:
+                # Как и при создании ответа, автор - владелец токена
+                row["user_id"] = self.default_user_id
+        return row
+
+    def _import_chunk(self, chunk: list[tuple[int, bytes]]) -> None:
+        items = self._validate(chunk)
+        questions = [(line, self._row(item)) for line, item in items if isinstance(item, QuestionImport)]
+        answers = [(line, self._row(item)) for line, item in items if not isinstance(item, QuestionImport)]
+        try:
+            self._write(Question.__table__, [row for _, row in questions])
+            self._write(Answer.__table__, [row for _, row in answers])
+            self.db.commit()
+            self.report.questions += len(questions)
+            self.report.answers += len(answers)
+        except IntegrityError:
+            # Чанк откатывается целиком, затем строки пишутся по одной ради отчета
+            self.db.rollback()
+            self.report.questions += self._write_each(Question.__table__, questions)
+            self.report.answers += self._write_each(Answer.__table__, answers)
+        # Ответы могли добавиться к любым вопросам
+        question_response_cache.clear()
+
+    def _write(self, table, rows: list[dict]) -> None:
+        """Записать строки, сгруппировав их по набору колонок"""
+        groups: dict[tuple, list[dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        for columns, group in groups.items():
+            if self.db.get_bind().dialect.name == "postgresql":
+                self._copy(table, columns, group)
+            else:
+                self.db.execute(insert(table), group)
+
+    def _copy(self, table, columns: tuple, rows: list[dict]) -> None:
+        """COPY FROM STDIN через соединение psycopg2 текущей транзакции"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([row[column] for column in columns])
+        buffer.seek(0)
+        statement = f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        dbapi = self.db.get_bind().dialect.dbapi
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(statement, buffer)
+        except dbapi.IntegrityError as exc:
+            # Курсор psycopg2 вне SQLAlchemy - приводим ошибку к общему типу
+            raise IntegrityError(statement, None, exc) from exc
+        finally:
+            cursor.close()
+
+    def _write_each(self, table, rows: list[tuple[int, dict]]) -> int:
+        written = 0
+        for line, row in rows:
+            try:
+                self.db.execute(insert(table), [row])
+                self.db.commit()
+                written += 1
+            except IntegrityError as exc:
+                self.db.rollback()
+                self._error(line, str(exc.orig))
+        return written
+
+    def _sync_sequences(self) -> None:
+        """После вставки явных id сдвинуть последовательности PostgreSQL"""
+        if self.db.get_bind().dialect.name != "postgresql":
+            return
+        for table in ("questions", "answers"):
+            self.db.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+            ))
+        self.db.commit()
@@ -1,96 +1,164 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models.question import QuestionCreate, QuestionUpdate
+from sqlalchemy import Row, func, select, insert, update, delete
+from app.models.question import QuestionCreate, QuestionResponse, QuestionUpdate, QuestionWithAnswersResponse
 from app.alembic.models.question import Question
 from app.alembic.models.answer import Answer
 from fastapi import HTTPException, status
+from app.core.config import settings
 from app.core.logging import question_logger
+from app.core.response_cache import CachedBody, ResponseCache
+from app.core.serialization import render_item
+from app.core.tracing import trace_service
 
+# Тела ответов /questions/{id}/with-answers по id вопроса
+question_response_cache = ResponseCache(
+    max_size=settings.RESPONSE_CACHE_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    min_size=settings.RESPONSE_COMPRESSION_MIN_SIZE,
+    gzip_level=settings.RESPONSE_GZIP_LEVEL,
+    zstd_level=settings.RESPONSE_ZSTD_LEVEL
+)
 
+
+def invalidate_question_cache(*question_ids: int) -> None:
+    """Удалить тела ответов вопросов из кеша"""
+    question_response_cache.invalidate(*question_ids)
+
+
+@trace_service
 class QuestionService:
     def __init__(self, db: Session):
         self.db = db
 
     def create_question(self, question_data: QuestionCreate) -> Question:
         """Создать новый вопрос"""
-        question_logger.info(f"Creating question: {question_data.text[:50]}...")
+        question_logger.info("Creating question: %s...", question_data.text[:50])
         
-        question = Question(text=question_data.text)
-        self.db.add(question)
+        # INSERT ... RETURNING вместо add/commit/refresh
+        row = self.db.execute(
+            insert(Question.__table__).values(text=question_data.text).returning(*Question.__table__.c)
+        ).one()
         self.db.commit()
-        self.db.refresh(question)
+        question = Question(**row._mapping)
         
-        question_logger.info(f"Question created successfully with ID: {question.id}")
+        question_logger.info("Question created successfully with ID: %s", question.id)
         return question
 
+    def create_questions_bulk(self, questions_data: list[QuestionCreate]) -> list[int]:
+        """Создать вопросы одним INSERT ... RETURNING в одной транзакции"""
+        question_logger.info("Bulk creating %s questions", len(questions_data))
+        
+        if len(questions_data) > settings.BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Too many items, maximum is {settings.BULK_MAX_ITEMS}"
+            )
+        if not questions_data:
+            return []
+        
+        rows = [{"text": question_data.text} for question_data in questions_data]
+        ids = self.db.scalars(
+            insert(Question).returning(Question.id, sort_by_parameter_order=True),
+            rows
+        ).all()
+        self.db.commit()
+        
+        question_logger.info("Bulk created %s questions", len(ids))
+        return list(ids)
+
     def get_question_by_id(self, question_id: int) -> Question | None:
         """Получить вопрос по ID"""
-        question_logger.debug(f"Getting question by ID: {question_id}")
+        question_logger.debug("Getting question by ID: %s", question_id)
         
         question = self.db.query(Question).filter(Question.id == question_id).first()
         if not question:
-            question_logger.warning(f"Question with ID {question_id} not found")
+            question_logger.warning("Question with ID %s not found", question_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Question not found"
             )
         return question
 
-    def get_all_questions(self) -> list[Question]:
-        """Получить все вопросы с количеством ответов"""
+    def get_all_questions(self, fields: tuple[str, ...] | None = None) -> list[Row]:
+        """Получить все вопросы с количеством ответов
+
+        Выбираются только колонки QuestionResponse (или fields): строки не попадают в identity map.
+        Без answers_count в fields запрос обходится без JOIN и GROUP BY.
+        """
         question_logger.debug("Getting all questions with answer counts")
         
-        questions = self.db.query(
-            Question,
-            func.count(Answer.id).label('answers_count')
-        ).outerjoin(Answer).group_by(Question.id).all()
-        
-        # Преобразуем результат в список вопросов с добавлением количества ответов
-        result = []
-        for question, answers_count in questions:
-            question.answers_count = answers_count
-            result.append(question)
+        fields = fields or tuple(QuestionResponse.model_fields)
+        query = select(*(Question.__table__.c[name] for name in fields if name != "answers_count"))
+        if "answers_count" in fields:
+            query = (
+                query.add_columns(func.count(Answer.id).label("answers_count"))
+                .select_from(Question)
+                .outerjoin(Answer)
+                .group_by(Question.id)
+            )
+        questions = self.db.execute(query).all()
         
-        question_logger.info(f"Retrieved {len(result)} questions")
-        return result
+        question_logger.info("Retrieved %s questions", len(questions))
+        return questions
 
     def update_question(self, question_id: int, question_data: QuestionUpdate) -> Question | None:
         """Обновить вопрос"""
-        question_logger.info(f"Updating question with ID: {question_id}")
-        
-        question = self.get_question_by_id(question_id)
+        question_logger.info("Updating question with ID: %s", question_id)
         
         update_data = question_data.model_dump(exclude_unset=True)
         # Исключаем None значения, чтобы не нарушить NOT NULL ограничения
         update_data = {k: v for k, v in update_data.items() if v is not None}
+        if not update_data:
+            return self.get_question_by_id(question_id)
         
-        for field, value in update_data.items():
-            setattr(question, field, value)
-        
+        row = self.db.execute(
+            update(Question.__table__)
+            .where(Question.id == question_id)
+            .values(**update_data)
+            .returning(*Question.__table__.c)
+        ).one_or_none()
+        if row is None:
+            self.db.rollback()
+            question_logger.warning("Question with ID %s not found", question_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Question not found"
+            )
         self.db.commit()
-        self.db.refresh(question)
+        invalidate_question_cache(question_id)
+        question = Question(**row._mapping)
         
-        question_logger.info(f"Question {question_id} updated successfully")
+        question_logger.info("Question %s updated successfully", question_id)
         return question
 
     def delete_question(self, question_id: int) -> bool:
         """Удалить вопрос (каскадно удалит все ответы)"""
-        question_logger.info(f"Deleting question with ID: {question_id}")
+        question_logger.info("Deleting question with ID: %s", question_id)
         
-        question = self.get_question_by_id(question_id)
-        self.db.delete(question)
+        # Ответы удаляет база через ON DELETE CASCADE, в сессию они не загружаются
+        deleted_id = self.db.scalar(
+            delete(Question.__table__).where(Question.id == question_id).returning(Question.id)
+        )
+        if deleted_id is None:
+            self.db.rollback()
+            question_logger.warning("Question with ID %s not found", question_id)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Question not found"
+            )
         self.db.commit()
+        invalidate_question_cache(question_id)
         
-        question_logger.info(f"Question {question_id} deleted successfully (with cascade)")
+        question_logger.info("Question %s deleted successfully (with cascade)", question_id)
         return True
 
     def get_question_with_answers(self, question_id: int) -> Question | None:
         """Получить вопрос с ответами"""
-        question_logger.debug(f"Getting question with answers by ID: {question_id}")
+        question_logger.debug("Getting question with answers by ID: %s", question_id)
         
         question = self.db.query(Question).filter(Question.id == question_id).first()
         if not question:
-            question_logger.warning(f"Question with ID {question_id} not found")
+            question_logger.warning("Question with ID %s not found", question_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Question not found"
@@ -98,5 +166,13 @@ class QuestionService:
         
         # Загружаем связанные ответы
         self.db.refresh(question)
-        question_logger.info(f"Retrieved question {question_id} with {len(question.answers)} answers")
+        question_logger.info("Retrieved question %s with %s answers", question_id, len(question.answers))
         return question
+
+    def get_question_with_answers_body(self, question_id: int) -> CachedBody:
+        """Тело ответа вопроса с ответами из кеша; при промахе - запрос, рендеринг и сжатие"""
+        entry = question_response_cache.get(question_id)
+        if entry is None:
+            question = self.get_question_with_answers(question_id)
+            entry = question_response_cache.set(question_id, render_item(QuestionWithAnswersResponse, question).body)
+        return entry
@@ -1,16 +1,79 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import Row, select, insert, delete, or_
 from sqlalchemy.exc import IntegrityError
 from app.models.user import UserCreate, UserUpdate
 from app.alembic.models.user import User
 from fastapi import HTTPException, status
+from app.core.bloom import BloomFilter
+from app.core.cache import SQLiteInvalidationLog, TTLCache
+from app.core.config import settings
 from app.core.logging import user_logger
+from app.core.tracing import trace_service
 
 # Настройка для хеширования паролей
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Известные email и username процесса; заполняется при старте приложения
+user_identity_filter = BloomFilter(settings.USER_FILTER_CAPACITY)
 
+# Кеш пользователей по ("id", id) и ("email", email); хранит снимки колонок, не ORM объекты
+user_cache = TTLCache(
+    max_size=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL,
+    negative_ttl=settings.USER_CACHE_NEGATIVE_TTL
+)
+_USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+# Инвалидации кеша пользователей между воркерами (None - видны только своему процессу)
+user_cache_invalidations = (
+    SQLiteInvalidationLog(settings.USER_CACHE_INVALIDATION_PATH, poll_interval=settings.USER_CACHE_INVALIDATION_INTERVAL)
+    if settings.USER_CACHE_INVALIDATION_PATH else None
+)
+
+
+def _cache_user(user: User) -> None:
+    """Сохранить снимок пользователя под ключами id и email"""
+    snapshot = {column: getattr(user, column) for column in _USER_COLUMNS}
+    user_cache.set(("id", user.id), snapshot)
+    user_cache.set(("email", user.email), snapshot)
+
+
+def invalidate_user_cache(user_id: int | None = None, *emails: str) -> None:
+    """Удалить пользователя из кеша"""
+    keys = [("email", email) for email in emails]
+    if user_id is not None:
+        keys.append(("id", user_id))
+    user_cache.delete(*keys)
+    if user_cache_invalidations is not None:
+        user_cache_invalidations.publish(*keys)
+
+
+def _apply_cache_invalidations() -> None:
+    """Удалить из кеша пользователей, измененных другими воркерами"""
+    if user_cache_invalidations is not None:
+        keys = user_cache_invalidations.poll()
+        if keys:
+            user_cache.delete(*keys)
+
+
+def load_user_identity_filter(db: Session) -> int:
+    """Загрузить email и username всех пользователей в Bloom-фильтр"""
+    user_identity_filter.clear()
+    count = 0
+    rows = db.execute(
+        select(User.email, User.username).execution_options(yield_per=10_000)
+    )
+    for email, username in rows:
+        user_identity_filter.add(email)
+        user_identity_filter.add(username)
+        count += 1
+    user_logger.info("Loaded %s users into identity filter", count)
+    return count
+
+
+@trace_service
 class UserService:
     def __init__(self, db: Session):
         self.db = db
@@ -23,76 +86,144 @@ class UserService:
         """Проверка пароля"""
         return pwd_context.verify(plain_password, hashed_password)
 
+    def _identity_taken(self, email: str | None, username: str | None, exclude_id: int | None = None) -> bool:
+        """Проверить, заняты ли email или username, без хеширования пароля"""
+        candidates = [value for value in (email, username) if value is not None]
+        # Отрицательный ответ фильтра точный - запрос к базе не нужен
+        if not any(value in user_identity_filter for value in candidates):
+            return False
+        
+        conditions = []
+        if email is not None:
+            conditions.append(User.email == email)
+        if username is not None:
+            conditions.append(User.username == username)
+        query = select(User.id).where(or_(*conditions))
+        if exclude_id is not None:
+            query = query.where(User.id != exclude_id)
+        return self.db.execute(query.limit(1)).first() is not None
+
     def create_user(self, user_data: UserCreate) -> User:
         """Создать нового пользователя"""
-        user_logger.info(f"Creating user with email: {user_data.email}")
+        user_logger.info("Creating user with email: %s", user_data.email)
+        
+        if self._identity_taken(user_data.email, user_data.username):
+            user_logger.warning("Failed to create user with email %s: duplicate email or username", user_data.email)
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="User with this email or username already exists"
+            )
         
         try:
             hashed_password = self._hash_password(user_data.password)
-            db_user = User(
-                username=user_data.username,
-                email=user_data.email,
-                hashed_password=hashed_password
-            )
-            self.db.add(db_user)
+            row = self.db.execute(
+                insert(User.__table__)
+                .values(
+                    username=user_data.username,
+                    email=user_data.email,
+                    hashed_password=hashed_password
+                )
+                .returning(*User.__table__.c)
+            ).one()
             self.db.commit()
-            self.db.refresh(db_user)
-            user_logger.info(f"User created successfully with ID: {db_user.id}")
+            db_user = User(**row._mapping)
+            user_identity_filter.add(db_user.email)
+            user_identity_filter.add(db_user.username)
+            # Сбрасываем отрицательные записи для нового id и email
+            invalidate_user_cache(db_user.id, db_user.email)
+            user_logger.info("User created successfully with ID: %s", db_user.id)
             return db_user
         except IntegrityError:
             self.db.rollback()
-            user_logger.warning(f"Failed to create user with email {user_data.email}: duplicate email or username")
+            user_logger.warning("Failed to create user with email %s: duplicate email or username", user_data.email)
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="User with this email or username already exists"
             )
 
+    def _cached_lookup(self, key: tuple, column, value, fresh: bool = False) -> User | None:
+        """Read-through поиск пользователя по уникальной колонке; fresh - читать из базы и обновить кеш"""
+        _apply_cache_invalidations()
+        snapshot = TTLCache.MISSING if fresh else user_cache.get(key)
+        if snapshot is None:
+            return None
+        if snapshot is not TTLCache.MISSING:
+            return User(**snapshot)
+        
+        user = self.db.query(User).filter(column == value).first()
+        if user:
+            _cache_user(user)
+        else:
+            user_cache.set(key, None)
+        return user
+
     def get_user_by_id(self, user_id: int) -> User | None:
         """Получить пользователя по ID"""
-        user_logger.debug(f"Getting user by ID: {user_id}")
-        user = self.db.query(User).filter(User.id == user_id).first()
+        user_logger.debug("Getting user by ID: %s", user_id)
+        user = self._cached_lookup(("id", user_id), User.id, user_id)
         if not user:
-            user_logger.warning(f"User with ID {user_id} not found")
+            user_logger.warning("User with ID %s not found", user_id)
         return user
 
-    def get_user_by_email(self, email: str) -> User | None:
-        """Получить пользователя по email"""
-        user_logger.debug(f"Getting user by email: {email}")
-        user = self.db.query(User).filter(User.email == email).first()
+    def get_user_by_email(self, email: str, fresh: bool = False) -> User | None:
+        """Получить пользователя по email
+
+        fresh=True читает из базы, не полагаясь на инвалидацию кеша между воркерами.
+        """
+        user_logger.debug("Getting user by email: %s", email)
+        user = self._cached_lookup(("email", email), User.email, email, fresh=fresh)
         if not user:
-            user_logger.warning(f"User with email {email} not found")
+            user_logger.warning("User with email %s not found", email)
         return user
 
-    def get_all_users(self) -> list[User]:
-        """Получить всех пользователей"""
+    def get_all_users(self) -> list[Row]:
+        """Получить всех пользователей
+
+        Выбираются только колонки UserResponse (без hashed_password) в строки без identity map.
+        """
         user_logger.debug("Getting all users")
-        return self.db.query(User).all()
+        return self.db.execute(
+            select(User.id, User.username, User.email, User.is_active, User.created_at, User.updated_at)
+        ).all()
 
     def update_user(self, user_id: int, user_data: UserUpdate) -> User | None:
         """Обновить пользователя"""
-        user_logger.info(f"Updating user with ID: {user_id}")
-        db_user = self.get_user_by_id(user_id)
+        user_logger.info("Updating user with ID: %s", user_id)
+        # Изменяем объект текущей сессии, а не снимок из кеша
+        db_user = self.db.query(User).filter(User.id == user_id).first()
         if not db_user:
-            user_logger.warning(f"User with ID {user_id} not found for update")
+            user_logger.warning("User with ID %s not found for update", user_id)
             return None
 
         update_data = user_data.model_dump(exclude_unset=True)
         
+        # Проверяем дубликаты до хеширования нового пароля
+        if self._identity_taken(update_data.get("email"), update_data.get("username"), exclude_id=user_id):
+            user_logger.error("Failed to update user %s: duplicate email or username", user_id)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Could not update user, possibly duplicate email or username"
+            )
+        
         # Если обновляется пароль, хешируем его
         if "password" in update_data:
             update_data["hashed_password"] = self._hash_password(update_data.pop("password"))
 
+        old_email = db_user.email
         for field, value in update_data.items():
             setattr(db_user, field, value)
 
         try:
             self.db.commit()
             self.db.refresh(db_user)
-            user_logger.info(f"User {user_id} updated successfully")
+            user_identity_filter.add(db_user.email)
+            user_identity_filter.add(db_user.username)
+            invalidate_user_cache(user_id, old_email, db_user.email)
+            user_logger.info("User %s updated successfully", user_id)
             return db_user
         except IntegrityError:
             self.db.rollback()
-            user_logger.error(f"Failed to update user {user_id} due to integrity error")
+            user_logger.error("Failed to update user %s due to integrity error", user_id)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Could not update user, possibly duplicate email or username"
@@ -100,26 +231,29 @@ class UserService:
 
     def delete_user(self, user_id: int) -> bool:
         """Удалить пользователя"""
-        user_logger.info(f"Deleting user with ID: {user_id}")
-        db_user = self.get_user_by_id(user_id)
-        if not db_user:
-            user_logger.warning(f"User with ID {user_id} not found for deletion")
+        user_logger.info("Deleting user with ID: %s", user_id)
+        email = self.db.scalar(delete(User.__table__).where(User.id == user_id).returning(User.email))
+        if email is None:
+            self.db.rollback()
+            user_logger.warning("User with ID %s not found for deletion", user_id)
             return False
 
-        self.db.delete(db_user)
         self.db.commit()
-        user_logger.info(f"User {user_id} deleted successfully")
+        invalidate_user_cache(user_id, email)
+        # Из Bloom-фильтра значения не удаляются: устаревшая запись стоит одного запроса к базе
+        user_logger.info("User %s deleted successfully", user_id)
         return True
 
     def authenticate_user(self, email: str, password: str) -> User | None:
         """Аутентификация пользователя"""
-        user_logger.debug(f"Authenticating user with email: {email}")
-        user = self.get_user_by_email(email)
+        user_logger.debug("Authenticating user with email: %s", email)
+        # Хеш пароля читаем из базы: кеш другого воркера может хранить старый пароль
+        user = self.db.query(User).filter(User.email == email).first()
         if not user:
-            user_logger.warning(f"Authentication failed: user with email {email} not found")
+            user_logger.warning("Authentication failed: user with email %s not found", email)
             return None
         if not self._verify_password(password, user.hashed_password):
-            user_logger.warning(f"Authentication failed: invalid password for user {email}")
+            user_logger.warning("Authentication failed: invalid password for user %s", email)
             return None
-        user_logger.info(f"User {email} authenticated successfully")
+        user_logger.info("User %s authenticated successfully", email)
         return user
@@ -2,10 +2,12 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
-from app.main import app
-from app.core.database import get_db
+from app.main import app, rate_limit_store
+from app.core.config import settings
+from app.core.database import get_db, enable_sqlite_foreign_keys
 from app.alembic.models import User, Question, Answer
-from app.services.user_service import UserService
+from app.services.user_service import UserService, user_cache
+from app.services.question_service import question_response_cache
 
 
 # Тестовая база данных в памяти
@@ -14,6 +16,7 @@ SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+enable_sqlite_foreign_keys(engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -33,6 +36,8 @@ app.dependency_overrides[get_db] = override_get_db
 @pytest.fixture(scope="session", autouse=True)
 def create_tables():
     """Создаем таблицы один раз для всех тестов"""
+    # Пересоздаем схему, чтобы тесты работали с актуальными ограничениями
+    Answer.metadata.drop_all(bind=engine)
     User.metadata.create_all(bind=engine)
     Question.metadata.create_all(bind=engine)
     Answer.metadata.create_all(bind=engine)
@@ -49,6 +54,13 @@ def client():
     yield TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """Сбрасывает состояние rate limiter между тестами"""
+    rate_limit_store.clear()
+    yield
+
+
 @pytest.fixture(autouse=True)
 def clean_db():
     """Автоматически очищает базу данных перед каждым тестом"""
@@ -60,6 +72,9 @@ def clean_db():
             conn.execute(text("DELETE FROM answers"))
             conn.execute(text("DELETE FROM questions"))
             conn.commit()
+        # Таблицы очищаются в обход сервисов, поэтому сбрасываем кеши вручную
+        user_cache.clear()
+        question_response_cache.clear()
     except Exception:
         # Игнорируем ошибки, если таблица не существует
         pass
@@ -99,3 +114,15 @@ def test_user_data2():
         "email": "test2@example.com",
         "password": "testpassword456"
     }
+
+
+@pytest.fixture
+def admin_headers(client: TestClient, test_user_data: dict, monkeypatch):
+    """Заголовки авторизации пользователя из ADMIN_EMAILS"""
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", [test_user_data["email"]])
+    client.post("/api/v1/users/register", json=test_user_data)
+    login_response = client.post("/api/v1/users/login", json={
+        "email": test_user_data["email"],
+        "password": test_user_data["password"]
+    })
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
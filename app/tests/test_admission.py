@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+from app.core.admission import HIGH, NORMAL, AdmissionController, AdmissionMiddleware, PoolWaitMonitor
+from app.main import app
+
+
+class TestAdmission:
+    """Тесты admission control и сброса нагрузки"""
+
+    def test_reserved_slots_and_priority_handoff(self):
+        """Резерв доступен только приоритетным, освободившийся слот получает приоритетный"""
+        async def scenario():
+            controller = AdmissionController(max_concurrency=2, reserved_slots=1, max_queue=10, queue_timeout=1)
+            assert await controller.acquire(NORMAL) is None
+            assert await controller.acquire(HIGH) is None
+            normal = asyncio.create_task(controller.acquire(NORMAL))
+            high = asyncio.create_task(controller.acquire(HIGH))
+            await asyncio.sleep(0)
+            assert controller.queued == 2
+
+            controller.release()
+            assert await asyncio.wait_for(high, 1) is None
+            assert not normal.done()
+            controller.release()
+            controller.release()
+            assert await normal is None
+            return controller.in_flight
+
+        assert asyncio.run(scenario()) == 1
+
+    def test_shed_on_full_queue_and_timeout(self):
+        """Полная очередь отказывает сразу, ожидание дольше queue_timeout - по таймауту"""
+        async def scenario():
+            controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+            await controller.acquire(NORMAL)
+            waiting = asyncio.create_task(controller.acquire(NORMAL))
+            await asyncio.sleep(0)
+            assert await controller.acquire(NORMAL) == "queue_full"
+            assert await waiting == "timeout"
+            return controller.shed, controller.queued
+
+        shed, queued = asyncio.run(scenario())
+        assert shed == {"queue_full": 1, "timeout": 1, "pool_wait": 0}
+        assert queued == 0
+
+    def test_pool_wait_sheds_normal_requests(self):
+        """Долгое ожидание соединения из пула отклоняет обычные запросы, приоритетные проходят"""
+        engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=1, max_overflow=0)
+        monitor = PoolWaitMonitor(alpha=1.0)
+        monitor.instrument(engine)
+        held = engine.connect()
+        waiter = threading.Thread(target=lambda: engine.connect().close())
+        waiter.start()
+        time.sleep(0.2)
+        assert monitor.waiting == 1
+        held.close()
+        waiter.join()
+        controller = AdmissionController(max_concurrency=4, max_queue=4, pool_monitor=monitor, max_pool_wait_ms=100)
+
+        assert monitor.wait_ms >= 150
+        assert asyncio.run(controller.acquire(NORMAL)) == "pool_wait"
+        assert asyncio.run(controller.acquire(HIGH)) is None
+
+    def test_pool_wait_is_measured_after_dispose(self):
+        """Новый пул после engine.dispose (воркер после fork) тоже замеряется"""
+        engine = create_engine("sqlite://", poolclass=QueuePool)
+        monitor = PoolWaitMonitor()
+        monitor.instrument(engine)
+        engine.dispose(close=False)
+
+        engine.connect().close()
+        assert monitor._updated > 0
+        assert monitor.waiting == 0
+
+    def test_preloaded_worker_keeps_pool_wait_monitor(self, monkeypatch):
+        """reset_after_fork сохраняет замер ожидания пула у движка приложения"""
+        from app.core.database import engine
+        from app.serve import reset_after_fork
+
+        monitor = PoolWaitMonitor()
+        monkeypatch.setattr(engine, "pool", engine.pool)
+        monitor.instrument(engine)
+        try:
+            reset_after_fork()
+            engine.connect().close()
+        finally:
+            event.remove(engine, "engine_disposed", monitor._on_dispose)
+        assert monitor._updated > 0
+
+    def test_middleware_returns_503_with_retry_after(self):
+        """Запрос сверх лимита получает 503 и Retry-After, запись проходит по резерву"""
+        controller = AdmissionController(max_concurrency=2, reserved_slots=1, max_queue=0)
+        controller.in_flight = 1
+        client = TestClient(AdmissionMiddleware(app, controller=controller, prefix="/api/v1", retry_after=3))
+
+        shed = client.get("/api/v1/questions/")
+        write = client.post("/api/v1/questions/", json={"text": "Question"})
+
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == "3"
+        assert write.status_code == 201
+        assert client.get("/").status_code == 200
+        assert controller.in_flight == 1
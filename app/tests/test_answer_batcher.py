@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from fastapi import HTTPException, status
+from fastapi.testclient import TestClient
+from app.services.answer_batcher import AnswerBatcher
+from app.services.question_service import QuestionService
+from app.models.answer import AnswerCreate
+from app.models.question import QuestionCreate
+from app.tests.conftest import TestingSessionLocal
+
+
+class TestAnswerBatcher:
+    """Тесты group commit для ответов"""
+
+    def test_concurrent_answers_share_one_commit(self, db_session):
+        """Параллельные ответы записываются одной пачкой"""
+        question = QuestionService(db_session).create_question(QuestionCreate(text="Q"))
+        batcher = AnswerBatcher(TestingSessionLocal, max_batch=100, max_delay_ms=50)
+
+        async def submit_all():
+            answers = await asyncio.gather(*[
+                batcher.submit(AnswerCreate(question_id=question.id, text=f"Answer {i}"), "user1")
+                for i in range(20)
+            ])
+            await batcher.stop()
+            return answers
+
+        answers = asyncio.run(submit_all())
+
+        assert [answer.text for answer in answers] == [f"Answer {i}" for i in range(20)]
+        assert len({answer.id for answer in answers}) == 20
+        assert batcher.batches == 1
+        assert batcher.rows == 20
+
+    def test_batch_is_flushed_at_max_batch(self, db_session):
+        """Пачка записывается, как только набрано max_batch строк"""
+        question = QuestionService(db_session).create_question(QuestionCreate(text="Q"))
+        batcher = AnswerBatcher(TestingSessionLocal, max_batch=5, max_delay_ms=10_000)
+
+        async def submit_all():
+            answers = await asyncio.wait_for(asyncio.gather(*[
+                batcher.submit(AnswerCreate(question_id=question.id, text="a"), "user1")
+                for _ in range(10)
+            ]), timeout=5)
+            await batcher.stop()
+            return answers
+
+        assert len(asyncio.run(submit_all())) == 10
+        assert batcher.batches == 2
+
+    def test_missing_question_fails_only_its_request(self, db_session):
+        """Ответ к несуществующему вопросу не мешает остальным в пачке"""
+        question = QuestionService(db_session).create_question(QuestionCreate(text="Q"))
+        batcher = AnswerBatcher(TestingSessionLocal, max_delay_ms=20)
+
+        async def submit_all():
+            results = await asyncio.gather(
+                batcher.submit(AnswerCreate(question_id=question.id, text="ok"), "user1"),
+                batcher.submit(AnswerCreate(question_id=999, text="missing"), "user1"),
+                return_exceptions=True
+            )
+            await batcher.stop()
+            return results
+
+        ok, missing = asyncio.run(submit_all())
+
+        assert ok.text == "ok"
+        assert isinstance(missing, HTTPException)
+        assert missing.status_code == 404
+
+    def test_full_queue_rejects_with_503(self, db_session):
+        """При переполнении очереди запрос отклоняется сразу"""
+        question = QuestionService(db_session).create_question(QuestionCreate(text="Q"))
+        batcher = AnswerBatcher(TestingSessionLocal, max_delay_ms=20, max_queue=1)
+
+        async def submit_all():
+            results = await asyncio.gather(*[
+                batcher.submit(AnswerCreate(question_id=question.id, text="a"), "user1")
+                for _ in range(3)
+            ], return_exceptions=True)
+            await batcher.stop()
+            return results
+
+        results = asyncio.run(submit_all())
+        rejected = [result for result in results if isinstance(result, HTTPException)]
+
+        assert rejected
+        assert all(result.status_code == 503 for result in rejected)
+        assert rejected[0].headers["Retry-After"] == "1"
+
+    def test_endpoint_uses_batcher_when_enabled(self, client: TestClient, test_user_data: dict, monkeypatch):
+        """POST /answers/ использует group commit, если он включен"""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "ANSWER_GROUP_COMMIT_ENABLED", True)
+
+        client.post("/api/v1/users/register", json=test_user_data)
+        login_response = client.post("/api/v1/users/login", json={
+            "email": test_user_data["email"],
+            "password": test_user_data["password"]
+        })
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+        question_id = client.post("/api/v1/questions/", json={"text": "Q"}).json()["id"]
+
+        response = client.post("/api/v1/answers/", json={"question_id": question_id, "text": "Batched"}, headers=headers)
+        missing = client.post("/api/v1/answers/", json={"question_id": 999, "text": "Batched"}, headers=headers)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["text"] == "Batched"
+        assert response.json()["user_id"] == test_user_data["email"]
+        assert missing.status_code == status.HTTP_404_NOT_FOUND
@@ -2,7 +2,7 @@ import pytest
 from fastapi import HTTPException
 from app.services.answer_service import AnswerService
 from app.services.question_service import QuestionService
-from app.models.answer import AnswerCreate
+from app.models.answer import AnswerCreate, AnswerUpdate
 from app.models.question import QuestionCreate
 
 
@@ -177,3 +177,49 @@ class TestAnswerService:
         assert len(all_answers) == 2
         assert all_answers[0].text == "Answer 1"
         assert all_answers[1].text == "Answer 2"
+
+    def test_delete_answer_not_found(self, db_session):
+        """Тест удаления несуществующего ответа"""
+        answer_service = AnswerService(db_session)
+        
+        with pytest.raises(HTTPException) as exc_info:
+            answer_service.delete_answer(999, "user123")
+        
+        assert exc_info.value.status_code == 404
+
+    def test_update_answer_unauthorized(self, db_session):
+        """Тест обновления чужого ответа"""
+        question = QuestionService(db_session).create_question(QuestionCreate(text="What is FastAPI?"))
+        answer_service = AnswerService(db_session)
+        answer = answer_service.create_answer(AnswerCreate(question_id=question.id, text="Answer"), "user123")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            answer_service.update_answer(answer.id, AnswerUpdate(text="Changed"), "different_user")
+        
+        assert exc_info.value.status_code == 403
+        assert answer_service.get_answer_by_id(answer.id).text == "Answer"
+
+    def test_write_path_statement_count(self, db_session):
+        """Создание и удаление ответа выполняют по одному SQL запросу"""
+        from sqlalchemy import event
+        from app.tests.conftest import engine
+        
+        question = QuestionService(db_session).create_question(QuestionCreate(text="What is FastAPI?"))
+        answer_service = AnswerService(db_session)
+        statements = []
+        
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(engine, "before_cursor_execute", count_statement)
+        try:
+            answer = answer_service.create_answer(AnswerCreate(question_id=question.id, text="Answer"), "user123")
+            assert answer.id is not None
+            assert answer.created_at is not None
+            answer_service.delete_answer(answer.id, "user123")
+        finally:
+            event.remove(engine, "before_cursor_execute", count_statement)
+        
+        assert len(statements) == 2
+        assert statements[0].startswith("INSERT") and "RETURNING" in statements[0]
+        assert statements[1].startswith("DELETE") and "RETURNING" in statements[1]
@@ -139,6 +139,24 @@ class TestAnswerAPI:
         assert data[0]["text"] == "Answer 1"
         assert data[1]["text"] == "Answer 2"
 
+    def test_get_answers_by_question_sparse_fields(self, client: TestClient, test_user_data: dict):
+        """Параметр fields для ответов на вопрос"""
+        client.post("/api/v1/users/register", json=test_user_data)
+        login_response = client.post("/api/v1/users/login", json={
+            "email": test_user_data["email"],
+            "password": test_user_data["password"]
+        })
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+        question_id = client.post("/api/v1/questions/", json={"text": "What is FastAPI?"}).json()["id"]
+        answer_id = client.post("/api/v1/answers/", json={"question_id": question_id, "text": "Answer 1"}, headers=headers).json()["id"]
+        
+        response = client.get(f"/api/v1/answers/question/{question_id}", params={"fields": "id,text"})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [{"text": "Answer 1", "id": answer_id}]
+        invalid = client.get(f"/api/v1/answers/question/{question_id}", params={"fields": ""})
+        assert invalid.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
     def test_get_answers_by_question_not_found(self, client: TestClient):
         """Тест получения ответов несуществующего вопроса"""
         response = client.get("/api/v1/answers/question/999")
@@ -273,3 +291,46 @@ class TestAnswerAPI:
         # Проверяем, что все ответы созданы
         answers_response = client.get(f"/api/v1/answers/question/{question_id}")
         assert len(answers_response.json()) == 3
+
+    def test_create_answers_bulk(self, client: TestClient, test_user_data: dict):
+        """Тест массового создания ответов"""
+        client.post("/api/v1/users/register", json=test_user_data)
+        login_response = client.post("/api/v1/users/login", json={
+            "email": test_user_data["email"],
+            "password": test_user_data["password"]
+        })
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+        question_ids = client.post("/api/v1/questions/bulk", json=[{"text": "Q1"}, {"text": "Q2"}]).json()["ids"]
+        
+        answers_data = [{"question_id": question_ids[i % 2], "text": f"Answer {i}"} for i in range(20)]
+        response = client.post("/api/v1/answers/bulk", json=answers_data, headers=headers)
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["count"] == 20
+        answers = client.get(f"/api/v1/answers/question/{question_ids[0]}").json()
+        assert len(answers) == 10
+        assert all(answer["user_id"] == test_user_data["email"] for answer in answers)
+
+    def test_create_answers_bulk_question_not_found(self, client: TestClient, test_user_data: dict):
+        """Тест массового создания ответов к несуществующему вопросу"""
+        client.post("/api/v1/users/register", json=test_user_data)
+        login_response = client.post("/api/v1/users/login", json={
+            "email": test_user_data["email"],
+            "password": test_user_data["password"]
+        })
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+        question_id = client.post("/api/v1/questions/", json={"text": "Q"}).json()["id"]
+        
+        answers_data = [{"question_id": question_id, "text": "ok"}, {"question_id": 999, "text": "missing"}]
+        response = client.post("/api/v1/answers/bulk", json=answers_data, headers=headers)
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert "999" in response.json()["detail"]
+        # Ни один ответ не должен быть создан
+        assert client.get("/api/v1/answers/").json() == []
+
+    def test_create_answers_bulk_without_auth(self, client: TestClient):
+        """Тест массового создания ответов без авторизации"""
+        response = client.post("/api/v1/answers/bulk", json=[{"question_id": 1, "text": "a"}])
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,55 @@
+from collections import Counter
+from sqlalchemy import create_engine, func, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+from app.alembic.models import Answer, Question, User
+from app.cli.generate_data import generate
+from app.core.database import enable_sqlite_foreign_keys
+from app.services.user_service import pwd_context
+
+
+class TestGenerateData:
+    """Тесты генератора синтетических данных"""
+
+    def test_generate_counts_skew_and_passwords(self, tmp_path):
+        """Строки вставлены, ответы смещены к популярным вопросам, пароль проверяется"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'generated.db'}")
+        enable_sqlite_foreign_keys(engine)
+        reports = []
+
+        stats = generate(engine, 50, 500, 5000, chunk_size=1000, password="secret1", progress=reports.append)
+
+        assert stats.rows == {"users": 50, "questions": 500, "answers": 5000}
+        assert {index["name"] for index in inspect(engine).get_indexes("answers")} >= {"ix_answers_question_id"}
+        assert len(reports) == 1 + 1 + 5
+        with Session(engine) as session:
+            counts = Counter(session.scalars(select(Answer.question_id)))
+            assert sum(count for _, count in counts.most_common(50)) > 2500
+            user = session.scalars(select(User).limit(1)).one()
+            assert pwd_context.verify("secret1", user.hashed_password)
+            question = session.get(Question, 1)
+            assert question.created_at is not None and 10 <= len(question.text) <= 1000
+            assert all(answer.created_at >= answer.question.created_at for answer in question.answers)
+
+    def test_generate_continues_existing_ids(self, tmp_path):
+        """Повторный запуск дописывает строки после существующих id"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'generated.db'}")
+
+        generate(engine, 10, 20, 30, prefix="first")
+        generate(engine, 10, 20, 30, prefix="second")
+
+        with Session(engine) as session:
+            assert session.scalar(select(func.count()).select_from(User)) == 20
+            assert session.scalar(select(func.max(Question.id))) == 40
+            assert session.scalar(select(func.count()).select_from(Answer)) == 60
+
+    def test_pooled_connection_keeps_sqlite_settings(self, tmp_path):
+        """Соединение из пула движка после генерации снова проверяет внешние ключи"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'generated.db'}", poolclass=QueuePool, pool_size=1)
+        enable_sqlite_foreign_keys(engine)
+
+        generate(engine, 5, 5, 5)
+
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 2
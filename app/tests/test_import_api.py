@@ -0,0 +1,160 @@
+import json
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def auth_headers(client: TestClient, test_user_data: dict):
+    """Заголовки авторизации тестового пользователя"""
+    client.post("/api/v1/users/register", json=test_user_data)
+    login_response = client.post("/api/v1/users/login", json={
+        "email": test_user_data["email"],
+        "password": test_user_data["password"]
+    })
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+
+def ndjson(*items) -> bytes:
+    return b"\n".join(item if isinstance(item, bytes) else json.dumps(item).encode() for item in items) + b"\n"
+
+
+class TestNDJSONImport:
+    """Тесты потокового импорта NDJSON"""
+
+    def test_import_questions_and_answers(self, client: TestClient, admin_headers: dict, test_user_data: dict):
+        """Вопросы и ответы импортируются, id вопросов и авторы из строк администратора сохраняются"""
+        body = ndjson(
+            {"type": "question", "id": 100, "text": "Historical question", "created_at": "2020-01-01T00:00:00"},
+            {"type": "answer", "question_id": 100, "text": "Historical answer", "user_id": "old@example.com"},
+            {"type": "answer", "question_id": 100, "text": "Answer without author"},
+        )
+        response = client.post("/api/v1/import/ndjson", content=body, headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        report = response.json()
+        assert report == {"lines": 3, "questions": 1, "answers": 2, "failed": 0, "errors": []}
+        question = client.get("/api/v1/questions/100/with-answers").json()
+        assert question["created_at"].startswith("2020-01-01")
+        assert [answer["user_id"] for answer in question["answers"]] == ["old@example.com", test_user_data["email"]]
+
+    def test_foreign_user_id_is_overwritten(self, client: TestClient, auth_headers: dict, test_user_data: dict):
+        """Обычный пользователь не может импортировать ответы от чужого имени"""
+        question_id = client.post("/api/v1/questions/", json={"text": "Question"}).json()["id"]
+        body = ndjson(
+            {"type": "answer", "question_id": question_id, "text": "Forged answer", "user_id": "victim@example.com"},
+        )
+        response = client.post("/api/v1/import/ndjson", content=body, headers=auth_headers)
+
+        assert response.json()["answers"] == 1
+        answers = client.get(f"/api/v1/questions/{question_id}/with-answers").json()["answers"]
+        assert [answer["user_id"] for answer in answers] == [test_user_data["email"]]
+
+    def test_explicit_ids_and_dates_require_admin(self, client: TestClient, auth_headers: dict):
+        """Обычный пользователь не задает id и created_at: строки отклоняются"""
+        body = ndjson(
+            {"type": "question", "id": 2147483647, "text": "Sequence exhaustion"},
+            {"type": "question", "text": "Backdated", "created_at": "2000-01-01T00:00:00"},
+            {"type": "question", "text": "Plain"},
+        )
+        response = client.post("/api/v1/import/ndjson", content=body, headers=auth_headers)
+
+        report = response.json()
+        assert report["questions"] == 1
+        assert [(error["line"], error["error"]) for error in report["errors"]] == [
+            (1, "id: Only administrators can set this field"),
+            (2, "created_at: Only administrators can set this field"),
+        ]
+        assert client.post("/api/v1/questions/", json={"text": "Next"}).status_code == status.HTTP_201_CREATED
+
+    def test_import_reports_errors_per_line(self, client: TestClient, auth_headers: dict):
+        """Невалидные строки и нарушения ключей попадают в отчет с номерами строк"""
+        question_id = client.post("/api/v1/questions/", json={"text": "Existing"}).json()["id"]
+        body = ndjson(
+            {"type": "question", "text": "Valid"},
+            b"not json",
+            {"type": "comment", "text": "unknown type"},
+            {"type": "answer", "question_id": 999, "text": "missing question"},
+            {"type": "answer", "question_id": question_id, "text": "valid answer"},
+        )
+        response = client.post("/api/v1/import/ndjson", content=body, headers=auth_headers)
+
+        report = response.json()
+        assert report["lines"] == 5
+        assert report["questions"] == 1
+        assert report["answers"] == 1
+        assert report["failed"] == 3
+        assert [error["line"] for error in report["errors"]] == [2, 3, 4]
+
+    def test_each_line_is_validated_separately(self, client: TestClient, auth_headers: dict):
+        """Разорванная запись и две записи в одной строке - ошибки своих строк"""
+        body = ndjson(
+            b'{"type": "question", "text": "a',
+            b'b"}',
+            b'{"type": "question", "text": "c"},{"type": "question", "text": "d"}',
+            {"type": "question", "text": "Valid"},
+        )
+        response = client.post("/api/v1/import/ndjson", content=body, headers=auth_headers)
+
+        report = response.json()
+        assert report["questions"] == 1
+        assert [error["line"] for error in report["errors"]] == [1, 2, 3]
+
+    def test_import_in_chunks(self, client: TestClient, auth_headers: dict, monkeypatch):
+        """Большой поток пишется несколькими чанками"""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 10)
+
+        lines = ndjson(*[{"type": "question", "text": f"Question {i}"} for i in range(25)])
+        parts = [lines[i:i + 100] for i in range(0, len(lines), 100)]
+        response = client.post("/api/v1/import/ndjson", content=iter(parts), headers=auth_headers)
+
+        assert response.json()["questions"] == 25
+        assert len(client.get("/api/v1/questions/").json()) == 25
+
+    def test_import_requires_auth(self, client: TestClient):
+        """Импорт доступен только авторизованным пользователям"""
+        response = client.post("/api/v1/import/ndjson", content=b"")
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestImportService:
+    """Тесты разбора потока"""
+
+    def test_lines_split_across_body_chunks(self, db_session):
+        """Строки, разорванные между частями тела, собираются корректно"""
+        import asyncio
+        from app.services.import_service import ImportService
+
+        async def body():
+            yield b'{"type": "question", "te'
+            yield b'xt": "First"}\n{"type": "question", '
+            yield b'"text": "Second"}'
+
+        report = asyncio.run(ImportService(db_session, chunk_size=1).import_ndjson(body(), "user1"))
+
+        assert report.lines == 2
+        assert report.questions == 2
+
+    def test_oversized_line_is_skipped(self, db_session, monkeypatch):
+        """Строка длиннее лимита не накапливается в памяти и попадает в отчет, следующие импортируются"""
+        import asyncio
+        from app.core.config import settings
+        from app.services.import_service import ImportService
+        monkeypatch.setattr(settings, "IMPORT_MAX_LINE_BYTES", 100)
+
+        async def body():
+            yield b'{"type": "question", "text": "First"}\n{"type": "question", "text": "'
+            for _ in range(10):
+                yield b"x" * 50
+            yield b'"}\n{"type": "question", "text": "' + b"y" * 200 + b'"}\n'
+            yield b'{"type": "question", "text": "Last"}'
+
+        report = asyncio.run(ImportService(db_session).import_ndjson(body(), "user1"))
+
+        assert report.lines == 4
+        assert report.questions == 2
+        assert [(error.line, error.error) for error in report.errors] == [
+            (2, "Line exceeds 100 bytes"), (3, "Line exceeds 100 bytes")
+        ]
@@ -0,0 +1,61 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+from app.cli.import_users import import_users, read_rows
+from app.services.user_service import UserService, pwd_context
+from app.models.user import UserCreate
+from app.tests.conftest import TestingSessionLocal
+
+
+class TestImportUsers:
+    """Тесты массового импорта пользователей"""
+
+    def test_read_rows_csv_and_jsonl(self, tmp_path):
+        """Чтение CSV и JSONL"""
+        csv_path = tmp_path / "users.csv"
+        csv_path.write_text("username,email,password\nalice,alice@example.com,secret1\n")
+        jsonl_path = tmp_path / "users.jsonl"
+        jsonl_path.write_text(json.dumps({"username": "bob", "email": "bob@example.com", "password": "secret2"}) + "\n\n")
+
+        assert list(read_rows(str(csv_path))) == [
+            {"username": "alice", "email": "alice@example.com", "password": "secret1"}
+        ]
+        assert list(read_rows(str(jsonl_path))) == [
+            {"username": "bob", "email": "bob@example.com", "password": "secret2"}
+        ]
+
+    def test_malformed_jsonl_line_is_counted_as_invalid(self, tmp_path, user_service, caplog):
+        """Строка с невалидным JSON не прерывает импорт и считается невалидной"""
+        jsonl_path = tmp_path / "users.jsonl"
+        jsonl_path.write_text(
+            json.dumps({"username": "alice", "email": "alice@example.com", "password": "secret1"}) + "\n"
+            + '{"username": "broken", "email"\n'
+            + json.dumps({"username": "bob", "email": "bob@example.com", "password": "secret2"}) + "\n"
+        )
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            stats = import_users(read_rows(str(jsonl_path)), TestingSessionLocal, executor, batch_size=10)
+
+        assert (stats.processed, stats.created, stats.invalid) == (3, 2, 1)
+        assert "Skipping line 2" in caplog.text
+        assert user_service.get_user_by_email("bob@example.com") is not None
+
+    def test_import_skips_duplicates_and_invalid_rows(self, user_service, test_user_data):
+        """Дубликаты и невалидные строки пропускаются, остальные создаются"""
+        user_service.create_user(UserCreate(**test_user_data))
+        rows = [
+            {"username": "alice", "email": "alice@example.com", "password": "secret1"},
+            {"username": "alice", "email": "alice2@example.com", "password": "secret1"},
+            {"username": "other", "email": test_user_data["email"], "password": "secret1"},
+            {"username": "broken", "email": "not-an-email", "password": "secret1"},
+            {"username": "bob", "email": "bob@example.com", "password": "secret2"},
+        ]
+        reports = []
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            stats = import_users(rows, TestingSessionLocal, executor, batch_size=3, progress=reports.append)
+
+        assert (stats.processed, stats.created, stats.duplicates, stats.invalid) == (5, 2, 2, 1)
+        assert len(reports) == 2
+        alice = user_service.get_user_by_email("alice@example.com")
+        assert pwd_context.verify("secret1", alice.hashed_password)
+        assert user_service.authenticate_user("bob@example.com", "secret2") is not None
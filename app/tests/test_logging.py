@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+import queue
+from app.core import logging as app_logging
+from app.core.config import settings
+from app.core.logging import DroppingQueueHandler, JsonFormatter, SamplingFilter, setup_logging, stop_logging
+
+
+def _record(level: int = logging.INFO, msg: str = "Retrieved %s answers", args=(3,)) -> logging.LogRecord:
+    return logging.LogRecord("answer", level, __file__, 10, msg, args, None, func="get_answers")
+
+
+class TestLoggingPipeline:
+    """Тесты неблокирующего логирования"""
+
+    def test_json_formatter(self):
+        """JSON формат содержит уровень, логгер и отформатированное сообщение"""
+        data = json.loads(JsonFormatter().format(_record()))
+
+        assert data["level"] == "INFO"
+        assert data["logger"] == "answer"
+        assert data["message"] == "Retrieved 3 answers"
+        assert data["location"] == "get_answers:10"
+
+    def test_sampling_keeps_warnings(self):
+        """Сэмплирование отбрасывает INFO, но не WARNING"""
+        sampling = SamplingFilter(0.0)
+
+        assert not sampling.filter(_record(logging.INFO))
+        assert sampling.filter(_record(logging.WARNING))
+        assert SamplingFilter(1.0).filter(_record(logging.INFO))
+
+    def test_formatting_deferred_for_primitive_args(self):
+        """Простые аргументы форматируются в потоке слушателя, объекты - сразу"""
+        handler = DroppingQueueHandler(queue.Queue())
+
+        lazy = handler.prepare(_record())
+        assert lazy.msg == "Retrieved %s answers"
+        assert lazy.args == (3,)
+
+        items = [1, 2]
+        eager = handler.prepare(_record(msg="Items %s", args=(items,)))
+        items.append(3)
+        assert eager.getMessage() == "Items [1, 2]"
+
+    def test_full_queue_drops_records(self):
+        """При переполнении очереди запись отбрасывается без блокировки"""
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        dropped = DroppingQueueHandler.dropped
+
+        handler.handle(_record())
+        handler.handle(_record())
+
+        assert handler.queue.qsize() == 1
+        assert DroppingQueueHandler.dropped == dropped + 1
+
+    def test_records_written_by_listener(self, tmp_path, monkeypatch):
+        """Записи доходят до файла через очередь и поток слушателя"""
+        log_file = tmp_path / "app.log"
+        monkeypatch.setattr(settings, "LOG_FILE", str(log_file))
+        monkeypatch.setattr(settings, "LOG_FORMAT", "json")
+        try:
+            setup_logging()
+            assert app_logging._listener is not None
+            logging.getLogger("question").info("Question %s deleted", 42)
+            stop_logging()
+
+            lines = log_file.read_text().splitlines()
+            assert json.loads(lines[-1])["message"] == "Question 42 deleted"
+        finally:
+            monkeypatch.undo()
+            setup_logging()
+
+    def test_file_per_process(self, tmp_path, monkeypatch):
+        """С LOG_FILE_PER_PROCESS процесс пишет в файл со своим pid"""
+        monkeypatch.setattr(settings, "LOG_FILE", str(tmp_path / "app.log"))
+        monkeypatch.setattr(settings, "LOG_FILE_PER_PROCESS", True)
+        try:
+            setup_logging()
+            logging.getLogger("question").warning("Per process")
+            stop_logging()
+
+            assert [path.name for path in tmp_path.iterdir()] == [f"app.{os.getpid()}.log"]
+            assert "Per process" in (tmp_path / f"app.{os.getpid()}.log").read_text()
+        finally:
+            monkeypatch.undo()
+            setup_logging()
@@ -0,0 +1,67 @@
+import tracemalloc
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.core.memory import MemoryTracker, MemoryTrackingMiddleware, memory_tracker
+
+
+@pytest.fixture
+def tracked_client():
+    """Клиент с учетом памяти; tracemalloc останавливается после теста"""
+    memory_tracker.reset()
+    memory_tracker.start()
+    yield TestClient(MemoryTrackingMiddleware(app, memory_tracker))
+    memory_tracker.stop()
+    memory_tracker.reset()
+
+
+class TestMemoryTracking:
+    """Тесты учета памяти по маршрутам"""
+
+    def test_routes_recorded_by_template(self, tracked_client, admin_headers: dict):
+        """Статистика ведется по шаблону маршрута, отчет доступен админу"""
+        for i in range(20):
+            tracked_client.post("/api/v1/questions/", json={"text": f"Question {i}"})
+        tracked_client.get("/api/v1/questions/")
+        tracked_client.get("/api/v1/questions/999999")
+
+        response = tracked_client.get("/api/v1/admin/memory", headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        report = response.json()
+        assert report["tracing"] is True
+        routes = {item["route"]: item for item in report["routes"]}
+        assert routes["POST /api/v1/questions/"]["requests"] == 20
+        assert routes["GET /api/v1/questions/"]["peak_max_bytes"] > 0
+        assert "GET /api/v1/questions/{question_id}" in routes
+        assert report["top_sites"]
+
+    def test_snapshot_sites_recorded(self):
+        """Каждый snapshot_every-й запрос сохраняет места выделений"""
+        tracker = MemoryTracker(snapshot_every=1)
+        tracker.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            retained = [bytearray(100_000)]
+            after = tracemalloc.take_snapshot()
+            assert tracker.should_snapshot()
+            tracker.record("GET /big", 100_000, 100_000, after.compare_to(before, "lineno")[:20])
+        finally:
+            tracker.stop()
+
+        report = tracker.report()
+        route = report["routes"][0]
+        assert route["snapshots"] == 1
+        assert route["top_sites"][0]["size_bytes"] >= 100_000
+        assert "test_memory.py" in route["top_sites"][0]["site"]
+        assert retained
+
+    def test_memory_report_requires_admin(self, client: TestClient, admin_headers: dict, monkeypatch):
+        """Отчет о памяти недоступен обычному пользователю"""
+        monkeypatch.setattr(settings, "ADMIN_EMAILS", [])
+
+        response = client.get("/api/v1/admin/memory", headers=admin_headers)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from app.core.metrics import MetricsRegistry, instrument_engine, retire_snapshot, LATENCY_BUCKETS, RETIRED_SNAPSHOT
+from app.core.query_timing import add_query_listener, remove_query_listener
+from app.core.slow_queries import SlowQueryLog
+
+
+def _child_worker(directory: str) -> None:
+    """Воркер в отдельном процессе: пишет свои метрики и завершается"""
+    registry = MetricsRegistry(directory)
+    registry.inc("http_requests_total", {"method": "GET", "route": "/", "status": "200"}, 5)
+    registry.add_gauge("http_requests_in_flight", value=3)
+    registry.observe("http_request_duration_seconds", {"method": "GET", "route": "/"}, 0.02, LATENCY_BUCKETS)
+    registry.flush()
+
+
+class TestMetricsEndpoint:
+    """Тесты /metrics"""
+
+    def test_route_metrics_use_route_template(self, client: TestClient):
+        """Запросы учитываются по шаблону маршрута, а не по пути"""
+        client.get("/api/v1/questions/12345")
+        response = client.get("/metrics")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert "# TYPE http_requests_total counter" in body
+        assert 'http_requests_total{method="GET",route="/api/v1/questions/{question_id}",status="404"}' in body
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/api/v1/questions/{question_id}",le="+Inf"}' in body
+        assert "http_response_size_bytes_count" in body
+        assert "12345" not in body
+
+    def test_unmatched_routes_are_grouped(self, client: TestClient):
+        """Неизвестные пути не создают новых рядов"""
+        client.get("/no/such/path")
+
+        assert 'route="unmatched",status="404"' in client.get("/metrics").text
+
+
+class TestMetricsRegistry:
+    """Тесты реестра метрик"""
+
+    def test_histogram_rendering(self):
+        """Бакеты гистограммы накопительные"""
+        registry = MetricsRegistry()
+        for value in (0.001, 0.02, 0.02, 20):
+            registry.observe("http_request_duration_seconds", {"route": "/"}, value, LATENCY_BUCKETS)
+
+        body = registry.render()
+
+        assert 'http_request_duration_seconds_bucket{route="/",le="0.005"} 1' in body
+        assert 'http_request_duration_seconds_bucket{route="/",le="0.025"} 3' in body
+        assert 'http_request_duration_seconds_bucket{route="/",le="10"} 3' in body
+        assert 'http_request_duration_seconds_bucket{route="/",le="+Inf"} 4' in body
+        assert 'http_request_duration_seconds_count{route="/"} 4' in body
+
+    def test_aggregates_across_worker_processes(self, tmp_path):
+        """Снимки воркеров суммируются, gauge завершенных воркеров отбрасываются"""
+        registry = MetricsRegistry(str(tmp_path))
+        registry.inc("http_requests_total", {"method": "GET", "route": "/", "status": "200"}, 2)
+        registry.add_gauge("http_requests_in_flight", value=1)
+        registry.observe("http_request_duration_seconds", {"method": "GET", "route": "/"}, 0.02, LATENCY_BUCKETS)
+
+        child = multiprocessing.get_context("fork").Process(target=_child_worker, args=(str(tmp_path),))
+        child.start()
+        child.join()
+
+        collected = registry.collect()
+        body = registry.render()
+
+        assert 'http_requests_total{method="GET",route="/",status="200"} 7' in body
+        assert "http_requests_in_flight 1" in body
+        assert 'http_request_duration_seconds_count{method="GET",route="/"} 2' in body
+        assert len(collected["histograms"]) == 1
+
+    def test_retired_workers_are_merged_into_one_file(self, tmp_path):
+        """Снимки завершившихся воркеров сливаются в общий файл без gauge и удаляются"""
+        registry = MetricsRegistry(str(tmp_path))
+        registry.inc("http_requests_total", {"method": "GET", "route": "/", "status": "200"}, 2)
+
+        for _ in range(3):
+            child = multiprocessing.get_context("fork").Process(target=_child_worker, args=(str(tmp_path),))
+            child.start()
+            child.join()
+            snapshot = (tmp_path / f"metrics_{child.pid}.json").read_text()
+            retire_snapshot(str(tmp_path), child.pid)
+            assert not (tmp_path / f"metrics_{child.pid}.json").exists()
+
+        # Снимок, уже слитый в общий файл, но еще не удаленный, не учитывается дважды
+        (tmp_path / f"metrics_{child.pid}.json").write_text(snapshot)
+        body = registry.render()
+
+        assert sorted(path.name for path in tmp_path.glob("metrics_*.json")) == sorted(
+            [f"metrics_{os.getpid()}.json", f"metrics_{child.pid}.json", RETIRED_SNAPSHOT]
+        )
+        assert 'http_requests_total{method="GET",route="/",status="200"} 17' in body
+        assert 'http_request_duration_seconds_count{method="GET",route="/"} 3' in body
+        assert "http_requests_in_flight" not in body
+
+    def test_database_queries_and_pool(self):
+        """Запросы движка и состояние пула попадают в метрики"""
+        registry = MetricsRegistry()
+        engine = create_engine("sqlite://")
+        instrument_engine(engine, registry)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+        body = registry.render()
+
+        assert "db_queries_total 2" in body
+        assert "db_query_duration_seconds_total" in body
+
+    def test_failed_queries_leave_no_state_on_connection(self):
+        """Запрос с ошибкой не оставляет время начала на соединении из пула"""
+        registry = MetricsRegistry()
+        slow_log = SlowQueryLog(threshold_ms=0, explain=False)
+        engine = create_engine("sqlite://")
+        instrument_engine(engine, registry)
+        slow_log.instrument(engine)
+        with engine.connect() as conn:
+            for _ in range(5):
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing_table"))
+                conn.rollback()
+            conn.execute(text("SELECT 1"))
+            info = dict(conn.info)
+
+        assert info == {}
+        assert "db_queries_total 1" in registry.render()
+        assert [stats.count for stats in slow_log.entries.values()] == [1]
+
+    def test_query_listeners_share_one_hook(self):
+        """Подписчики делят одну пару обработчиков, которая снимается с последним из них"""
+        engine = create_engine("sqlite://")
+        calls = []
+        first = lambda *args: calls.append("first")
+        second = lambda *args: calls.append("second")
+        add_query_listener(engine, first)
+        add_query_listener(engine, second)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        remove_query_listener(engine, first)
+        remove_query_listener(engine, second)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert calls == ["first", "second"]
+        assert not engine.dispatch.before_cursor_execute
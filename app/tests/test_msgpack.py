@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.core.serialization import prefers_msgpack
+
+msgpack = pytest.importorskip("msgpack")
+
+MSGPACK = {"Accept": "application/msgpack"}
+
+
+class TestMsgpack:
+    """Тесты ответов в MessagePack"""
+
+    def test_prefers_msgpack(self):
+        """MessagePack выбирается, только если назван явно и не ниже JSON"""
+        assert prefers_msgpack("application/msgpack")
+        assert prefers_msgpack("application/x-msgpack, */*")
+        assert prefers_msgpack("application/json;q=0.5, application/msgpack")
+        assert not prefers_msgpack("application/json, application/msgpack;q=0.5")
+        assert not prefers_msgpack("*/*")
+        assert not prefers_msgpack(None)
+
+    def test_list_rendered_as_msgpack(self, client: TestClient):
+        """Список вопросов в MessagePack совпадает с JSON"""
+        client.post("/api/v1/questions/", json={"text": "What is FastAPI?"})
+
+        response = client.get("/api/v1/questions/", headers=MSGPACK)
+
+        assert response.headers["content-type"] == "application/msgpack"
+        assert "Accept" in response.headers["vary"]
+        assert msgpack.unpackb(response.content) == client.get("/api/v1/questions/").json()
+
+    def test_response_model_and_errors_transcoded(self, client: TestClient):
+        """Ответы через response_model и ошибки перекодируются из JSON"""
+        question = client.post("/api/v1/questions/", json={"text": "Question"}, headers=MSGPACK)
+        missing = client.get("/api/v1/questions/999", headers=MSGPACK)
+
+        assert question.status_code == 201
+        assert msgpack.unpackb(question.content)["text"] == "Question"
+        assert int(question.headers["content-length"]) == len(question.content)
+        assert missing.status_code == 404
+        assert msgpack.unpackb(missing.content) == {"detail": "Question not found"}
+
+    def test_cached_with_answers_not_compressed(self, client: TestClient):
+        """Кешированный вопрос с ответами отдается в MessagePack, а не сжатым JSON"""
+        question_id = client.post("/api/v1/questions/", json={"text": "Q" * 2000}).json()["id"]
+        url = f"/api/v1/questions/{question_id}/with-answers"
+        client.get(url, headers={"Accept-Encoding": "gzip"})
+
+        response = client.get(url, headers={**MSGPACK, "Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert msgpack.unpackb(response.content)["text"] == "Q" * 2000
@@ -0,0 +1,59 @@
+import threading
+from fastapi import status
+from fastapi.testclient import TestClient
+from app.core import profiler as profiler_module
+from app.core.config import settings
+from app.core.profiler import SamplingProfiler
+
+
+def _busy_endpoint(started: threading.Event, stop: threading.Event):
+    started.set()
+    stop.wait()
+
+
+class TestProfiler:
+    """Тесты профилирования воркера"""
+
+    def test_profile_returns_collapsed_stacks(self, client: TestClient, admin_headers: dict):
+        """Админ получает collapsed stacks за заданное время"""
+        response = client.post("/api/v1/admin/profile?seconds=0.1&interval_ms=5", headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert int(response.headers["x-profile-samples"]) > 0
+        lines = response.text.strip().splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) > 0
+        assert ";" in stack
+
+    def test_profile_requires_admin(self, client: TestClient, admin_headers: dict, monkeypatch):
+        """Пользователь не из ADMIN_EMAILS получает 403"""
+        monkeypatch.setattr(settings, "ADMIN_EMAILS", [])
+
+        response = client.post("/api/v1/admin/profile?seconds=0.1", headers=admin_headers)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_profile_rejects_concurrent_runs(self, client: TestClient, admin_headers: dict):
+        """Второй сеанс профилирования в том же процессе получает 409"""
+        with profiler_module._profile_lock:
+            response = client.post("/api/v1/admin/profile?seconds=0.1", headers=admin_headers)
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    def test_stacks_annotated_with_route(self):
+        """Стек потока, выполняющего обработчик, начинается с имени маршрута"""
+        started, stop = threading.Event(), threading.Event()
+        thread = threading.Thread(target=_busy_endpoint, args=(started, stop))
+        thread.start()
+        started.wait()
+        try:
+            profiler = SamplingProfiler(routes={_busy_endpoint.__code__: "GET /busy"})
+            profiler.sample(threading.get_ident())
+        finally:
+            stop.set()
+            thread.join()
+
+        stacks = [stack for stack in profiler.samples if "_busy_endpoint" in stack]
+        assert len(stacks) == 1
+        assert stacks[0].startswith("GET /busy;")
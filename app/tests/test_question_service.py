@@ -106,3 +106,39 @@ class TestQuestionService:
         
         assert exc_info.value.status_code == 404
         assert "Question not found" in str(exc_info.value.detail)
+
+    def test_delete_question_cascades_in_database(self, db_session):
+        """Ответы удаляются базой, без загрузки в сессию"""
+        from sqlalchemy import func, select
+        from app.alembic.models.answer import Answer
+        from app.models.answer import AnswerCreate
+        from app.services.answer_service import AnswerService
+        
+        question_service = QuestionService(db_session)
+        question = question_service.create_question(QuestionCreate(text="Question with answers"))
+        AnswerService(db_session).create_answers_bulk(
+            [AnswerCreate(question_id=question.id, text=f"Answer {i}") for i in range(100)], "user1"
+        )
+        db_session.expunge_all()
+        
+        question_service.delete_question(question.id)
+        
+        assert db_session.scalar(select(func.count()).select_from(Answer)) == 0
+        assert not any(isinstance(obj, Answer) for obj in db_session.identity_map.values())
+
+    def test_get_all_questions_selects_only_requested_fields(self, db_session):
+        """Запрос выбирает только колонки из fields и без answers_count обходится без JOIN"""
+        from sqlalchemy import event
+        
+        question_service = QuestionService(db_session)
+        question_service.create_question(QuestionCreate(text="Question 1"))
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+        try:
+            questions = question_service.get_all_questions(("id",))
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+        
+        assert questions[0]._fields == ("id",)
+        assert "text" not in statements[-1] and "JOIN" not in statements[-1]
@@ -10,6 +10,24 @@ class TestQuestionAPI:
         assert response.status_code == status.HTTP_200_OK
         assert response.json() == []
 
+    def test_get_questions_sparse_fields(self, client: TestClient):
+        """Параметр fields сужает ответ до перечисленных полей"""
+        client.post("/api/v1/questions/", json={"text": "What is FastAPI?"})
+        
+        response = client.get("/api/v1/questions/", params={"fields": "text, id"})
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == [{"text": "What is FastAPI?", "id": response.json()[0]["id"]}]
+        counts = client.get("/api/v1/questions/", params={"fields": "answers_count"})
+        assert counts.json() == [{"answers_count": 0}]
+
+    def test_get_questions_unknown_field(self, client: TestClient):
+        """Неизвестное поле в fields - ошибка 422"""
+        response = client.get("/api/v1/questions/", params={"fields": "id,hashed_password"})
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert "hashed_password" in response.json()["detail"]
+
     def test_create_question_success(self, client: TestClient):
         """Тест успешного создания вопроса"""
         question_data = {"text": "What is FastAPI?"}
@@ -175,3 +193,26 @@ class TestQuestionAPI:
         
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert "Question not found" in response.json()["detail"]
+
+    def test_create_questions_bulk(self, client: TestClient):
+        """Тест массового создания вопросов"""
+        questions_data = [{"text": f"Question {i}"} for i in range(50)]
+        response = client.post("/api/v1/questions/bulk", json=questions_data)
+        
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert data["count"] == 50
+        assert len(data["ids"]) == 50
+        
+        # id возвращаются в порядке элементов запроса
+        last = client.get(f"/api/v1/questions/{data['ids'][-1]}")
+        assert last.json()["text"] == "Question 49"
+
+    def test_create_questions_bulk_too_many(self, client: TestClient, monkeypatch):
+        """Тест ограничения размера bulk запроса"""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "BULK_MAX_ITEMS", 2)
+        
+        response = client.post("/api/v1/questions/bulk", json=[{"text": "Q"}] * 3)
+        
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
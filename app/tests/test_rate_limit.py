@@ -0,0 +1,118 @@
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from app.core.rate_limit import (
+    RateLimitMiddleware, RateLimitRule, MemoryBucketStore, SQLiteBucketStore, parse_rules
+)
+from app.services.auth_service import create_access_token
+
+
+def make_client(rule, store):
+    """Приложение с одним ограниченным маршрутом"""
+    app = FastAPI()
+    calls = []
+
+    @app.post("/limited")
+    async def limited():
+        calls.append(True)
+        return {"ok": True}
+
+    @app.post("/free")
+    async def free():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, rules=[rule], store=store)
+    return TestClient(app), calls
+
+
+class TestRuleParsing:
+    """Тесты разбора настроек"""
+
+    def test_parse_rules(self):
+        """Разбор метода, пути, периода и ключа"""
+        rules = parse_rules({
+            "POST /api/v1/users/login": "10/minute",
+            "post /api/v1/answers/": "3/30:user",
+        })
+
+        assert rules[0] == RateLimitRule("POST", "/api/v1/users/login", 10, 60, "ip")
+        assert rules[1] == RateLimitRule("POST", "/api/v1/answers/", 3, 30.0, "user")
+
+
+class TestBucketStores:
+    """Тесты token bucket хранилищ"""
+
+    @pytest.fixture(params=["memory", "sqlite"])
+    def store(self, request, tmp_path):
+        if request.param == "sqlite":
+            return SQLiteBucketStore(str(tmp_path / "limits.sqlite3"))
+        return MemoryBucketStore()
+
+    def test_bucket_refills(self, store):
+        """Корзина опустошается и пополняется со временем"""
+        rule = RateLimitRule("POST", "/x", capacity=2, period=10)
+
+        assert store.take("k", rule, now=100.0) == 0
+        assert store.take("k", rule, now=100.0) == 0
+        assert store.take("k", rule, now=100.0) == pytest.approx(5.0)
+        assert store.take("k", rule, now=105.0) == 0
+
+    def test_keys_are_independent(self, store):
+        """Разные ключи имеют свои корзины"""
+        rule = RateLimitRule("POST", "/x", capacity=1, period=60)
+
+        assert store.take("a", rule, now=0.0) == 0
+        assert store.take("a", rule, now=0.0) > 0
+        assert store.take("b", rule, now=0.0) == 0
+
+    def test_memory_store_is_bounded(self):
+        """Память ограничена: старые ключи вытесняются"""
+        store = MemoryBucketStore(max_keys=10)
+        rule = RateLimitRule("POST", "/x", capacity=1, period=60)
+        for i in range(100):
+            store.take(str(i), rule, now=0.0)
+
+        assert len(store._buckets) == 10
+
+
+class TestRateLimitMiddleware:
+    """Тесты middleware"""
+
+    def test_returns_429_before_handler(self):
+        """Превышение лимита отвечает 429 с Retry-After, не вызывая обработчик"""
+        client, calls = make_client(RateLimitRule("POST", "/limited", 2, 60), MemoryBucketStore())
+
+        assert client.post("/limited").status_code == status.HTTP_200_OK
+        assert client.post("/limited").status_code == status.HTTP_200_OK
+        response = client.post("/limited")
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response.headers["retry-after"]) == 30
+        assert response.json()["detail"] == "Too many requests"
+        assert len(calls) == 2
+
+    def test_other_routes_not_limited(self):
+        """Маршруты без правил не ограничиваются"""
+        client, _ = make_client(RateLimitRule("POST", "/limited", 1, 60), MemoryBucketStore())
+
+        for _ in range(5):
+            assert client.post("/free").status_code == status.HTTP_200_OK
+
+    def test_user_key_limits_per_token_subject(self):
+        """Ключ user считает запросы отдельно для каждого пользователя"""
+        client, _ = make_client(RateLimitRule("POST", "/limited", 1, 60, key="user"), MemoryBucketStore())
+        first = {"Authorization": f"Bearer {create_access_token({'sub': 'a@example.com', 'user_id': 1})}"}
+        second = {"Authorization": f"Bearer {create_access_token({'sub': 'b@example.com', 'user_id': 2})}"}
+
+        assert client.post("/limited", headers=first).status_code == status.HTTP_200_OK
+        assert client.post("/limited", headers=first).status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert client.post("/limited", headers=second).status_code == status.HTTP_200_OK
+
+    def test_login_is_limited(self, client):
+        """Вход ограничен настройками по умолчанию"""
+        credentials = {"email": "nobody@example.com", "password": "wrongpassword"}
+        responses = [client.post("/api/v1/users/login", json=credentials) for _ in range(11)]
+
+        assert responses[-2].status_code == status.HTTP_401_UNAUTHORIZED
+        assert responses[-1].status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert "retry-after" in responses[-1].headers
@@ -0,0 +1,55 @@
+import gzip
+from fastapi.testclient import TestClient
+from app.core.response_cache import ResponseCache, choose_encoding
+from app.services.question_service import question_response_cache
+
+
+class TestResponseCache:
+    """Тесты кеша тел ответов со сжатыми вариантами"""
+
+    def test_choose_encoding(self):
+        """Выбор по q, * и порядку доступных кодировок"""
+        available = ("zstd", "gzip")
+        assert choose_encoding("gzip, deflate, br", available) == "gzip"
+        assert choose_encoding("gzip;q=0.5, zstd", available) == "zstd"
+        assert choose_encoding("*;q=0.1, zstd;q=0", available) == "gzip"
+        assert choose_encoding("identity", available) is None
+        assert choose_encoding(None, available) is None
+
+    def test_variants_computed_once_on_set(self):
+        """Большое тело сжимается при записи, маленькое хранится как есть"""
+        cache = ResponseCache(max_size=10, ttl=60, min_size=100)
+        body = b'{"text": "' + b"x" * 1000 + b'"}'
+
+        entry = cache.set(1, body)
+
+        assert cache.get(1) is entry
+        assert gzip.decompress(entry.variants["gzip"]) == body
+        assert cache.set(2, b"{}").variants == {}
+        response = cache.respond(entry, "gzip")
+        assert response.body == entry.variants["gzip"]
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+
+    def test_with_answers_served_compressed_and_invalidated(self, client: TestClient, test_user_data: dict):
+        """Повторный запрос отдает кешированный gzip, новый ответ сбрасывает запись"""
+        client.post("/api/v1/users/register", json=test_user_data)
+        login_response = client.post("/api/v1/users/login", json={
+            "email": test_user_data["email"],
+            "password": test_user_data["password"]
+        })
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+        question_id = client.post("/api/v1/questions/", json={"text": "Q" * 2000}).json()["id"]
+        url = f"/api/v1/questions/{question_id}/with-answers"
+
+        first = client.get(url, headers={"Accept-Encoding": "gzip"})
+        entry = question_response_cache.get(question_id)
+
+        assert first.headers["content-encoding"] == "gzip"
+        assert first.json()["answers"] == []
+        assert client.get(url, headers={"Accept-Encoding": "identity"}).json() == first.json()
+        assert question_response_cache.get(question_id) is entry
+
+        client.post("/api/v1/answers/", json={"question_id": question_id, "text": "Answer"}, headers=headers)
+        assert question_response_cache.get(question_id) is None
+        assert [answer["text"] for answer in client.get(url).json()["answers"]] == ["Answer"]
@@ -0,0 +1,51 @@
+import json
+from datetime import datetime, UTC
+from pydantic import TypeAdapter
+from app.alembic.models import Answer, Question
+from app.core.serialization import render_item, render_list
+from app.models.answer import AnswerResponse
+from app.models.question import QuestionResponse, QuestionWithAnswersResponse
+
+
+class TestSerialization:
+    """Тесты рендеринга ответов через TypeAdapter"""
+
+    def test_render_list_matches_response_model(self):
+        """Байты совпадают с валидацией response_model, отсутствующее поле берет значение по умолчанию"""
+        created_at = datetime(2024, 1, 2, 3, 4, 5, 678, tzinfo=UTC)
+        with_count = Question(id=1, text="Первый вопрос", created_at=created_at)
+        with_count.answers_count = 3
+        questions = [with_count, Question(id=2, text="Second", created_at=created_at)]
+        adapter = TypeAdapter(list[QuestionResponse])
+
+        response = render_list(QuestionResponse, questions)
+
+        assert response.media_type == "application/json"
+        assert response.body == adapter.dump_json(adapter.validate_python(questions, from_attributes=True))
+        assert json.loads(response.body)[1]["answers_count"] == 0
+
+    def test_render_item_with_nested_answers(self):
+        """Вложенный список ответов рендерится по AnswerResponse"""
+        created_at = datetime(2024, 1, 2, tzinfo=UTC)
+        question = Question(id=1, text="Question", created_at=created_at)
+        question.answers = [
+            Answer(id=i, question_id=1, user_id="user@example.com", text=f"Answer {i}", created_at=created_at)
+            for i in range(1, 3)
+        ]
+
+        response = render_item(QuestionWithAnswersResponse, question)
+
+        expected = QuestionWithAnswersResponse.model_validate(question).model_dump_json()
+        assert response.body == expected.encode()
+        assert [answer["id"] for answer in json.loads(response.body)["answers"]] == [1, 2]
+
+    def test_list_endpoints_keep_response_schema(self, client):
+        """Списки отдаются как JSON, а response_model остается в OpenAPI"""
+        client.post("/api/v1/questions/", json={"text": "Question"})
+
+        response = client.get("/api/v1/questions/")
+
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()[0]["answers_count"] == 0
+        schema = client.get("/api/v1/openapi.json").json()["paths"]["/api/v1/questions/"]["get"]["responses"]["200"]
+        assert schema["content"]["application/json"]["schema"]["items"]["$ref"].endswith("QuestionResponse")
@@ -0,0 +1,134 @@
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+import httpx
+import pytest
+from app.serve import Master, WorkerServer, http_implementation
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(condition, timeout: float = 20) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return
+        time.sleep(0.1)
+    raise AssertionError("condition not met in time")
+
+
+class _Listener:
+    """asyncio.Server воркера: считает вызовы close"""
+
+    def __init__(self):
+        self.closed = 0
+
+    def close(self) -> None:
+        self.closed += 1
+
+
+class TestServe:
+    """Тесты многопроцессного запуска"""
+
+    def test_worker_config_jitter_and_defaults(self):
+        """Лимит запросов воркера - max_requests плюс jitter, логирование остается за приложением"""
+        master = Master(None, "app.main:app", 2, max_requests=100, max_requests_jitter=10, keep_alive=7)
+        limits = {master.worker_config().limit_max_requests for _ in range(50)}
+        assert limits <= set(range(100, 111)) and len(limits) > 1
+
+        config = Master(None, "app.main:app", 1).worker_config()
+        assert config.limit_max_requests is None
+        assert config.log_config is None and config.access_log is False
+        assert config.timeout_keep_alive == 5
+        assert config.http == http_implementation()
+
+    def test_worker_stops_accepting_at_request_limit(self):
+        """Слушающий сокет закрывается сразу после последнего запроса, а не в следующем on_tick"""
+        config = Master(None, "app.main:app", 1, max_requests=2).worker_config()
+        server = WorkerServer(config, ready_fd=-1)
+        listener = _Listener()
+        server.servers = [listener]
+
+        server.server_state.total_requests += 1
+        assert listener.closed == 0 and not server.should_exit
+
+        server.server_state.total_requests += 1
+        assert listener.closed == 1 and server.should_exit
+
+        server.server_state.total_requests += 1
+        assert listener.closed == 1
+
+    def test_worker_stops_accepting_on_sigterm(self):
+        """SIGTERM от мастера закрывает слушающий сокет воркера сразу"""
+        server = WorkerServer(Master(None, "app.main:app", 1).worker_config(), ready_fd=-1)
+        listener = _Listener()
+        server.servers = [listener]
+
+        server.handle_exit(signal.SIGTERM, None)
+        assert listener.closed == 1 and server.should_exit
+
+    def test_recycle_rolling_restart_and_shutdown(self, tmp_path):
+        """Воркер заменяется после max requests и по SIGHUP, SIGTERM останавливает всех"""
+        port = _free_port()
+        log_path = tmp_path / "serve.log"
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{tmp_path / 'serve.db'}",
+            "LOG_FILE": "",
+            "LOG_FORMAT": "text",
+            "RATE_LIMIT_ENABLED": "false",
+        }
+        with open(log_path, "w") as log:
+            process = subprocess.Popen(
+                [sys.executable, "-m", "app.serve", "--port", str(port), "--workers", "2",
+                 "--max-requests", "3", "--graceful-timeout", "5"],
+                stdout=log, stderr=subprocess.STDOUT, env=env
+            )
+        started = lambda: re.findall(r"Started worker (\d+)", log_path.read_text())
+        url = f"http://127.0.0.1:{port}/"
+
+        def ready():
+            try:
+                return httpx.get(url, timeout=1).status_code == 200
+            except httpx.HTTPError:
+                return False
+
+        try:
+            _wait_for(ready)
+            for _ in range(10):
+                assert httpx.get(url, headers={"Connection": "close"}).status_code == 200
+            _wait_for(lambda: "exited after max requests" in log_path.read_text())
+
+            spawned = len(started())
+            process.send_signal(signal.SIGHUP)
+            _wait_for(lambda: len(started()) >= spawned + 2)
+            assert httpx.get(url).status_code == 200
+
+            process.send_signal(signal.SIGTERM)
+            assert process.wait(timeout=20) == 0
+            assert "failed to boot" not in log_path.read_text()
+            for pid in started():
+                with pytest.raises(ProcessLookupError):
+                    os.kill(int(pid), 0)
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+
+    def test_boot_error_stops_master(self, tmp_path):
+        """Если приложение не запускается, мастер завершается, а не перезапускает воркеры"""
+        env = {**os.environ, "DATABASE_URL": "sqlite:////nonexistent/dir/serve.db", "LOG_FILE": ""}
+        result = subprocess.run(
+            [sys.executable, "-m", "app.serve", "--port", str(_free_port()), "--workers", "1", "--no-preload"],
+            capture_output=True, text=True, env=env, timeout=60
+        )
+        assert result.returncode == 1
+        assert result.stdout.count("Started worker") == 1
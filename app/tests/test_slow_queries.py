@@ -0,0 +1,58 @@
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from app.core.slow_queries import SlowQueryLog, fingerprint, parameters_shape, slow_query_log
+from app.tests.conftest import engine
+
+
+@pytest.fixture(autouse=True)
+def instrumented_engine():
+    """Журнал подключен к тестовому движку только на время тестов модуля"""
+    slow_query_log.instrument(engine)
+    yield
+    slow_query_log.uninstrument(engine)
+
+
+class TestSlowQueryLog:
+    """Тесты журнала медленных запросов"""
+
+    def test_fingerprint_normalizes_literals(self):
+        """Литералы, параметры и списки IN сводятся к одному отпечатку"""
+        first = fingerprint("SELECT * FROM answers WHERE id IN (1, 2, 3) AND text = 'a'")
+        second = fingerprint("SELECT  *\nFROM answers WHERE id IN (?, ?) AND text = :text")
+
+        assert first == second == "SELECT * FROM answers WHERE id IN (...) AND text = ?"
+        assert fingerprint("SELECT x::text FROM t WHERE a = %(a)s") == "SELECT x::text FROM t WHERE a = ?"
+
+    def test_parameters_shape_hides_values(self):
+        """В журнал попадают только типы параметров"""
+        assert parameters_shape({"email": "secret@example.com", "id": 1}, False) == "{email: str, id: int}"
+        assert parameters_shape([("a", 1), ("b", 2)], True) == "2 x (str, int)"
+
+    def test_slow_queries_reported_to_admin(self, client: TestClient, admin_headers: dict, monkeypatch):
+        """Медленные запросы агрегируются по отпечатку с планом и источником"""
+        slow_query_log.reset()
+        monkeypatch.setattr(slow_query_log, "threshold_ms", 0)
+        for i in range(3):
+            client.get(f"/api/v1/questions/{i + 1000}")
+        monkeypatch.setattr(slow_query_log, "threshold_ms", None)
+
+        response = client.get("/api/v1/admin/slow-queries", headers=admin_headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        queries = response.json()["queries"]
+        lookup = next(item for item in queries if item["origin"].endswith("QuestionService.get_question_by_id"))
+        assert lookup["count"] == 3
+        assert lookup["fingerprint"].startswith("SELECT questions.id")
+        assert "SEARCH questions" in lookup["plan"]
+        slow_query_log.reset()
+
+    def test_table_evicts_smallest_total(self):
+        """При переполнении вытесняется отпечаток с наименьшим суммарным временем"""
+        log = SlowQueryLog(threshold_ms=0, explain=False, max_entries=2)
+        with engine.connect() as conn:
+            log.record(conn, "SELECT 1", (), False, 50)
+            log.record(conn, "SELECT a FROM t", (), False, 5)
+            log.record(conn, "SELECT b FROM t", (), False, 10)
+
+        assert [item["fingerprint"] for item in log.report()] == ["SELECT ?", "SELECT b FROM t"]
@@ -0,0 +1,135 @@
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.core import tracing
+from app.core.query_timing import remove_query_listener
+from app.core.tracing import SpanExporter, Trace, TracingMiddleware, instrument_engine_tracing, record_db_span, span
+from app.tests.conftest import engine
+
+
+@pytest.fixture(autouse=True)
+def instrumented_engine():
+    """Спаны SQL тестового движка только на время тестов модуля"""
+    instrument_engine_tracing(engine)
+    yield
+    remove_query_listener(engine, record_db_span)
+
+
+@pytest.fixture
+def traced_client(tmp_path):
+    """Клиент с трассировкой и экспортом спанов во временный файл"""
+    exporter = SpanExporter(str(tmp_path / "spans.jsonl"))
+    yield TestClient(TracingMiddleware(app, exporter)), exporter
+    exporter.close()
+
+
+def _export_in_child(exporter: SpanExporter) -> None:
+    """Воркер после fork: экспортирует одну трассу и завершается"""
+    exporter.export(Trace(), "GET /child", 0, {})
+    exporter.close()
+
+
+def _server_timing(response) -> dict[str, str]:
+    entries = {}
+    for entry in response.headers["server-timing"].split(", "):
+        name, _, params = entry.partition(";")
+        entries[name] = params
+    return entries
+
+
+class TestTracing:
+    """Тесты трассировки запросов"""
+
+    def test_server_timing_breakdown(self, traced_client, test_user_data: dict):
+        """Server-Timing разбивает время на auth, сервис, SQL и рендеринг"""
+        client, _ = traced_client
+        client.post("/api/v1/users/register", json=test_user_data)
+        token = client.post("/api/v1/users/login", json={
+            "email": test_user_data["email"],
+            "password": test_user_data["password"]
+        }).json()["access_token"]
+        question_id = client.post("/api/v1/questions/", json={"text": "What is tracing?"}).json()["id"]
+        client.post(
+            "/api/v1/answers/",
+            json={"question_id": question_id, "text": "Spans"},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+        response = client.get(f"/api/v1/questions/{question_id}/with-answers")
+
+        assert response.status_code == status.HTTP_200_OK
+        timing = _server_timing(response)
+        assert {"endpoint", "service", "db", "render", "total"} <= set(timing)
+        assert "queries" in timing["db"]
+
+        me = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {token}"})
+        assert "auth" in _server_timing(me)
+
+    def test_spans_exported_as_otlp_json(self, traced_client):
+        """Спаны пишутся в файл в формате OTLP JSON с общим trace id"""
+        client, exporter = traced_client
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+        client.get("/api/v1/questions/", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+        # Запись идет в потоке слушателя: close дописывает очередь
+        exporter.close()
+
+        line = Path(exporter.path).read_text().strip().splitlines()[-1]
+        spans = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        root = spans[0]
+        assert root["name"] == "GET /api/v1/questions/"
+        assert root["parentSpanId"] == "00f067aa0ba902b7"
+        assert {item["traceId"] for item in spans} == {trace_id}
+        assert any(item["name"] == "QuestionService.get_all_questions" for item in spans)
+        assert any(item["name"] == "db.query" and item["kind"] == 3 for item in spans)
+        status_code = next(a for a in root["attributes"] if a["key"] == "http.status_code")
+        assert status_code["value"] == {"intValue": "200"}
+
+    def test_no_trace_without_middleware(self, client: TestClient):
+        """Без middleware спаны не создаются и заголовок не добавляется"""
+        response = client.get("/api/v1/questions/")
+
+        assert "server-timing" not in response.headers
+
+    def test_self_time_excludes_children(self):
+        """Собственное время категории не включает время дочерних спанов"""
+        trace = Trace()
+        token = tracing._current_trace.set(trace)
+        try:
+            with span("outer", "service"):
+                with span("inner", "db"):
+                    pass
+        finally:
+            tracing._current_trace.reset(token)
+        outer_span, inner_span = trace.spans
+        outer_span.start, outer_span.end = 0, 10_000_000
+        inner_span.start, inner_span.end = 2_000_000, 6_000_000
+
+        timings = trace.timings()
+
+        assert timings["service"] == (6.0, 1)
+        assert timings["db"] == (4.0, 1)
+        assert inner_span.parent_id == outer_span.span_id
+
+    def test_exporter_opens_file_per_process(self, tmp_path, monkeypatch):
+        """Экспортер, созданный до fork, пишет в процессе-потомке в свой файл"""
+        monkeypatch.setattr(settings, "LOG_FILE_PER_PROCESS", True)
+        exporter = SpanExporter(str(tmp_path / "spans.jsonl"))
+        exporter.export(Trace(), "GET /parent", 0, {})
+
+        child = multiprocessing.get_context("fork").Process(target=_export_in_child, args=(exporter,))
+        child.start()
+        child.join()
+        exporter.close()
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+            [f"spans.{os.getpid()}.jsonl", f"spans.{child.pid}.jsonl"]
+        )
+        assert "GET /child" in (tmp_path / f"spans.{child.pid}.jsonl").read_text()
+        assert "GET /child" not in (tmp_path / f"spans.{os.getpid()}.jsonl").read_text()
@@ -1,9 +1,22 @@
+import multiprocessing
 import pytest
+from app.core.cache import SQLiteInvalidationLog
+from app.services import user_service as user_service_module
 from app.services.user_service import UserService
 from app.models.user import UserCreate, UserUpdate
 from app.alembic.models.user import User
 
 
+def _update_in_other_worker(user_id: int, email: str) -> None:
+    """Другой воркер после fork: свое соединение с базой и с журналом инвалидаций"""
+    from app.tests.conftest import TestingSessionLocal, engine
+
+    engine.dispose(close=False)
+    user_service_module.user_cache_invalidations.reconnect()
+    with TestingSessionLocal() as db:
+        UserService(db).update_user(user_id, UserUpdate(email=email))
+
+
 class TestUserService:
     """Тесты для UserService"""
     
@@ -233,3 +246,170 @@ class TestUserService:
         updated_user = user_service.update_user(created_user.id, update_data)
         
         assert updated_user.updated_at > original_updated_at
+
+
+class TestDuplicatePrecheck:
+    """Тесты проверки дубликатов до хеширования пароля"""
+    
+    def test_duplicate_email_rejected_without_hashing(self, user_service, test_user_data, monkeypatch):
+        """Дубликат email отклоняется без вызова bcrypt"""
+        user_service.create_user(UserCreate(**test_user_data))
+        
+        def fail_hash(password):
+            raise AssertionError("password must not be hashed for duplicates")
+        
+        monkeypatch.setattr(user_service, "_hash_password", fail_hash)
+        duplicate_data = test_user_data.copy()
+        duplicate_data["username"] = "different_username"
+        
+        from fastapi import HTTPException
+        with pytest.raises(HTTPException) as exc_info:
+            user_service.create_user(UserCreate(**duplicate_data))
+        
+        assert exc_info.value.status_code == 409
+    
+    def test_duplicate_on_update_rejected_without_hashing(self, user_service, test_user_data, test_user_data2, monkeypatch):
+        """Обновление на занятый username отклоняется без вызова bcrypt"""
+        user_service.create_user(UserCreate(**test_user_data))
+        second_user = user_service.create_user(UserCreate(**test_user_data2))
+        
+        def fail_hash(password):
+            raise AssertionError("password must not be hashed for duplicates")
+        
+        monkeypatch.setattr(user_service, "_hash_password", fail_hash)
+        update_data = UserUpdate(username=test_user_data["username"], password="newpassword123")
+        
+        from fastapi import HTTPException
+        with pytest.raises(HTTPException) as exc_info:
+            user_service.update_user(second_user.id, update_data)
+        
+        assert exc_info.value.status_code == 400
+    
+    def test_filter_miss_skips_database_probe(self, user_service, test_user_data):
+        """Значения, которых нет в фильтре, не проверяются запросом к базе"""
+        from app.services.user_service import user_identity_filter
+        
+        assert "unknown@example.com" not in user_identity_filter
+        assert user_service._identity_taken("unknown@example.com", "unknown_user") is False
+    
+    def test_load_user_identity_filter(self, db_session, user_service, test_user_data):
+        """Фильтр заполняется существующими пользователями"""
+        from app.services.user_service import load_user_identity_filter, user_identity_filter
+        
+        user_service.create_user(UserCreate(**test_user_data))
+        user_identity_filter.clear()
+        
+        assert load_user_identity_filter(db_session) == 1
+        assert test_user_data["email"] in user_identity_filter
+        assert test_user_data["username"] in user_identity_filter
+
+
+class TestBloomFilter:
+    """Тесты Bloom-фильтра"""
+    
+    def test_added_values_are_found(self):
+        """Добавленные значения всегда находятся"""
+        from app.core.bloom import BloomFilter
+        
+        bloom = BloomFilter(capacity=1000)
+        values = [f"user{i}@example.com" for i in range(1000)]
+        bloom.update(values)
+        
+        assert all(value in bloom for value in values)
+    
+    def test_false_positive_rate(self):
+        """Доля ложных срабатываний близка к заданной"""
+        from app.core.bloom import BloomFilter
+        
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        bloom.update(f"user{i}@example.com" for i in range(1000))
+        false_positives = sum(f"other{i}@example.com" in bloom for i in range(10000))
+        
+        assert false_positives < 300
+
+
+class TestUserCache:
+    """Тесты кеша пользователей"""
+    
+    @pytest.fixture(autouse=True)
+    def reset_cache(self):
+        from app.services.user_service import user_cache
+        user_cache.clear()
+        yield user_cache
+    
+    def test_repeated_lookup_hits_cache(self, user_service, test_user_data, reset_cache):
+        """Повторный поиск по id и email не обращается к базе"""
+        created_user = user_service.create_user(UserCreate(**test_user_data))
+        
+        user_service.get_user_by_id(created_user.id)
+        misses = reset_cache.misses
+        by_id = user_service.get_user_by_id(created_user.id)
+        by_email = user_service.get_user_by_email(created_user.email)
+        
+        assert reset_cache.misses == misses
+        assert reset_cache.hits == 2
+        assert by_id.email == test_user_data["email"]
+        assert by_email.id == created_user.id
+    
+    def test_missing_user_is_negatively_cached(self, user_service, reset_cache):
+        """Промах кешируется и сбрасывается при создании пользователя"""
+        assert user_service.get_user_by_email("new@example.com") is None
+        assert user_service.get_user_by_email("new@example.com") is None
+        assert reset_cache.hits == 1
+        
+        user_service.create_user(UserCreate(username="newuser", email="new@example.com", password="password123"))
+        
+        assert user_service.get_user_by_email("new@example.com") is not None
+    
+    def test_update_invalidates_cache(self, user_service, test_user_data):
+        """Обновление сбрасывает старые id и email"""
+        created_user = user_service.create_user(UserCreate(**test_user_data))
+        user_service.get_user_by_email(test_user_data["email"])
+        
+        user_service.update_user(created_user.id, UserUpdate(email="updated@example.com"))
+        
+        assert user_service.get_user_by_email(test_user_data["email"]) is None
+        assert user_service.get_user_by_id(created_user.id).email == "updated@example.com"
+    
+    def test_delete_invalidates_cache(self, user_service, test_user_data):
+        """Удаление сбрасывает записи пользователя"""
+        created_user = user_service.create_user(UserCreate(**test_user_data))
+        user_service.get_user_by_id(created_user.id)
+        user_service.get_user_by_email(created_user.email)
+        
+        user_service.delete_user(created_user.id)
+        
+        assert user_service.get_user_by_id(created_user.id) is None
+        assert user_service.get_user_by_email(test_user_data["email"]) is None
+    
+    def test_update_in_other_worker_invalidates_cache(self, user_service, test_user_data, tmp_path, monkeypatch):
+        """Изменение пользователя другим воркером сбрасывает запись в кеше этого процесса"""
+        monkeypatch.setattr(
+            user_service_module, "user_cache_invalidations",
+            SQLiteInvalidationLog(str(tmp_path / "invalidations.sqlite3"), poll_interval=0)
+        )
+        created_user = user_service.create_user(UserCreate(**test_user_data))
+        user_service.get_user_by_email(test_user_data["email"])
+
+        worker = multiprocessing.get_context("fork").Process(
+            target=_update_in_other_worker, args=(created_user.id, "moved@example.com")
+        )
+        worker.start()
+        worker.join()
+
+        assert worker.exitcode == 0
+        assert user_service.get_user_by_email(test_user_data["email"]) is None
+        assert user_service.get_user_by_id(created_user.id).email == "moved@example.com"
+
+    def test_ttl_expiry(self):
+        """Записи истекают по TTL"""
+        from app.core.cache import TTLCache
+        
+        cache = TTLCache(max_size=10, ttl=0.01)
+        cache.set("key", "value")
+        assert cache.get("key") == "value"
+        
+        import time
+        time.sleep(0.02)
+        assert cache.get("key") is TTLCache.MISSING
+        assert cache.stats()["misses"] == 1
@@ -1,5 +1,7 @@
 import pytest
 from fastapi import status
+from sqlalchemy import text
+from app.tests.conftest import engine
 from app.models.user import UserCreate
 
 
@@ -301,6 +303,22 @@ class TestTokenRefresh:
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
         assert "Invalid refresh token" in response.json()["detail"]
 
+    def test_refresh_ignores_cached_deleted_user(self, client, test_user_data):
+        """Пользователь, удаленный другим воркером, не получает токены из кеша этого процесса"""
+        client.post("/api/v1/users/register", json=test_user_data)
+        tokens = client.post("/api/v1/users/login", json={
+            "email": test_user_data["email"],
+            "password": test_user_data["password"]
+        }).json()
+        user_id = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"}).json()["id"]
+        # Пользователь попал в кеш процесса; удаляем его в обход сервиса, как другой воркер без общего журнала
+        assert client.get(f"/api/v1/users/{user_id}").status_code == status.HTTP_200_OK
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+
+        response = client.post("/api/v1/users/refresh", json={"refresh_token": tokens["refresh_token"]})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
 
 class TestCurrentUser:
     """Тесты для получения информации о текущем пользователе"""
@@ -378,3 +396,48 @@ class TestAPIStructure:
             
             # Должны получить ошибку валидации, но не 404
             assert response.status_code != 404
+
+
+class TestLazySession:
+    """Тесты ленивого получения сессии базы данных"""
+    
+    @pytest.fixture
+    def opened_sessions(self, monkeypatch):
+        """Подсчитывает сессии, открытые через get_db"""
+        from app.main import app
+        from app.core.database import get_db
+        from app.tests.conftest import override_get_db
+        
+        opened = []
+        
+        def counting_get_db():
+            opened.append(True)
+            yield from override_get_db()
+        
+        monkeypatch.setitem(app.dependency_overrides, get_db, counting_get_db)
+        return opened
+    
+    def test_invalid_access_token_does_not_open_session(self, client, opened_sessions):
+        """Неверный access токен отклоняется без открытия сессии"""
+        headers = {"Authorization": "Bearer invalid_token"}
+        response = client.get("/api/v1/users/me", headers=headers)
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert opened_sessions == []
+    
+    def test_invalid_refresh_token_does_not_open_session(self, client, opened_sessions):
+        """Неверный refresh токен отклоняется без открытия сессии"""
+        response = client.post("/api/v1/users/refresh", json={"refresh_token": "invalid_token"})
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert opened_sessions == []
+    
+    def test_access_token_is_not_accepted_as_refresh(self, client, test_user_data, opened_sessions):
+        """Access токен не подходит для обновления и не открывает сессию"""
+        from app.services.auth_service import create_access_token
+        
+        token = create_access_token(data={"sub": test_user_data["email"], "user_id": 1})
+        response = client.post("/api/v1/users/refresh", json={"refresh_token": token})
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert opened_sessions == []
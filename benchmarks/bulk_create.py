@@ -0,0 +1,43 @@
+"""Сравнение POST /questions/ и /answers/ по одному с bulk эндпоинтами
+
+    python -m benchmarks.bulk_create --items 2000 [--database-url postgresql://...]
+"""
+import argparse
+from benchmarks.common import create_client, auth_headers, timer, report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    client = create_client(args.database_url)
+    headers = auth_headers(client)
+    durations = {}
+
+    with timer(durations, "questions single"):
+        question_ids = [
+            client.post("/api/v1/questions/", json={"text": f"Question {i}"}).json()["id"]
+            for i in range(args.items)
+        ]
+    with timer(durations, "questions bulk"):
+        client.post("/api/v1/questions/bulk", json=[{"text": f"Question {i}"} for i in range(args.items)])
+
+    answers = [
+        {"question_id": question_ids[i % len(question_ids)], "text": f"Answer {i}"}
+        for i in range(args.items)
+    ]
+    with timer(durations, "answers single"):
+        for answer in answers:
+            client.post("/api/v1/answers/", json=answer, headers=headers)
+    with timer(durations, "answers bulk"):
+        client.post("/api/v1/answers/bulk", json=answers, headers=headers)
+
+    report("Bulk create vs single-item path", [
+        (name, args.items, seconds) for name, seconds in durations.items()
+    ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Память и время удаления вопроса с большим числом ответов
+
+    python -m benchmarks.cascade_delete --sizes 1000 10000 50000
+"""
+import argparse
+import time
+import tracemalloc
+from sqlalchemy import insert
+from benchmarks.common import prepare_environment
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    prepare_environment(args.database_url)
+    from app.core.database import engine, SessionLocal, Base
+    from app.alembic.models import Answer, Question
+    from app.services.question_service import QuestionService
+
+    Base.metadata.create_all(bind=engine)
+
+    def seed(answers: int) -> int:
+        with SessionLocal() as db:
+            question_id = db.scalar(insert(Question).values(text="benchmark").returning(Question.id))
+            db.execute(insert(Answer), [
+                {"question_id": question_id, "user_id": "bench", "text": f"Answer {i}"}
+                for i in range(answers)
+            ])
+            db.commit()
+        return question_id
+
+    def orm_cascade(question_id: int) -> None:
+        """Прежнее поведение: ORM загружает и удаляет каждый ответ"""
+        with SessionLocal() as db:
+            question = db.get(Question, question_id)
+            for answer in list(question.answers):
+                db.delete(answer)
+            db.delete(question)
+            db.commit()
+
+    def database_cascade(question_id: int) -> None:
+        with SessionLocal() as db:
+            QuestionService(db).delete_question(question_id)
+
+    print(f"Cascade delete on {engine.dialect.name}")
+    print(f"{'case':<20}{'answers':>10}{'seconds':>10}{'peak MiB':>10}")
+    for size in args.sizes:
+        for name, delete in (("ORM cascade", orm_cascade), ("ON DELETE CASCADE", database_cascade)):
+            question_id = seed(size)
+            tracemalloc.start()
+            started = time.perf_counter()
+            delete(question_id)
+            seconds = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{name:<20}{size:>10}{seconds:>10.3f}{peak / 2**20:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
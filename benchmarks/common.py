@@ -0,0 +1,58 @@
+"""Общие функции для бенчмарков
+
+Бенчмарки запускаются отдельно от тестов, например:
+    python -m benchmarks.bulk_create --items 2000
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+def prepare_environment(database_url: str | None = None) -> str:
+    """Настроить окружение до импорта приложения и вернуть URL базы"""
+    if database_url is None:
+        fd, path = tempfile.mkstemp(prefix="qa_bench_", suffix=".db")
+        os.close(fd)
+        database_url = f"sqlite:///{path}"
+    os.environ["DATABASE_URL"] = database_url
+    # Лимиты на login/register мешают нагрузочным прогонам
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    return database_url
+
+
+def create_client(database_url: str | None = None):
+    """TestClient приложения на отдельной базе"""
+    prepare_environment(database_url)
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    return TestClient(app)
+
+
+def auth_headers(client, email: str = "bench@example.com", password: str = "benchpassword") -> dict:
+    """Зарегистрировать пользователя и вернуть заголовок авторизации"""
+    client.post("/api/v1/users/register", json={
+        "username": email.split("@")[0],
+        "email": email,
+        "password": password
+    })
+    response = client.post("/api/v1/users/login", json={"email": email, "password": password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@contextmanager
+def timer(results: dict, name: str):
+    """Записать длительность блока в results[name] (секунды)"""
+    started = time.perf_counter()
+    yield
+    results[name] = time.perf_counter() - started
+
+
+def report(title: str, rows: list[tuple[str, int, float]]) -> None:
+    """Напечатать таблицу: название, количество элементов, секунды"""
+    print(title)
+    print(f"{'case':<32}{'items':>10}{'seconds':>12}{'items/sec':>14}")
+    for name, items, seconds in rows:
+        rate = items / seconds if seconds else float("inf")
+        print(f"{name:<32}{items:>10}{seconds:>12.3f}{rate:>14.0f}")
@@ -0,0 +1,79 @@
+"""Пропускная способность создания ответов с group commit и без него
+
+    python -m benchmarks.group_commit --answers 5000 --concurrency 64
+"""
+import argparse
+import asyncio
+import time
+from sqlalchemy import event
+from benchmarks.common import prepare_environment
+
+
+async def run_concurrently(total: int, concurrency: int, create) -> float:
+    """Создать total ответов из concurrency параллельных задач; вернуть секунды"""
+    remaining = iter(range(total))
+
+    async def worker():
+        for i in remaining:
+            await create(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--answers", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-batch", type=int, default=500)
+    parser.add_argument("--max-delay-ms", type=float, default=5)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    prepare_environment(args.database_url)
+    from starlette.concurrency import run_in_threadpool
+    from app.core.database import engine, SessionLocal, Base
+    from app.models.answer import AnswerCreate
+    from app.models.question import QuestionCreate
+    from app.services.answer_service import AnswerService
+    from app.services.question_service import QuestionService
+    from app.services.answer_batcher import AnswerBatcher
+
+    Base.metadata.create_all(bind=engine)
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(True))
+
+    with SessionLocal() as db:
+        question_id = QuestionService(db).create_question(QuestionCreate(text="benchmark")).id
+
+    def create_direct(i: int):
+        with SessionLocal() as db:
+            AnswerService(db).create_answer(AnswerCreate(question_id=question_id, text=f"Answer {i}"), "bench")
+
+    batcher = AnswerBatcher(SessionLocal, max_batch=args.max_batch, max_delay_ms=args.max_delay_ms)
+
+    async def create_batched(i: int):
+        await batcher.submit(AnswerCreate(question_id=question_id, text=f"Answer {i}"), "bench")
+
+    async def run():
+        rows = []
+        for name, create in (
+            ("commit per answer", lambda i: run_in_threadpool(create_direct, i)),
+            ("group commit", create_batched),
+        ):
+            commits.clear()
+            seconds = await run_concurrently(args.answers, args.concurrency, create)
+            rows.append((name, seconds, len(commits)))
+        await batcher.stop()
+        return rows
+
+    rows = asyncio.run(run())
+    print(f"{args.answers} answers, concurrency {args.concurrency}, {engine.dialect.name}")
+    print(f"{'case':<22}{'seconds':>10}{'answers/sec':>14}{'commits':>10}{'commits/sec':>14}")
+    for name, seconds, commit_count in rows:
+        print(f"{name:<22}{seconds:>10.3f}{args.answers / seconds:>14.0f}{commit_count:>10}{commit_count / seconds:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
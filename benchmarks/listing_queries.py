@@ -0,0 +1,76 @@
+"""Списки: ORM сущности против выборки только колонок ответа
+
+    python -m benchmarks.listing_queries --rows 100000
+
+База заполняется app.cli.generate_data, затем для пользователей, вопросов и
+ответов сравниваются прежний запрос сущностей (с identity map) и запрос
+сервиса, выбирающий колонки модели ответа. Время - запрос и рендеринг JSON,
+память - пик tracemalloc в отдельном прогоне.
+"""
+import argparse
+import time
+import tracemalloc
+from benchmarks.common import prepare_environment
+
+
+def measure(func) -> tuple[float, int]:
+    """Секунды и пик выделенной памяти (байты); tracemalloc замедляет код, поэтому два прогона"""
+    started = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    prepare_environment(args.database_url)
+    from sqlalchemy import func
+    from app.alembic.models import Answer, Question, User
+    from app.cli.generate_data import generate
+    from app.core.database import SessionLocal, engine
+    from app.core.serialization import render_list
+    from app.models.answer import AnswerResponse
+    from app.models.question import QuestionResponse
+    from app.models.user import UserResponse
+    from app.services.answer_service import AnswerService
+    from app.services.question_service import QuestionService
+    from app.services.user_service import UserService
+
+    generate(engine, args.rows, args.rows, args.rows, prefix="listing")
+
+    def entity_questions(db):
+        # Прежний get_all_questions
+        rows = db.query(Question, func.count(Answer.id).label("answers_count")).outerjoin(Answer).group_by(Question.id).all()
+        result = []
+        for question, answers_count in rows:
+            question.answers_count = answers_count
+            result.append(question)
+        return result
+
+    cases = [
+        ("users", UserResponse, lambda db: db.query(User).all(), lambda db: UserService(db).get_all_users()),
+        ("questions", QuestionResponse, entity_questions, lambda db: QuestionService(db).get_all_questions()),
+        ("answers", AnswerResponse, lambda db: db.query(Answer).all(), lambda db: AnswerService(db).get_all_answers()),
+    ]
+    print(f"Listing {args.rows} rows: query + render")
+    print(f"{'case':<28}{'seconds':>10}{'peak MB':>10}")
+    for name, model, entities, projected in cases:
+        for label, query in (("entities", entities), ("projected", projected)):
+            def run():
+                with SessionLocal() as db:
+                    render_list(model, query(db))
+
+            seconds, peak = measure(run)
+            print(f"{name + ' ' + label:<28}{seconds:>10.3f}{peak / 2 ** 20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Стоимость логирования на запрос: синхронные обработчики и очередь
+
+    python -m benchmarks.logging_cost --requests 20000
+
+Запрос имитируется набором вызовов, как у сервиса ответов (INFO и DEBUG).
+Время считается в вызывающем потоке; запись в файл для очереди идет в фоне.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from benchmarks.common import report
+
+
+def simulate_requests(count: int, lazy: bool) -> float:
+    """Вызовы логгера как в AnswerService.get_answers_by_question_id; вернуть секунды"""
+    logger = logging.getLogger("answer")
+    started = time.perf_counter()
+    for i in range(count):
+        if lazy:
+            logger.debug("Getting answers for question ID: %s", i)
+            logger.info("Retrieved %s answers for question %s", 10, i)
+            logger.info("Answer %s updated successfully", i)
+        else:
+            logger.debug(f"Getting answers for question ID: {i}")
+            logger.info(f"Retrieved {10} answers for question {i}")
+            logger.info(f"Answer {i} updated successfully")
+    return time.perf_counter() - started
+
+
+def setup_sync(log_file: str) -> None:
+    """Прежняя схема: StreamHandler и FileHandler прямо на корневом логгере"""
+    from app.core.logging import stop_logging
+
+    stop_logging()
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    formatter = logging.Formatter('%(asctime)s | %(levelname)-8s | %(name)s:%(funcName)s:%(lineno)d | %(message)s')
+    for handler in (logging.StreamHandler(sys.stdout), logging.FileHandler(log_file, encoding="utf-8")):
+        handler.setFormatter(formatter)
+        root_logger.addHandler(handler)
+    root_logger.setLevel(logging.INFO)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    from app.core.logging import setup_logging, stop_logging
+
+    directory = tempfile.mkdtemp(prefix="qa_bench_logs_")
+    stdout = sys.stdout
+    rows = []
+    cases = [
+        ("sync handlers, f-strings", None, False),
+        ("queue, lazy args", {"LOG_FORMAT": "text"}, True),
+        ("queue, lazy args, json", {"LOG_FORMAT": "json"}, True),
+        ("queue, json, 10% info sampled", {"LOG_FORMAT": "json", "LOG_INFO_SAMPLE_RATE": 0.1}, True),
+    ]
+    drain = {}
+    try:
+        for name, overrides, lazy in cases:
+            log_file = os.path.join(directory, f"{len(rows)}.log")
+            sys.stdout = open(os.devnull, "w")
+            if overrides is None:
+                setup_sync(log_file)
+            else:
+                settings.LOG_FILE = log_file
+                settings.LOG_QUEUE_SIZE = args.requests * 3
+                settings.LOG_INFO_SAMPLE_RATE = 1.0
+                for key, value in overrides.items():
+                    setattr(settings, key, value)
+                setup_logging()
+            seconds = simulate_requests(args.requests, lazy)
+            started = time.perf_counter()
+            stop_logging()
+            drain[name] = time.perf_counter() - started
+            sys.stdout.close()
+            sys.stdout = stdout
+            rows.append((name, args.requests, seconds))
+    finally:
+        sys.stdout = stdout
+
+    report("Logging cost in the request thread", rows)
+    print()
+    for name, _, seconds in rows:
+        print(f"{name:<32}{seconds / args.requests * 1e6:>8.2f} us/request, background drain {drain[name]:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
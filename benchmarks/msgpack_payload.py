@@ -0,0 +1,43 @@
+"""MessagePack против JSON: размер тела, кодирование и разбор
+
+    python -m benchmarks.msgpack_payload --items 10000
+
+Списки вопросов и ответов рендерятся render_list в JSON и в MessagePack
+(как для Accept: application/msgpack), затем разбираются на стороне клиента
+json.loads и msgpack.unpackb. Время - лучшее из --repeat запусков.
+"""
+import argparse
+import json
+from benchmarks.serialization import build_objects, measure
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from app.core.serialization import _msgpack_requested, msgpack, render_list
+    from app.models.answer import AnswerResponse
+    from app.models.question import QuestionResponse
+
+    if msgpack is None:
+        raise SystemExit("msgpack is not installed: pip install msgpack")
+
+    questions, answers, _, _ = build_objects(args.items)
+    print(f"{args.items} items, best of {args.repeat}")
+    print(f"{'case':<24}{'bytes':>12}{'encode ms':>12}{'decode ms':>12}")
+    for name, model, objects in (("questions", QuestionResponse, questions), ("answers", AnswerResponse, answers)):
+        for label, requested, decode in (("json", False, json.loads), ("msgpack", True, msgpack.unpackb)):
+            token = _msgpack_requested.set(requested)
+            try:
+                body = render_list(model, objects).body
+                encode_seconds = measure(lambda: render_list(model, objects), args.repeat)
+            finally:
+                _msgpack_requested.reset(token)
+            decode_seconds = measure(lambda: decode(body), args.repeat)
+            print(f"{name + ' ' + label:<24}{len(body):>12}{encode_seconds * 1000:>12.1f}{decode_seconds * 1000:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Сериализация моделей ответов: путь FastAPI и TypeAdapter в байты
+
+    python -m benchmarks.serialization --items 10000
+
+Для каждого списка сравниваются: serialize_response FastAPI с JSONResponse
+(как для обычного return из обработчика), валидация моделей from_attributes с
+dump_json и рендеринг app.core.serialization без валидации. Объекты - ORM
+сущности без сессии, атрибуты читаются через инструментацию SQLAlchemy.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, UTC
+from benchmarks.common import report
+
+
+def build_objects(items: int):
+    """Вопросы с количеством ответов, ответы, пользователи и вопрос со всеми ответами"""
+    from app.alembic.models import Answer, Question, User
+
+    started = datetime(2024, 1, 1, tzinfo=UTC)
+    questions = []
+    for i in range(items):
+        question = Question(id=i + 1, text=f"Question {i} " + "x" * (i % 200), created_at=started + timedelta(seconds=i))
+        question.answers_count = i % 7
+        questions.append(question)
+    answers = [
+        Answer(id=i + 1, question_id=i % 100 + 1, user_id=f"user_{i % 1000}@example.com",
+               text=f"Answer {i} " + "y" * (i % 300), created_at=started + timedelta(seconds=i))
+        for i in range(items)
+    ]
+    users = [
+        User(id=i + 1, username=f"user_{i}", email=f"user_{i}@example.com", hashed_password="x",
+             is_active=True, created_at=started, updated_at=started)
+        for i in range(items)
+    ]
+    with_answers = Question(id=1, text="Question with answers", created_at=started)
+    with_answers.answers = answers
+    return questions, answers, users, with_answers
+
+
+def fastapi_render(response_type, objects) -> bytes:
+    """Как APIRoute: serialize_response по response_model и JSONResponse"""
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    field = create_response_field(name="response", type_=response_type)
+    content = asyncio.run(serialize_response(field=field, response_content=objects))
+    return JSONResponse(content).body
+
+
+def measure(func, repeat: int) -> float:
+    """Лучшее время из repeat запусков"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from pydantic import TypeAdapter
+    from app.core.serialization import render_item, render_list
+    from app.models.answer import AnswerResponse
+    from app.models.question import QuestionResponse, QuestionWithAnswersResponse
+    from app.models.user import UserResponse
+
+    questions, answers, users, with_answers = build_objects(args.items)
+    cases = [
+        ("questions", list[QuestionResponse], questions, lambda: render_list(QuestionResponse, questions)),
+        ("answers", list[AnswerResponse], answers, lambda: render_list(AnswerResponse, answers)),
+        ("users", list[UserResponse], users, lambda: render_list(UserResponse, users)),
+        ("with-answers", QuestionWithAnswersResponse, with_answers,
+         lambda: render_item(QuestionWithAnswersResponse, with_answers)),
+    ]
+    rows = []
+    for name, response_type, objects, fast in cases:
+        adapter = TypeAdapter(response_type)
+        expected = fastapi_render(response_type, objects)
+        assert fast().body == expected, f"{name}: fast path differs from FastAPI output"
+        rows.append((f"{name} fastapi", args.items, measure(lambda: fastapi_render(response_type, objects), args.repeat)))
+        rows.append((f"{name} validate+dump_json", args.items, measure(
+            lambda: adapter.dump_json(adapter.validate_python(objects, from_attributes=True)), args.repeat
+        )))
+        rows.append((f"{name} type adapter", args.items, measure(fast, args.repeat)))
+    report(f"Serialization of {args.items} items (best of {args.repeat})", rows)
+
+
+if __name__ == "__main__":
+    main()
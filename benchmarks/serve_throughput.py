@@ -0,0 +1,155 @@
+"""Пропускная способность: один процесс uvicorn против python -m app.serve
+
+    python -m benchmarks.serve_throughput --workers 4 --seconds 10
+    python -m benchmarks.serve_throughput --path /api/v1/questions/ --path /api/v1/questions/1/with-answers
+
+База заполняется app.cli.generate_data, затем по очереди поднимаются сервер
+из Dockerfile (uvicorn app.main:app) и app.serve с --workers воркерами. Нагрузку
+по HTTP дают --clients процессов по --concurrency соединений в каждом, пути
+берутся из --path по кругу. Клиенты делят CPU с сервером, поэтому на машине с
+малым числом ядер сравнение занижает выигрыш от воркеров.
+
+Одновременных запросов по умолчанию меньше размера пула соединений процесса
+(5 + 10 overflow): async обработчики обращаются к БД синхронно, и при
+исчерпанном пуле event loop процесса ждет соединение до таймаута пула.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from benchmarks.common import prepare_environment
+from benchmarks.endpoints import percentiles
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float = 30) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Server at {url} did not start in {timeout}s")
+
+
+async def _load(base_url: str, paths: list[str], concurrency: int, seconds: float) -> tuple[list[float], int]:
+    import httpx
+
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker(offset: int):
+            nonlocal errors
+            index = offset
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(paths[index % len(paths)])
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+                index += 1
+
+        await asyncio.gather(*[worker(i) for i in range(concurrency)])
+    return latencies, errors
+
+
+def _client(base_url: str, paths: list[str], concurrency: int, seconds: float, results) -> None:
+    results.put(asyncio.run(_load(base_url, paths, concurrency, seconds)))
+
+
+def run_case(command: list[str], port: int, args) -> dict:
+    """Запустить сервер, дать нагрузку клиентами и остановить сервер"""
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(base_url + "/", process)
+        # Прогрев: соединения с БД, кеши и JIT-пути интерпретатора
+        asyncio.run(_load(base_url, args.path, args.concurrency, 1))
+
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=_client, args=(base_url, args.path, args.concurrency, args.seconds, results))
+            for _ in range(args.clients)
+        ]
+        started = time.perf_counter()
+        for client in clients:
+            client.start()
+        collected = [results.get() for _ in clients]
+        elapsed = time.perf_counter() - started
+        for client in clients:
+            client.join()
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+    latencies = [value for client_latencies, _ in collected for value in client_latencies]
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in collected),
+        "rps": len(latencies) / elapsed,
+        **percentiles(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--path", action="append")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+    args.path = args.path or ["/api/v1/questions/1", "/api/v1/questions/1/with-answers"]
+
+    prepare_environment(args.database_url)
+    # Запись логов в файл отключена в обоих случаях
+    os.environ.setdefault("LOG_FILE", "")
+    from sqlalchemy import create_engine
+    from app.cli.generate_data import generate
+
+    engine = create_engine(os.environ["DATABASE_URL"])
+    generate(engine, args.rows // 10, args.rows, args.rows, prefix="serve")
+    engine.dispose()
+
+    port = free_port()
+    cases = [
+        ("uvicorn (Dockerfile)", [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)]),
+        (f"app.serve x{args.workers}", [sys.executable, "-m", "app.serve", "--port", str(port), "--workers", str(args.workers)]),
+    ]
+    print(f"{args.seconds}s, {args.clients} clients x {args.concurrency} connections, paths: {', '.join(args.path)}")
+    print(f"{'case':<28}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    baseline = None
+    for name, command in cases:
+        result = run_case(command, port, args)
+        baseline = baseline or result["rps"]
+        print(
+            f"{name:<28}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10.0f}"
+            f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}  x{result['rps'] / baseline:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()